@@ -14,25 +14,38 @@ Critical: Showing/hiding controls NEVER changes render host geometry.
 """
 
 import argparse
+import base64
+import bisect
 import ctypes
+import hashlib
+import heapq
 import json
+import math
+import mmap
+import multiprocessing
 import re
 import os
+import shutil
+import sqlite3
 import subprocess
 import sys
 import time
 import threading
+import zlib
+from array import array
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-from PySide6.QtCore import QEvent, QObject, QPropertyAnimation, QTimer, Qt, QEasingCurve, QUrl, Signal, QPoint, QRect
-from PySide6.QtGui import QAction, QWheelEvent, QDesktopServices, QClipboard, QPainter, QColor, QPen, QKeySequence, QIcon, QCursor, QGuiApplication, QPixmap
+from PySide6.QtCore import QAbstractListModel, QEvent, QModelIndex, QObject, QPropertyAnimation, QTimer, Qt, QEasingCurve, QUrl, Signal, QPoint, QRect, QSize
+from PySide6.QtGui import QAction, QWheelEvent, QDesktopServices, QClipboard, QPainter, QColor, QPen, QKeySequence, QIcon, QCursor, QGuiApplication, QPixmap, QImage
 from PySide6.QtWidgets import (
     QApplication,
     QGraphicsOpacityEffect,
     QHBoxLayout,
     QInputDialog,
     QLabel,
+    QLineEdit,
     QMainWindow,
     QMenu,
     QMessageBox,
@@ -45,6 +58,7 @@ from PySide6.QtWidgets import (
     QStyleOptionSlider,
     QSizePolicy,
     QDialog,
+    QListView,
     QListWidget,
     QListWidgetItem,
     QScrollArea,
@@ -101,6 +115,11 @@ except Exception as e:
     mpv = None
     IMPORT_ERR = e
 
+try:
+    import numpy as np
+except Exception:
+    np = None
+
 
 def atomic_write_json(path: Path, obj: dict) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
@@ -165,7 +184,19 @@ def parse_args():
     p.add_argument("--win-h", dest="win_h", type=int, default=None)
     p.add_argument("--parent-hwnd", dest="parent_hwnd", type=int, default=0)
     p.add_argument("--app-exe", dest="app_exe", default="")
+    # Headless service modes (no window): paths come from stdin, extra args, or --server
+    p.add_argument("--probe", dest="probe", action="store_true", default=False)
+    p.add_argument("--workers", dest="service_workers", type=int, default=0)
+    p.add_argument("--server", dest="service_server", default="")
+    p.add_argument("--no-cache", dest="no_cache", action="store_true", default=False)
+    p.add_argument("--thumbnails", dest="thumbnails", action="store_true", default=False)
+    p.add_argument("--times", dest="poster_times", default="smart")
+    p.add_argument("--width", dest="poster_width", type=int, default=480)
+    p.add_argument("--format", dest="poster_format", default="jpg")
+    p.add_argument("--quality", dest="poster_quality", type=int, default=85)
+    p.add_argument("--cache-max-mb", dest="cache_max_mb", type=int, default=1024)
     args, _unknown = p.parse_known_args()
+    args.extra_args = [x for x in _unknown if not str(x).startswith("-")]
     return args
 
 
@@ -399,230 +430,4349 @@ def _natural_sort_key(filename: str) -> List:
     return parts
 
 
+_SEARCH_SPLIT_RE = re.compile(r"[\s._\-\[\](){}+,~!]+")
+def _normalize_search_text(text: str) -> str:
+    """Lowercase and collapse separators so 'Show.S01E02_[720p]' reads as plain words."""
+    try:
+        return " ".join(t for t in _SEARCH_SPLIT_RE.split(str(text or "").lower()) if t)
+    except Exception:
+        return ""
+
+
 # ============================================================================
-# Build 13 UI Components
+# Episode naming and show-level episode index
 # ============================================================================
 
-class VolumeHUD(QWidget):
-    """Smooth animated volume HUD overlay."""
-    
-    def __init__(self, parent: QWidget):
-        super().__init__(parent)
-        self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.Tool)
-        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents, True)
-        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground, True)
-        
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(14, 10, 14, 10)
-        layout.setSpacing(10)
+def library_video_id(path: str) -> str:
+    """The library's video id for a file (mirrors videoIdForPath in workers/shared/ids.js)."""
+    try:
+        st = os.stat(path)
+        # Node's stat mtimeMs, formatted the way JS prints numbers.
+        ms = (st.st_mtime_ns // 1_000_000_000) * 1e3 + (st.st_mtime_ns % 1_000_000_000) / 1e6
+        ms_s = str(int(ms)) if ms == int(ms) else repr(ms)
+        raw = f"{path}::{st.st_size}::{ms_s}".encode("utf-8")
+        return base64.urlsafe_b64encode(hashlib.sha1(raw).digest()).decode("ascii").rstrip("=")
+    except Exception:
+        return ""
 
-        self.symbol_label = QLabel("◕")
-        self.symbol_label.setStyleSheet(
-            "font-size: 18px; color: rgba(255, 255, 255, 0.95); font-family: 'Segoe UI', 'Tahoma', sans-serif;"
-        )
-        layout.addWidget(self.symbol_label)
 
-        self.bar_container = QWidget()
-        self.bar_container.setFixedSize(140, 10)
-        self.bar_container.setStyleSheet(
-            "background: rgba(0, 0, 0, 0.35); border: 1px solid rgba(255, 255, 255, 0.35);"
-        )
-        self.bar = QWidget(self.bar_container)
-        self.bar.setStyleSheet("background: rgba(255, 255, 255, 0.9);")
-        layout.addWidget(self.bar_container)
+_NAME_NOISE_RES = (
+    re.compile(r"\[[^\]]*\]|\{[^}]*\}"),
+    re.compile(r"\((?:[^)]*?(?:\d{3,4}p|x26[45]|h\.?26[45]|hevc|avc|aac|flac|bd|web|dvd|bluray|10bit|[0-9a-f]{8})[^)]*)\)", re.IGNORECASE),
+    re.compile(r"\b(?:\d{3,4}[pi]|[48]k|x26[45]|h\.?26[45]|hevc|avc|av1|xvid|divx|aac(?:2\.0)?|ac3|e-?ac-?3|dts|flac|opus|mp3|10-?bit|8-?bit|hdr(?:10)?|dual[ ._-]?audio|multi[ ._-]?subs?|bd(?:rip)?|blu-?ray|web(?:-?dl|rip)?|dvd(?:rip)?|remux)\b", re.IGNORECASE),
+)
+_SPECIAL_MARK_RE = re.compile(r"\b(OVA|OAD|ONA|SP(?=[ ._-]*\d)|Specials?|Extras?|Bonus|NC ?OP|NC ?ED|Creditless|Recap)(?:[ ._-]*(\d{1,3}))?\b", re.IGNORECASE)
+_EPISODE_NAME_RES = (
+    # S01E02, S1 E2, S01.E02, S01E02E03 (first), S01E02v2
+    re.compile(r"\bS(\d{1,2})[ ._-]*E(\d{1,4}(?:\.\d)?)(?:[ ._-]*E\d{1,4})*(?:[ ._-]*v(\d))?", re.IGNORECASE),
+    # 1x02
+    re.compile(r"\b(\d{1,2})x(\d{2,4})(?:v(\d))?\b", re.IGNORECASE),
+    # Season 1 Episode 2
+    re.compile(r"\bSeason[ ._-]*(\d{1,2})\D{0,6}?Ep(?:isode)?[ ._-]*(\d{1,4})(?:v(\d))?", re.IGNORECASE),
+)
+_EPISODE_ONLY_RES = (
+    # Ep 02, Episode 2, E02, #02
+    re.compile(r"(?:\b(?:Ep(?:isode)?|E)|#)[ ._-]*(\d{1,4}(?:\.\d)?)(?:v(\d))?\b", re.IGNORECASE),
+    # "Show - 02v2", "Show - 12.5 - Title"
+    re.compile(r"\s-\s+(\d{1,4}(?:\.\d)?)(?:v(\d))?\b"),
+    # Trailing bare number: "Show 02", "Show_02v2"
+    re.compile(r"(?:^|[ ._-])(\d{1,4}(?:\.\d)?)(?:v(\d))?[ ._-]*$"),
+)
+_SEASON_FOLDER_RES = (
+    re.compile(r"^(?:Season|Series|Saison|Staffel|S)[ ._-]*(\d{1,2})\b", re.IGNORECASE),
+    re.compile(r"\bSeason[ ._-]*(\d{1,2})\b", re.IGNORECASE),
+    re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)[ ._-]+Season\b", re.IGNORECASE),
+    re.compile(r"\bS(\d{1,2})\b"),
+)
+_SPECIALS_FOLDER_RE = re.compile(r"^(?:Specials?|Extras?|Bonus|OVAs?|OADs?|SPs?|Featurettes?|NC(?:OP|ED)s?|Season[ ._-]*0+)$", re.IGNORECASE)
+_YEAR_RE = re.compile(r"^(?:19|20)\d{2}$")
+
+
+def parse_episode_name(filename: str) -> Dict[str, Any]:
+    """Parse season/episode/version/special markers from a release-style file name.
+
+    Returns a dict with ``season`` (int|None), ``episode`` (float|None),
+    ``version`` (int, 1 when absent), ``special`` (bool) and ``ova`` (bool).
+    Bracketed tags and codec/resolution noise are ignored, so
+    "[Grp] Show - 10v2 [1080p][ABCD1234].mkv" reads as episode 10, version 2.
+    """
+    info: Dict[str, Any] = {"season": None, "episode": None, "version": 1, "special": False, "ova": False}
+    try:
+        stem = Path(str(filename)).stem
+    except Exception:
+        stem = str(filename or "")
+    text = stem.replace("_", " ")
+    for rx in _NAME_NOISE_RES:
+        text = rx.sub(" ", text)
+    text = re.sub(r"\s{2,}", " ", text).strip()
+
+    for rx in _EPISODE_NAME_RES:
+        m = rx.search(text)
+        if m:
+            try:
+                info["season"] = int(m.group(1))
+                info["episode"] = float(m.group(2))
+                if m.group(3):
+                    info["version"] = int(m.group(3))
+            except Exception:
+                pass
+            break
+
+    sm = _SPECIAL_MARK_RE.search(text)
+    if sm:
+        mark = sm.group(1).upper()
+        info["special"] = True
+        info["ova"] = mark in ("OVA", "OAD", "ONA")
+        if info["episode"] is None and sm.group(2):
+            try:
+                info["episode"] = float(sm.group(2))
+            except Exception:
+                pass
 
-        self.percent_label = QLabel("100%")
-        self.percent_label.setStyleSheet(
-            "font-size: 13px; font-weight: bold; color: rgba(255, 255, 255, 0.95);"
-            "font-family: 'Segoe UI', 'Tahoma', sans-serif;"
-        )
-        layout.addWidget(self.percent_label)
+    if info["season"] is not None and info["season"] == 0:
+        info["special"] = True
+
+    if info["episode"] is None:
+        for rx in _EPISODE_ONLY_RES:
+            m = rx.search(text)
+            if not m:
+                continue
+            num = m.group(1)
+            if _YEAR_RE.match(num):
+                continue
+            try:
+                info["episode"] = float(num)
+                if m.group(2):
+                    info["version"] = int(m.group(2))
+            except Exception:
+                continue
+            break
 
-        self.setStyleSheet("""
-            QWidget {
-                background: rgba(0, 0, 0, 0.68);
-                border-radius: 4px;
-                border: 2px solid rgba(255, 255, 255, 0.35);
-            }
-        """)
-        
-        self.opacity_effect = QGraphicsOpacityEffect(self)
-        self.setGraphicsEffect(self.opacity_effect)
-        self.opacity_effect.setOpacity(0.0)
-        
-        self.fade_anim = QPropertyAnimation(self.opacity_effect, b"opacity")
-        self.fade_anim.setEasingCurve(QEasingCurve.Type.InOutQuad)
-        
-        self.hide_timer = QTimer(self)
-        self.hide_timer.setSingleShot(True)
-        self.hide_timer.timeout.connect(self._fade_out)
-        
-        self.hide()
-    
-    def show_volume(self, volume: int):
-        volume = max(0, min(100, volume))
-        self.percent_label.setText(f"{volume}%")
-        bar_width = int(140 * volume / 100)
-        self.bar.setGeometry(0, 0, bar_width, 10)
-        
-        if volume == 0:
-            self.symbol_label.setText("⊘")
-        elif volume < 33:
-            self.symbol_label.setText("◔")
-        elif volume < 66:
-            self.symbol_label.setText("◑")
-        else:
-            self.symbol_label.setText("◕")
-        
-        parent = self.parent()
-        if parent:
-            self.adjustSize()
-            x = (parent.width() - self.width()) // 2
-            y = parent.height() // 3
-            self.move(x, y)
-        
-        self.show()
-        self.fade_anim.stop()
-        self.fade_anim.setDuration(150)
-        self.fade_anim.setStartValue(self.opacity_effect.opacity())
-        self.fade_anim.setEndValue(1.0)
-        self.fade_anim.start()
-        
-        self.hide_timer.stop()
-        self.hide_timer.start(1000)
-    
-    def _fade_out(self):
-        self.fade_anim.stop()
-        self.fade_anim.setDuration(200)
-        self.fade_anim.setStartValue(self.opacity_effect.opacity())
-        self.fade_anim.setEndValue(0.0)
-        self.fade_anim.finished.connect(self.hide)
-        self.fade_anim.start()
+    try:
+        ep = info["episode"]
+        if ep is not None and ep != int(ep) and not info["special"]:
+            # 12.5-style recap/bonus episodes sort inline but don't count as regular episodes.
+            info["special"] = True
+    except Exception:
+        pass
+    return info
 
 
-class MpvRenderHost(QWidget):
+def _episode_number_hint(filename: str) -> Optional[int]:
+    """Best-effort episode number from a file name (used for search tokens)."""
+    try:
+        ep = parse_episode_name(filename).get("episode")
+        return int(ep) if ep is not None else None
+    except Exception:
+        return None
+
+
+def _episode_sort_key(filename: str) -> Tuple:
+    """Playlist order: parsed (season, episode, version), falling back to natural order.
+
+    Unlike plain natural sort this keeps "S01E10v2" right after "S01E10" and
+    floats OVAs/NCOPs after the regular episodes instead of mixing them in.
     """
-    Build 13 Render Host - Non-interactive surface with intentional event routing.
-    
-    Equivalent of #mpvHost in Build 110. Routes specific events only:
-    - Wheel for volume
-    - Right-click for menu
-    - Mouse movement for edge reveal
+    name = os.path.basename(str(filename))
+    try:
+        info = parse_episode_name(name)
+    except Exception:
+        info = {}
+    ep = info.get("episode")
+    season = info.get("season")
+    extra = bool(info.get("special")) and not (ep is not None and ep != int(ep))
+    return (
+        1 if extra else 0,
+        season if season is not None else -1,
+        0 if ep is not None else 1,
+        ep if ep is not None else 0.0,
+        int(info.get("version") or 1),
+        _natural_sort_key(name),
+    )
+
+
+def _season_folder_info(name: str) -> Tuple[Optional[int], bool]:
+    """(season number, is_specials) from a folder name like "Season 02" or "Specials"."""
+    n = str(name or "").strip()
+    if _SPECIALS_FOLDER_RE.match(n):
+        return 0, True
+    for rx in _SEASON_FOLDER_RES:
+        m = rx.search(n)
+        if m:
+            try:
+                num = int(m.group(1))
+                return num, num == 0
+            except Exception:
+                continue
+    return None, False
+
+
+class ShowEpisodeIndex:
+    """Ordered seasons (folders) and episodes under a show root.
+
+    Built from one directory listing per season folder and persisted under the
+    player cache; reuse is validated against the folders' mtimes, so stepping
+    past a season's last episode never needs a rescan. Specials folders are
+    indexed but skipped when continuing from one season into the next.
     """
-    
-    wheel_volume_signal = Signal(int)
-    right_click_signal = Signal(QPoint)
-    mouse_move_signal = Signal(QPoint)
-    
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setMouseTracking(True)
-        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
-        self.setStyleSheet("background-color: black;")
-        self._mpv_instance = None
-    
-        # Build 20.5: Click tracking for double-click detection
-        self._left_click_last_t = None
-    def attach_mpv(self, mpv_instance):
-        try:
-            self._mpv_instance = mpv_instance
-            self._mpv_instance.wid = str(int(self.winId()))
-        except Exception as e:
-            print(f"MpvRenderHost attach_mpv error: {e}")
-    
-    def wheelEvent(self, event: QWheelEvent):
-        try:
-            delta = event.angleDelta().y()
-            self.wheel_volume_signal.emit(delta)
-        except Exception:
-            pass
-        event.accept()
-    
-    def mousePressEvent(self, event):
-        try:
-            # Right click: context menu (preserve existing behavior)
-            if event.button() == Qt.MouseButton.RightButton:
-                global_pos = self.mapToGlobal(event.pos())
-                self.right_click_signal.emit(global_pos)
-                event.accept()
-                return
 
-            # Left click: dismiss overlays (if any) and keep focus.
-            # IMPORTANT: do NOT play/pause on click (prevents double-click causing a single-click toggle).
-            if event.button() == Qt.MouseButton.LeftButton:
-                w = self.window()
-                try:
-                    if w and hasattr(w, "_dismiss_overlays_on_click") and w._dismiss_overlays_on_click():
-                        event.accept()
-                        return
-                except Exception:
-                    pass
+    VERSION = 1
+    _cache: Dict[str, "ShowEpisodeIndex"] = {}
+    _cache_lock = threading.Lock()
 
-                # Keep hotkeys working after click
-                try:
-                    if w:
-                        w.activateWindow()
-                        w.raise_()
-                        w.setFocus(Qt.FocusReason.ActiveWindowFocusReason)
-                        w.grabKeyboard()
-                except Exception:
-                    pass
-                try:
-                    self.setFocus(Qt.FocusReason.ActiveWindowFocusReason)
-                except Exception:
-                    pass
+    def __init__(self, root: Path, seasons: List[Dict[str, Any]], signature: Dict[str, int]):
+        self.root = Path(root)
+        self.seasons = seasons
+        self.signature = signature
+        self._season_of: Dict[str, int] = {}
+        for i, s in enumerate(seasons):
+            self._season_of[os.path.normcase(str(s["folder"]))] = i
 
-                event.accept()
-                return
+    # ---- Lookup ----
+
+    @staticmethod
+    def show_root_for(folder: Path) -> Optional[Path]:
+        """The show root for a playing folder, or None if it isn't part of a season layout."""
+        try:
+            folder = Path(folder)
+            season, special = _season_folder_info(folder.name)
+            if season is not None or special:
+                return folder.parent
+            for entry in os.scandir(folder):
+                if entry.is_dir(follow_symlinks=False):
+                    s, sp = _season_folder_info(entry.name)
+                    if s is not None or sp:
+                        return folder
         except Exception:
             pass
-        event.ignore()
+        return None
 
+    @classmethod
+    def for_folder(cls, folder: Path, validate: bool = True) -> Optional["ShowEpisodeIndex"]:
+        root = cls.show_root_for(folder)
+        if root is None:
+            return None
+        return cls.for_root(root, validate=validate)
+
+    @classmethod
+    def for_root(cls, root: Path, validate: bool = True) -> Optional["ShowEpisodeIndex"]:
+        try:
+            root = Path(root).resolve()
+        except Exception:
+            root = Path(root)
+        key = os.path.normcase(str(root))
+        with cls._cache_lock:
+            idx = cls._cache.get(key)
+        sig = cls._signature(root) if (validate or idx is None) else None
+        if idx is not None and (sig is None or idx.signature == sig):
+            return idx
+        if idx is None:
+            idx = cls._load_persisted(root, sig)
+        if idx is None or idx.signature != sig:
+            idx = cls._build(root, sig)
+            idx._persist()
+        with cls._cache_lock:
+            cls._cache[key] = idx
+        return idx
+
+    def season_index_of(self, folder: Path) -> int:
+        try:
+            return self._season_of.get(os.path.normcase(str(Path(folder).resolve())), -1)
+        except Exception:
+            return -1
+
+    def adjacent_season(self, folder: Path, step: int) -> Optional[Dict[str, Any]]:
+        """Nearest non-special season folder with episodes, `step` (+1/-1) away from `folder`."""
+        i = self.season_index_of(folder)
+        if i < 0:
+            return None
+        step = 1 if step >= 0 else -1
+        j = i + step
+        while 0 <= j < len(self.seasons):
+            s = self.seasons[j]
+            if not s.get("special") and s.get("episodes"):
+                return s
+            j += step
+        return None
 
+    def episode_paths(self, season: Dict[str, Any]) -> List[str]:
+        folder = str(season.get("folder") or "")
+        return [os.path.join(folder, n) for n in (season.get("episodes") or [])]
 
-    
+    # ---- Build / persist ----
 
-    def mouseDoubleClickEvent(self, event):
-        """Double-click toggles fullscreen (left button only)."""
+    @staticmethod
+    def _signature(root: Path) -> Dict[str, int]:
+        sig: Dict[str, int] = {}
         try:
-            if event.button() == Qt.MouseButton.LeftButton:
-                # Build 20.5: Clear click timestamp so double-click is clean
-                try:
-                    self._left_click_last_t = None
-                except Exception:
-                    pass
-                w = self.window()
-                if w and hasattr(w, '_toggle_fullscreen'):
-                    w._toggle_fullscreen()
-                # Keep keys/hotkeys reliable after toggling
-                try:
-                    if w:
-                        w.activateWindow()
-                        w.raise_()
-                        w.setFocus(Qt.FocusReason.ActiveWindowFocusReason)
-                        w.grabKeyboard()
-                except Exception:
-                    pass
-                try:
-                    self.setFocus(Qt.FocusReason.ActiveWindowFocusReason)
-                except Exception:
-                    pass
-                event.accept()
-                return
+            sig["."] = int(os.stat(root).st_mtime_ns)
+            for entry in os.scandir(root):
+                if entry.is_dir(follow_symlinks=False):
+                    try:
+                        sig[entry.name] = int(entry.stat().st_mtime_ns)
+                    except Exception:
+                        pass
         except Exception:
             pass
-        event.ignore()
-    def mouseMoveEvent(self, event):
+        return sig
+
+    @classmethod
+    def _build(cls, root: Path, signature: Dict[str, int]) -> "ShowEpisodeIndex":
+        groups: List[Tuple[Tuple, Dict[str, Any]]] = []
+        folders = [root] + sorted(
+            (root / name for name in signature if name != "."),
+            key=lambda p: _natural_sort_key(p.name),
+        )
+        for folder in folders:
+            try:
+                names = [e.name for e in os.scandir(folder) if e.is_file() and _is_video_file(e.name)]
+            except Exception:
+                continue
+            if not names:
+                continue
+            names.sort(key=_episode_sort_key)
+            if folder == root:
+                season, special = None, False
+            else:
+                season, special = _season_folder_info(folder.name)
+            if season is None:
+                # Unlabelled folder: take the season most of its files claim.
+                counts: Dict[int, int] = {}
+                for n in names:
+                    sn = parse_episode_name(n).get("season")
+                    if sn is not None:
+                        counts[sn] = counts.get(sn, 0) + 1
+                if counts:
+                    season = max(counts.items(), key=lambda kv: kv[1])[0]
+                    special = special or season == 0
+            order = (
+                1 if special else 0,
+                season if season is not None else (-1 if folder == root else 10 ** 6),
+                _natural_sort_key(folder.name),
+            )
+            groups.append((order, {
+                "folder": str(folder),
+                "season": season,
+                "special": bool(special),
+                "episodes": names,
+            }))
+        groups.sort(key=lambda g: g[0])
+        return cls(root, [g[1] for g in groups], signature)
+
+    @staticmethod
+    def _persist_path(root: Path) -> Path:
+        h = hashlib.sha1(os.path.normcase(str(root)).encode("utf-8", errors="replace")).hexdigest()
+        return _player_cache_dir("shows") / f"{h}.json"
+
+    @classmethod
+    def _load_persisted(cls, root: Path, signature: Optional[Dict[str, int]]) -> Optional["ShowEpisodeIndex"]:
+        try:
+            data = read_json(cls._persist_path(root), None)
+            if not isinstance(data, dict) or data.get("version") != cls.VERSION:
+                return None
+            if data.get("root") != str(root):
+                return None
+            sig = {str(k): int(v) for k, v in (data.get("signature") or {}).items()}
+            if signature is not None and sig != signature:
+                return None
+            seasons = [s for s in (data.get("seasons") or []) if isinstance(s, dict) and s.get("folder")]
+            return cls(root, seasons, sig)
+        except Exception:
+            return None
+
+    def _persist(self):
         try:
-            w = self.window()
-            if w and hasattr(w, "_on_mouse_activity"):
-                w._on_mouse_activity(event.pos())
-            elif w and hasattr(w, "_handle_mouse_move_for_hud"):
-                # Fallback
-                w._handle_mouse_move_for_hud(event.pos())
+            p = self._persist_path(self.root)
+            p.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_json(p, {
+                "version": self.VERSION,
+                "root": str(self.root),
+                "signature": self.signature,
+                "seasons": self.seasons,
+            })
         except Exception:
             pass
-        event.accept()
+
+
+# ============================================================================
+# Track preference rules (per show)
+# ============================================================================
+
+_LANG_ALIASES = {
+    "ja": "jpn", "en": "eng", "es": "spa", "fr": "fra", "fre": "fra", "de": "deu", "ger": "deu",
+    "it": "ita", "pt": "por", "ru": "rus", "zh": "zho", "chi": "zho", "ko": "kor", "ar": "ara",
+    "nl": "nld", "dut": "nld", "pl": "pol", "tr": "tur", "sv": "swe", "fi": "fin", "id": "ind",
+    "vi": "vie", "th": "tha", "hi": "hin", "he": "heb", "heb": "heb", "uk": "ukr", "cs": "ces", "cze": "ces",
+}
+# Title words that tell otherwise identical tracks apart ("Signs & Songs" vs "Full Subtitles").
+_TRACK_TITLE_KEYWORDS = ("sign", "song", "full", "dialogue", "forced", "sdh", "cc", "commentary",
+                         "honorific", "dub", "karaoke", "lyric")
+
+
+def normalize_lang(code: Any) -> str:
+    c = str(code or "").strip().lower().split("-")[0].split("_")[0]
+    return _LANG_ALIASES.get(c, c)
+
+
+def _title_words(track: Dict[str, Any]) -> set:
+    words = set()
+    for w in re.findall(r"[a-z]+", str(track.get("title") or "").lower()):
+        words.add(w[:-1] if len(w) > 3 and w.endswith("s") else w)
+    return words
+
+
+class TrackPreferences:
+    """Ordered audio/subtitle selection rules for one show, learned from explicit picks.
+
+    Each kind holds a rule list (language, title keywords, forced, default, ...).
+    A track's score is the tuple of rule matches, so earlier rules dominate;
+    language and external rules are filters, and a file where nothing passes
+    them is left to mpv. Picks are memoized per track-list layout, so the
+    episodes of a season resolve with one dict lookup.
+    """
+
+    VERSION = 1
+    MAX_PICKS = 64
+
+    def __init__(self, key: str, rules: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                 picks: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.key = key
+        self.rules: Dict[str, List[Dict[str, Any]]] = dict(rules or {})
+        self._picks: "OrderedDict[str, Dict[str, Any]]" = OrderedDict(picks or {})
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    # ---- Persistence ----
+
+    @staticmethod
+    def _persist_path(key: str) -> Path:
+        h = hashlib.sha1(key.encode("utf-8", errors="replace")).hexdigest()
+        return _player_cache_dir("trackprefs") / f"{h}.json"
+
+    @classmethod
+    def load(cls, key: str) -> "TrackPreferences":
+        data = read_json(cls._persist_path(key), None)
+        if not isinstance(data, dict) or data.get("version") != cls.VERSION or data.get("key") != key:
+            return cls(key)
+        return cls(key, data.get("rules") or {}, data.get("picks") or {})
+
+    def save(self):
+        with self._lock:
+            payload = {"version": self.VERSION, "key": self.key, "rules": self.rules, "picks": dict(self._picks)}
+            self._dirty = False
+        try:
+            atomic_write_json(self._persist_path(self.key), payload)
+        except Exception as e:
+            print(f"Track prefs save error: {e}")
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    # ---- Rules ----
+
+    def language(self, kind: str) -> str:
+        return next((str(r["lang"]) for r in self.rules.get(kind) or [] if r.get("lang")), "")
+
+    def learn(self, kind: str, chosen: Optional[Dict[str, Any]], tracks: List[Dict[str, Any]]):
+        """Replace `kind`'s rules with ones that reproduce `chosen` among `tracks` (None = subtitles off)."""
+        group = [t for t in tracks if t.get("type") == kind]
+        if chosen is None:
+            rules: List[Dict[str, Any]] = [{"off": True}]
+        else:
+            rules = []
+            lang = normalize_lang(chosen.get("lang"))
+            if lang:
+                rules.append({"lang": lang})
+            if chosen.get("external"):
+                rules.append({"external": True})
+            words = _title_words(chosen)
+            seen = [_title_words(t) for t in group]
+            for kw in _TRACK_TITLE_KEYWORDS:
+                hits = sum(1 for ws in seen if kw in ws)
+                if 0 < hits < len(seen) or (kw in words and len(seen) == 1):
+                    rules.append({"title": kw, "is": kw in words})
+            if kind == "sub" and len({bool(t.get("forced")) for t in group}) > 1:
+                rules.append({"forced": bool(chosen.get("forced"))})
+            rules.append({"default": True})
+        with self._lock:
+            if self.rules.get(kind) != rules:
+                self.rules[kind] = rules
+                self._picks.clear()
+                self._dirty = True
+
+    @staticmethod
+    def _match(rule: Dict[str, Any], t: Dict[str, Any]) -> bool:
+        if "lang" in rule:
+            return normalize_lang(t.get("lang")) == rule["lang"]
+        if "title" in rule:
+            return (rule["title"] in _title_words(t)) == bool(rule.get("is", True))
+        for flag in ("forced", "default", "external"):
+            if flag in rule:
+                return bool(t.get(flag)) == bool(rule[flag])
+        return False
+
+    def _evaluate(self, kind: str, group: List[Dict[str, Any]]) -> Optional[str]:
+        rules = self.rules.get(kind) or []
+        if not rules:
+            return None
+        if rules[0].get("off"):
+            return "no"
+        for r in rules:
+            if "lang" in r or r.get("external"):
+                group = [t for t in group if self._match(r, t)]
+        if not group:
+            return None
+        best = max(enumerate(group), key=lambda it: (tuple(self._match(r, it[1]) for r in rules), -it[0]))
+        return str(best[1].get("id"))
+
+    @staticmethod
+    def layout(tracks: List[Dict[str, Any]]) -> str:
+        sig = [(t.get("type"), t.get("id"), normalize_lang(t.get("lang")), str(t.get("title") or ""),
+                bool(t.get("forced")), bool(t.get("default")), bool(t.get("external")))
+               for t in tracks if t.get("type") in ("audio", "sub")]
+        return hashlib.sha1(json.dumps(sig).encode("utf-8")).hexdigest()[:20]
+
+    def pick(self, tracks: List[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+        """{"audio": id|None, "sub": id|"no"|None} for this track list; None leaves the choice to mpv."""
+        key = self.layout(tracks)
+        with self._lock:
+            hit = self._picks.get(key)
+            if hit is not None:
+                self._picks.move_to_end(key)
+                return dict(hit)
+        result = {kind: self._evaluate(kind, [t for t in tracks if t.get("type") == kind]) for kind in ("audio", "sub")}
+        with self._lock:
+            self._picks[key] = dict(result)
+            while len(self._picks) > self.MAX_PICKS:
+                self._picks.popitem(last=False)
+            self._dirty = True
+        return result
+
+
+# ============================================================================
+# Background media workers (headless mpv) and on-disk caches
+# ============================================================================
+
+def _player_cache_dir(name: str) -> Path:
+    """Per-user cache folder for player-side derived data (thumbnails, indexes, ...)."""
+    base = os.environ.get("TANKOBAN_PLAYER_CACHE_DIR", "").strip()
+    try:
+        root = Path(base) if base else Path.home() / ".tankoban" / "cache"
+    except Exception:
+        root = Path(".tankoban_cache")
+    return root / name
+
+
+_FINGERPRINT_BLOCK = 256 * 1024
+_FINGERPRINT_SAMPLES = 3
+
+
+def content_fingerprint(path: str, block: int = _FINGERPRINT_BLOCK, samples: int = _FINGERPRINT_SAMPLES) -> Optional[str]:
+    """Cheap content identity: file size plus hashes of the head, tail and a few middle blocks.
+
+    Reads at most (2 + samples) * block bytes regardless of file size, so a 10 GB
+    remux costs the same as a 200 MB episode, and the result survives renames/moves.
+    """
+    try:
+        size = os.path.getsize(path)
+        h = hashlib.blake2b(digest_size=16)
+        h.update(str(size).encode("ascii"))
+        with open(path, "rb") as f:
+            if size <= block * (2 + samples):
+                h.update(f.read())
+            else:
+                offsets = [0]
+                for i in range(1, samples + 1):
+                    offsets.append((size * i) // (samples + 1))
+                offsets.append(size - block)
+                for off in offsets:
+                    f.seek(off)
+                    h.update(f.read(block))
+        return f"v1-{size:x}-{h.hexdigest()}"
+    except Exception:
+        return None
+
+
+class FingerprintStore:
+    """Persistent memo of (path, size, mtime) -> content fingerprint.
+
+    Lookups only stat the file; hashing happens at most once per file version.
+    The map is bounded (least recently used entries drop out) and written back
+    in batches from a timer thread rather than on every insert.
+    """
+
+    MAX_ENTRIES = 50000
+    FLUSH_DELAY_S = 5.0
+
+    def __init__(self, path: Path):
+        self._path = Path(path)
+        self._lock = threading.Lock()
+        self._map: Optional["OrderedDict[str, str]"] = None
+        self._dirty = False
+        self._flush_timer: Optional[threading.Timer] = None
+
+    @staticmethod
+    def _stat_key(path: str) -> Optional[str]:
+        try:
+            st = os.stat(path)
+            return f"{os.path.normcase(os.path.abspath(path))}|{st.st_size}|{st.st_mtime_ns}"
+        except Exception:
+            return None
+
+    def _load_locked(self):
+        if self._map is None:
+            data = read_json(self._path, {})
+            entries = data.get("entries") if isinstance(data, dict) else None
+            self._map = OrderedDict((str(k), str(v)) for k, v in (entries or {}).items())
+
+    def cached(self, path: str) -> Optional[str]:
+        """Fingerprint if already known for this exact file version (no hashing)."""
+        key = self._stat_key(path)
+        if key is None:
+            return None
+        with self._lock:
+            self._load_locked()
+            return self._map.get(key)
+
+    def get(self, path: str) -> Optional[str]:
+        """Fingerprint for `path`, hashing it if needed. Call off the UI thread."""
+        key = self._stat_key(path)
+        if key is None:
+            return None
+        with self._lock:
+            self._load_locked()
+            fp = self._map.get(key)
+            if fp is not None:
+                self._map.move_to_end(key)
+                return fp
+        fp = content_fingerprint(path)
+        if fp is None:
+            return None
+        with self._lock:
+            self._map[key] = fp
+            while len(self._map) > self.MAX_ENTRIES:
+                self._map.popitem(last=False)
+            self._dirty = True
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.FLUSH_DELAY_S, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        return fp
+
+    def remember(self, path: str, fp: str):
+        """Record a fingerprint computed elsewhere (e.g. in a worker process)."""
+        key = self._stat_key(path)
+        if key is None or not fp:
+            return
+        with self._lock:
+            self._load_locked()
+            self._map[key] = fp
+            self._dirty = True
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.FLUSH_DELAY_S, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        with self._lock:
+            self._flush_timer = None
+            if not self._dirty or self._map is None:
+                return
+            snapshot = dict(self._map)
+            self._dirty = False
+        try:
+            atomic_write_json(self._path, {"version": 1, "entries": snapshot})
+        except Exception as e:
+            print(f"Fingerprint store write error: {e}")
+
+
+_fingerprint_store: Optional[FingerprintStore] = None
+_fingerprint_store_lock = threading.Lock()
+
+
+def _fingerprints() -> FingerprintStore:
+    global _fingerprint_store
+    with _fingerprint_store_lock:
+        if _fingerprint_store is None:
+            _fingerprint_store = FingerprintStore(_player_cache_dir("fingerprints.json"))
+        return _fingerprint_store
+
+
+def _file_cache_key(path: str, *salt: str) -> Optional[str]:
+    """Cache key for a media file: its content fingerprint plus a derivation salt.
+
+    Survives renames and moves. Hashes the file on first use, so call it from
+    worker threads only.
+    """
+    fp = _fingerprints().get(path)
+    if not fp:
+        return None
+    return hashlib.sha1(f"{fp}|{'|'.join(salt)}".encode("utf-8")).hexdigest()
+
+
+class DiskLRUCache:
+    """Size-bounded, content-keyed file cache with least-recently-used eviction.
+
+    Files live at ``root/<k[:2]>/<key><suffix>``. The LRU order is seeded from file
+    mtimes on first use and refreshed (throttled) on hits, so recency survives restarts.
+    Safe to share between threads.
+    """
+
+    _TOUCH_INTERVAL_S = 3600.0
+
+    def __init__(self, root: Path, max_bytes: int, suffix: str = ""):
+        self._root = Path(root)
+        self._max_bytes = max(1, int(max_bytes))
+        self._suffix = str(suffix or "")
+        self._lock = threading.Lock()
+        self._entries: Optional["OrderedDict[str, int]"] = None
+        self._total = 0
+
+    def path_for(self, key: str) -> Path:
+        return self._root / key[:2] / f"{key}{self._suffix}"
+
+    def tmp_path(self, key: str) -> Path:
+        """Scratch path for a writer; pass it to put_file() when complete."""
+        d = self._root / ".tmp"
+        d.mkdir(parents=True, exist_ok=True)
+        return d / f"{key}.{os.getpid()}.{threading.get_ident()}{self._suffix}"
+
+    def _load_locked(self) -> None:
+        if self._entries is not None:
+            return
+        found = []
+        try:
+            for sub in self._root.iterdir():
+                if not sub.is_dir() or sub.name.startswith("."):
+                    continue
+                for f in sub.iterdir():
+                    if self._suffix and not f.name.endswith(self._suffix):
+                        continue
+                    try:
+                        st = f.stat()
+                    except Exception:
+                        continue
+                    key = f.name[: len(f.name) - len(self._suffix)] if self._suffix else f.name
+                    found.append((st.st_mtime, key, int(st.st_size)))
+        except Exception:
+            pass
+        found.sort()
+        self._entries = OrderedDict((k, sz) for _mt, k, sz in found)
+        self._total = sum(sz for _mt, _k, sz in found)
+
+    def get(self, key: str) -> Optional[Path]:
+        if not key:
+            return None
+        with self._lock:
+            self._load_locked()
+            if key not in self._entries:
+                return None
+            p = self.path_for(key)
+            try:
+                st = p.stat()
+            except Exception:
+                self._total -= self._entries.pop(key, 0)
+                return None
+            self._entries.move_to_end(key)
+        try:
+            if (time.time() - st.st_mtime) > self._TOUCH_INTERVAL_S:
+                os.utime(p, None)
+        except Exception:
+            pass
+        return p
+
+    def put_file(self, key: str, src: Path) -> Optional[Path]:
+        """Move a finished file into the cache (atomic rename) and evict to the size cap."""
+        try:
+            src = Path(src)
+            if not src.exists() or src.stat().st_size <= 0:
+                return None
+            dst = self.path_for(key)
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(str(src), str(dst))
+            size = int(dst.stat().st_size)
+        except Exception:
+            try:
+                Path(src).unlink()
+            except Exception:
+                pass
+            return None
+        with self._lock:
+            self._load_locked()
+            self._total -= self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._total += size
+            self._evict_locked()
+        return dst
+
+    def put_bytes(self, key: str, data: bytes) -> Optional[Path]:
+        try:
+            tmp = self.tmp_path(key)
+            tmp.write_bytes(data)
+        except Exception:
+            return None
+        return self.put_file(key, tmp)
+
+    def reserve(self, key: str, size: int) -> Optional[Path]:
+        """Create (or reuse) a fixed-size file in place, e.g. for memory-mapped data filled later."""
+        dst = self.path_for(key)
+        try:
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            if not dst.exists() or dst.stat().st_size != int(size):
+                with open(dst, "wb") as f:
+                    f.truncate(int(size))
+        except Exception:
+            return None
+        with self._lock:
+            self._load_locked()
+            self._total -= self._entries.pop(key, 0)
+            self._entries[key] = int(size)
+            self._total += int(size)
+            self._evict_locked(keep=key)
+        return dst
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._load_locked()
+            return int(self._total)
+
+    def _evict_locked(self, keep: str = "") -> None:
+        while self._total > self._max_bytes and len(self._entries) > (1 if keep else 0):
+            key, size = self._entries.popitem(last=False)
+            if key == keep:
+                self._entries[key] = size
+                continue
+            self._total -= size
+            try:
+                self.path_for(key).unlink()
+            except Exception:
+                pass
+
+
+def _make_headless_mpv(**overrides):
+    """Create a windowless, silent mpv instance for background work.
+
+    Never used for playback: no video/audio output, no scripts/config, paused
+    with keep-open so a loaded file stays seekable for repeated grabs.
+    """
+    if mpv is None:
+        raise RuntimeError(f"python-mpv unavailable: {IMPORT_ERR}")
+    opts: Dict[str, Any] = dict(
+        vo='null',
+        ao='null',
+        aid='no',
+        sid='no',
+        pause=True,
+        idle='yes',
+        keep_open='yes',
+        hr_seek='yes',
+        hwdec='no',
+        osc=False,
+        ytdl=False,
+        config=False,
+        load_scripts=False,
+        input_default_bindings=False,
+        input_vo_keyboard=False,
+        vd_lavc_skiploopfilter='all',
+        vd_lavc_fast=True,
+    )
+    opts.update(overrides)
+    return mpv.MPV(log_handler=_safe_mpv_log, loglevel='error', **opts)
+
+
+def _headless_load(m, path: str, timeout: float = 10.0, wait_event: str = 'playback-restart', **file_options) -> bool:
+    """Load `path` into a headless instance and wait for `wait_event`.
+
+    The default waits until the first frame is ready; 'file-loaded' returns as
+    soon as the demuxer has opened the file (enough for metadata).
+    """
+    want = int(mpv.MpvEventID.from_str(wait_event))
+
+    def _done(evt):
+        eid = int(evt.event_id.value)
+        if eid == int(mpv.MpvEventID.END_FILE):
+            # Ignore the end-file of the previously loaded/stopped file.
+            try:
+                reason = int(evt.data.reason)
+            except Exception:
+                reason = -1
+            if reason not in (0, 4):
+                return None
+        return eid
+
+    try:
+        with m.prepare_and_wait_for_event(wait_event, 'end-file', cond=_done, timeout=timeout) as fut:
+            m.loadfile(str(path), **file_options)
+        return fut.result(0) == want
+    except Exception:
+        return False
+
+
+def _headless_seek(m, seconds: float, timeout: float = 5.0, exact: bool = False) -> bool:
+    """Seek a paused headless instance and wait until the new frame is ready."""
+    try:
+        with m.prepare_and_wait_for_event('playback-restart', timeout=timeout):
+            m.command('seek', f"{float(seconds):.3f}", 'absolute+exact' if exact else 'absolute+keyframes')
+        return True
+    except Exception:
+        return False
+
+
+def _frame_luma_stats(raw: Dict[str, Any], grid: Tuple[int, int] = (32, 18)) -> Tuple[float, float]:
+    """(mean, stddev) luma in 0..1 of a 'screenshot-raw' bgr0 frame, sampled on a coarse grid."""
+    try:
+        w, h, stride = int(raw["w"]), int(raw["h"]), int(raw["stride"])
+        data = raw["data"]
+        gx, gy = grid
+        vals = []
+        for j in range(gy):
+            row = ((2 * j + 1) * h // (2 * gy)) * stride
+            for i in range(gx):
+                k = row + ((2 * i + 1) * w // (2 * gx)) * 4
+                vals.append((19 * data[k] + 183 * data[k + 1] + 54 * data[k + 2]) >> 8)
+        n = float(len(vals))
+        mean = sum(vals) / n
+        var = sum((v - mean) ** 2 for v in vals) / n
+        return mean / 255.0, (var ** 0.5) / 255.0
+    except Exception:
+        return 0.0, 0.0
+
+
+class HeadlessMpvPool:
+    """Worker threads that each own one headless mpv instance.
+
+    `job_fn(mpv_instance, key, payload)` runs on a worker thread. Jobs are served
+    newest-first and de-duplicated by key; the backlog is capped so requests that
+    went stale (rows scrolled past, files switched away from) are dropped instead
+    of decoded. Batch callers pass ``lifo=False, max_pending=0`` for a plain
+    unbounded FIFO. A failing instance is discarded and rebuilt on the next job.
+    """
+
+    def __init__(self, job_fn, workers: int = 2, max_pending: int = 64, mpv_options: Optional[Dict[str, Any]] = None, name: str = "headless-mpv", lifo: bool = True):
+        self._job_fn = job_fn
+        self._max_pending = max(0, int(max_pending))
+        self._lifo = bool(lifo)
+        self._mpv_options = dict(mpv_options or {})
+        self._cv = threading.Condition()
+        self._pending: "OrderedDict[str, Any]" = OrderedDict()
+        self._active: set = set()
+        self._closed = False
+        self._instances: List[Any] = []
+        self._threads = []
+        for i in range(max(1, int(workers))):
+            t = threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    def submit(self, key: str, payload: Any = None) -> bool:
+        with self._cv:
+            if self._closed or key in self._active:
+                return False
+            self._pending.pop(key, None)
+            self._pending[key] = payload
+            while self._max_pending and len(self._pending) > self._max_pending:
+                self._pending.popitem(last=False)
+            self._cv.notify()
+        return True
+
+    def cancel_pending(self) -> None:
+        with self._cv:
+            self._pending.clear()
+
+    def pending_count(self) -> int:
+        with self._cv:
+            return len(self._pending) + len(self._active)
+
+    def shutdown(self) -> None:
+        with self._cv:
+            self._closed = True
+            self._pending.clear()
+            self._cv.notify_all()
+            instances = list(self._instances)
+            self._instances = []
+
+        def _terminate():
+            for m in instances:
+                try:
+                    m.terminate()
+                except Exception:
+                    pass
+
+        threading.Thread(target=_terminate, daemon=True).start()
+
+    def _run(self) -> None:
+        inst = None
+        while True:
+            with self._cv:
+                while not self._pending and not self._closed:
+                    self._cv.wait()
+                if self._closed:
+                    return
+                key, payload = self._pending.popitem(last=self._lifo)
+                self._active.add(key)
+            try:
+                if inst is None:
+                    inst = _make_headless_mpv(**self._mpv_options)
+                    with self._cv:
+                        if self._closed:
+                            self._instances.append(inst)
+                            return
+                        self._instances.append(inst)
+                self._job_fn(inst, key, payload)
+            except Exception as e:
+                print(f"Headless worker error ({key}): {e}")
+                with self._cv:
+                    if inst in self._instances:
+                        self._instances.remove(inst)
+                try:
+                    if inst is not None:
+                        inst.terminate()
+                except Exception:
+                    pass
+                inst = None
+            finally:
+                with self._cv:
+                    self._active.discard(key)
+
+
+# NumPy frame access. Analysis jobs (crop, scene cuts, ...) share one
+# headless instance via _analysis_pool(); all of it is a no-op without numpy.
+
+# BT.601 luma weights in mpv's bgr0 byte order.
+_LUMA_BGR = (0.114, 0.587, 0.299)
+
+
+def frame_array(raw: Any, channels: int = 3):
+    """(h, w, channels) uint8 view over a 'screenshot-raw' bgr0 result.
+
+    Works for any instance (playback or headless). Channel order is B, G, R(, X).
+    python-mpv has already copied the image out of mpv into the result's
+    `data` bytes; the view adds no second copy on top of that, is read-only,
+    and keeps those bytes alive while referenced.
+    """
+    if np is None or not isinstance(raw, dict):
+        return None
+    try:
+        w, h, stride = int(raw["w"]), int(raw["h"]), int(raw["stride"])
+        buf = np.frombuffer(raw["data"], dtype=np.uint8, count=stride * h)
+        return buf.reshape(h, stride)[:, : w * 4].reshape(h, w, 4)[:, :, : max(1, min(4, int(channels)))]
+    except Exception:
+        return None
+
+
+def frame_luma(frame, out=None):
+    """float32 luma (0..255) of a BGR(X) frame; pass `out` to reuse a buffer."""
+    if out is None:
+        out = np.empty(frame.shape[:2], dtype=np.float32)
+    np.multiply(frame[:, :, 0], _LUMA_BGR[0], out=out, casting="unsafe")
+    out += frame[:, :, 1] * np.float32(_LUMA_BGR[1])
+    out += frame[:, :, 2] * np.float32(_LUMA_BGR[2])
+    return out
+
+
+class FrameBufferPool:
+    """Reusable per-shape frame buffers so steady-state grabs allocate nothing."""
+
+    def __init__(self, per_shape: int = 4):
+        self._per_shape = max(1, int(per_shape))
+        self._lock = threading.Lock()
+        self._free: Dict[Tuple[Any, ...], List[Any]] = {}
+
+    def acquire(self, shape: Tuple[int, ...], dtype: Any = None):
+        dtype = np.dtype(dtype or np.uint8)
+        key = (tuple(shape), dtype.str)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                return free.pop()
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, arr) -> None:
+        if arr is None or not isinstance(arr, np.ndarray) or arr.base is not None:
+            return
+        key = (tuple(arr.shape), arr.dtype.str)
+        with self._lock:
+            free = self._free.setdefault(key, [])
+            if len(free) < self._per_shape:
+                free.append(arr)
+
+
+class FrameGrabber:
+    """Seek-and-grab frames from a headless mpv as NumPy arrays.
+
+    Downscaling happens in mpv's decoder chain (`width`/`height`, aspect kept
+    and padded), so frames arrive already small. `max_fps` rate-limits grabs to
+    keep background analysis from competing with playback. `grab()` returns a
+    read-only view over the bytes python-mpv already copied out of mpv (see
+    frame_array), adding no copy of its own; `pooled=True` copies once more
+    into a reusable buffer that the caller hands back with `release()`.
+    """
+
+    def __init__(self, width: Optional[int] = None, height: Optional[int] = None, max_fps: float = 0.0, pool_size: int = 4, mpv_instance: Any = None):
+        if np is None:
+            raise RuntimeError("numpy unavailable")
+        self._w = int(width) if width else None
+        self._h = int(height) if height else None
+        self._min_interval = (1.0 / float(max_fps)) if max_fps and max_fps > 0 else 0.0
+        self._last_grab = 0.0
+        self._pool = FrameBufferPool(pool_size)
+        self._own = mpv_instance is None
+        self._m = mpv_instance
+        self.path: Optional[str] = None
+        self.duration = 0.0
+        self._fps = 0.0
+        self._tile: Optional[Tuple[int, int]] = None
+        self._stepped = False
+        self._scan_done = False
+
+    def _filter_chain(self, fps: Optional[float] = None) -> Optional[str]:
+        chain = [f"fps=fps={float(fps):g}"] if fps else []
+        w, h = self._w or -2, self._h or -2
+        if self._w and self._h:
+            chain.append(f"scale=w={w}:h={h}:force_original_aspect_ratio=decrease,pad={w}:{h}:(ow-iw)/2:(oh-ih)/2")
+        elif self._w or self._h:
+            chain.append(f"scale=w={w}:h={h}")
+        if self._tile:
+            chain.append(f"tile={self._tile[0]}x{self._tile[1]}")
+        return ",".join(chain + ["format=bgr0"]) if chain else None
+
+    def set_max_fps(self, max_fps: float) -> None:
+        self._min_interval = (1.0 / float(max_fps)) if max_fps and max_fps > 0 else 0.0
+
+    def open(self, path: str, timeout: float = 15.0, width: Optional[int] = None, height: Optional[int] = None,
+             fps: Optional[float] = None, batch: int = 1, start: Optional[float] = None) -> bool:
+        """Load `path` (paused at the first frame). Returns False if it can't be decoded.
+
+        `fps` resamples the stream for sequential scans with `next_frame()`;
+        with `batch` > 1 that many resampled frames are tiled into each decoded
+        picture for `next_frames()`. `start` begins the scan part-way in.
+        """
+        if width or height:
+            self._w = int(width) if width else None
+            self._h = int(height) if height else None
+        if self._m is None:
+            self._m = _make_headless_mpv(vd_lavc_threads=2)
+        self._fps = float(fps) if fps else 0.0
+        self._tile = None
+        if self._fps and batch > 1:
+            cols = int(math.ceil(math.sqrt(batch)))
+            self._tile = (cols, int(math.ceil(batch / cols)))
+        self._stepped = False
+        self._scan_done = False
+        opts: Dict[str, Any] = {}
+        vf = self._filter_chain(fps)
+        if vf:
+            opts["vf"] = vf
+        if start:
+            opts["start"] = f"{max(0.0, float(start)):.3f}"
+        if not _headless_load(self._m, str(path), timeout=timeout, **opts):
+            self.path, self.duration = None, 0.0
+            return False
+        self.path = str(path)
+        try:
+            self.duration = float(self._m.duration or 0.0)
+        except Exception:
+            self.duration = 0.0
+        return True
+
+    def grab(self, t: Optional[float] = None, exact: bool = False, channels: int = 3, pooled: bool = False):
+        """Frame at `t` seconds (or the current one), or None if the seek/grab failed."""
+        if self._m is None or self.path is None:
+            return None
+        if self._min_interval:
+            wait = self._last_grab + self._min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+        self._last_grab = time.monotonic()
+        if t is not None:
+            t = max(0.0, min(float(t), self.duration - 0.25)) if self.duration > 0 else max(0.0, float(t))
+            if not _headless_seek(self._m, t, exact=exact):
+                return None
+        try:
+            view = frame_array(self._m.command('screenshot-raw', 'video'), channels)
+        except Exception:
+            return None
+        if view is None or not pooled:
+            return view
+        out = self._pool.acquire(view.shape)
+        np.copyto(out, view)
+        return out
+
+    def next_frame(self, channels: int = 3, timeout: float = 5.0):
+        """Step to the next decoded frame: (time, frame view), or (None, None) at the end."""
+        if self._m is None or self.path is None:
+            return None, None
+        try:
+            if self._m.eof_reached:
+                return None, None
+            prev = self._m.time_pos
+            with self._m.prepare_and_wait_for_property(
+                'time-pos', cond=lambda v: v is not None and (prev is None or v > prev), timeout=timeout
+            ):
+                self._m.command('frame-step')
+            t = float(self._m.time_pos)
+        except Exception:
+            return None, None
+        return t, self.grab(channels=channels)
+
+    def next_frames(self, channels: int = 3, timeout: float = 30.0) -> List[Tuple[float, Any]]:
+        """Next batch of an `open(..., batch=N)` scan: [(time, frame view), ...], or [] at the end.
+
+        The tile filter packs N resampled frames into one decoded picture, so a
+        batch costs a single frame-step round trip and screenshot. The views
+        slice that picture and are only valid until the next call.
+        """
+        if not self._tile:
+            t, frame = self.next_frame(channels, timeout=min(timeout, 5.0))
+            return [] if t is None else [(t, frame)]
+        if self._m is None or self.path is None or self._scan_done:
+            return []
+        try:
+            if self._stepped:
+                if self._m.eof_reached:
+                    return []
+                prev = self._m.time_pos
+                with self._m.prepare_and_wait_for_property(
+                    'time-pos', cond=lambda v: v is not None and (prev is None or v > prev), timeout=timeout
+                ):
+                    self._m.command('frame-step')
+            self._stepped = True
+            t0 = float(self._m.time_pos)
+        except Exception:
+            return []
+        mosaic = self.grab(channels=channels)
+        if mosaic is None:
+            return []
+        cols, rows = self._tile
+        ch, cw = mosaic.shape[0] // rows, mosaic.shape[1] // cols
+        out: List[Tuple[float, Any]] = []
+        for i in range(cols * rows):
+            t = t0 + i / self._fps
+            if self.duration > 0 and t >= self.duration:
+                # The tile filter pads the final picture with blank cells.
+                self._scan_done = True
+                break
+            r, c = divmod(i, cols)
+            out.append((t, mosaic[r * ch:(r + 1) * ch, c * cw:(c + 1) * cw]))
+        return out
+
+    def grab_luma(self, t: Optional[float] = None, exact: bool = False):
+        """float32 luma frame from the pool (call `release()` when done)."""
+        frame = self.grab(t, exact=exact)
+        if frame is None:
+            return None
+        return frame_luma(frame, self._pool.acquire(frame.shape[:2], np.float32))
+
+    def release(self, arr) -> None:
+        self._pool.release(arr)
+
+    def close(self) -> None:
+        m, self._m = self._m, None
+        self.path = None
+        try:
+            if m is not None:
+                if self._own:
+                    m.terminate()
+                else:
+                    m.command('stop')
+        except Exception:
+            pass
+
+
+def _run_analysis_job(m, key: str, fn) -> None:
+    grabber = FrameGrabber(mpv_instance=m)
+    try:
+        fn(grabber)
+    finally:
+        grabber.close()
+
+
+_ANALYSIS_POOL: Optional[HeadlessMpvPool] = None
+
+
+def _analysis_pool() -> HeadlessMpvPool:
+    """Shared low-priority analysis instance. Submit `(key, fn)`; `fn(grabber)` runs on its thread.
+
+    Jobs run one at a time, oldest first; the grabber wraps the shared instance,
+    so call `grabber.open(path, width=..., height=...)` first.
+    """
+    global _ANALYSIS_POOL
+    if _ANALYSIS_POOL is None:
+        _ANALYSIS_POOL = HeadlessMpvPool(_run_analysis_job, workers=1, max_pending=0, lifo=False,
+                                         mpv_options=dict(vd_lavc_threads=2), name="analysis-mpv")
+    return _ANALYSIS_POOL
+
+
+# Black-bar crop detection (offline, per content fingerprint).
+
+_CROP_VERSION = 1
+_CROP_SAMPLES = 24
+_CROP_ANALYSIS_WIDTH = 320
+
+
+def _crop_cache_path(fp: str) -> Path:
+    key = hashlib.sha1(f"{fp}|crop|v{_CROP_VERSION}".encode("utf-8")).hexdigest()
+    return _player_cache_dir("crop") / f"{key}.json"
+
+
+def detect_black_bars(lumas: List[Any], threshold: float = 24.0, min_frames: int = 6) -> Optional[Tuple[float, float, float, float]]:
+    """Stable content rectangle (x, y, w, h as fractions of the frame) from luma frames.
+
+    A row/column is bar when both its mean and its 98th percentile stay dark,
+    so dim scenes with a few bright pixels still count as picture. Frames with
+    no picture at all (fades) are ignored; each edge keeps the smallest bar seen
+    across the rest, so one dark shot can't over-crop. None if too few frames
+    were usable.
+    """
+    if np is None or not lumas:
+        return None
+    stack = np.stack(lumas).astype(np.float32, copy=False)
+    n, h, w = stack.shape
+
+    def _bars(axis: int):
+        means = stack.mean(axis=axis)
+        highs = np.quantile(stack, 0.98, axis=axis)
+        content = (means >= threshold) | (highs >= threshold * 2.0)
+        has = content.any(axis=1)
+        lead = np.argmax(content, axis=1)
+        trail = np.argmax(content[:, ::-1], axis=1)
+        return has, lead, trail
+
+    row_has, top, bottom = _bars(2)
+    col_has, left, right = _bars(1)
+    valid = row_has & col_has
+    if int(valid.sum()) < min(min_frames, n):
+        return None
+    t, b = int(top[valid].min()), int(bottom[valid].min())
+    l, r = int(left[valid].min()), int(right[valid].min())
+    # Ignore slivers (encoder edge noise) below 1% of the dimension.
+    t, b = (t if t >= h * 0.01 else 0), (b if b >= h * 0.01 else 0)
+    l, r = (l if l >= w * 0.01 else 0), (r if r >= w * 0.01 else 0)
+    if t + b >= h * 0.8 or l + r >= w * 0.8:
+        return None
+    return (l / w, t / h, (w - l - r) / w, (h - t - b) / h)
+
+
+def _crop_detect_job(path: str, fp: str, on_done):
+    """Analysis-pool job: sample frames across `path`, detect bars, cache and report the result."""
+
+    def _job(grabber: FrameGrabber):
+        rect = None
+        frames = []
+        try:
+            if grabber.open(path, width=_CROP_ANALYSIS_WIDTH) and grabber.duration > 0:
+                for i in range(_CROP_SAMPLES):
+                    frac = 0.06 + 0.88 * i / max(1, _CROP_SAMPLES - 1)
+                    luma = grabber.grab_luma(frac * grabber.duration)
+                    if luma is not None:
+                        frames.append(luma)
+                rect = detect_black_bars(frames)
+                atomic_write_json(_crop_cache_path(fp), {"v": _CROP_VERSION, "rect": list(rect) if rect else None, "frames": len(frames)})
+        except Exception as e:
+            print(f"Crop detection error: {e}")
+        finally:
+            for f in frames:
+                grabber.release(f)
+        on_done(rect)
+
+    return _job
+
+
+# Scene-cut index (offline, per content fingerprint).
+
+_SCENE_VERSION = 1
+_SCENE_SAMPLE_FPS = 4.0
+_SCENE_ANALYSIS_WIDTH = 96
+_SCENE_MAX_FPS = 60.0
+_SCENE_MIN_GAP = 1.0
+_SCENE_BATCH = 64
+
+
+def _scene_cache_path(fp: str) -> Path:
+    key = hashlib.sha1(f"{fp}|scenes|v{_SCENE_VERSION}".encode("utf-8")).hexdigest()
+    return _player_cache_dir("scenes") / f"{key}.f32"
+
+
+def frame_histogram(frame, bits: int = 3):
+    """Normalized joint BGR histogram with 2**bits levels per channel."""
+    q = (frame[:, :, :3] >> (8 - bits)).astype(np.int32)
+    idx = (q[:, :, 0] << (2 * bits)) | (q[:, :, 1] << bits) | q[:, :, 2]
+    hist = np.bincount(idx.ravel(), minlength=1 << (3 * bits)).astype(np.float32)
+    return hist / max(1.0, float(idx.size))
+
+
+def detect_scene_cuts(times, hists, base: float = 0.35, k: float = 4.0, window: int = 31):
+    """Cut times and scores from per-frame histograms.
+
+    The score is the total-variation distance between consecutive histograms.
+    A cut is a local peak above both `base` and an adaptive level (rolling
+    median + k * MAD), so flashes in busy scenes don't flood the index.
+    """
+    t = np.asarray(times, dtype=np.float64)
+    h = np.asarray(hists, dtype=np.float32)
+    if len(t) < 3:
+        return np.zeros(0, np.float32), np.zeros(0, np.float32)
+    d = 0.5 * np.abs(np.diff(h, axis=0)).sum(axis=1)
+    pad = window // 2
+    padded = np.pad(d, pad, mode="edge")
+    win = np.lib.stride_tricks.sliding_window_view(padded, window)
+    med = np.median(win, axis=1)
+    mad = np.median(np.abs(win - med[:, None]), axis=1)
+    level = np.maximum(base, med + k * mad)
+    prev = np.concatenate(([0.0], d[:-1]))
+    nxt = np.concatenate((d[1:], [0.0]))
+    cand = np.nonzero((d > level) & (d >= prev) & (d >= nxt))[0]
+    cuts: List[float] = []
+    scores: List[float] = []
+    for i in cand:
+        ct = float(t[i + 1])
+        if cuts and ct - cuts[-1] < _SCENE_MIN_GAP:
+            if d[i] > scores[-1]:
+                cuts[-1], scores[-1] = ct, float(d[i])
+            continue
+        cuts.append(ct)
+        scores.append(float(d[i]))
+    return np.asarray(cuts, np.float32), np.asarray(scores, np.float32)
+
+
+def load_scene_index(fp: str):
+    """(cut_times, scores) float32 arrays from the cache, or None."""
+    if np is None:
+        return None
+    try:
+        path = _scene_cache_path(fp)
+        if not path.exists():
+            return None
+        data = np.fromfile(str(path), dtype="<f4")
+        if data.size % 2:
+            return None
+        pairs = data.reshape(-1, 2)
+        return pairs[:, 0].copy(), pairs[:, 1].copy()
+    except Exception:
+        return None
+
+
+def _save_scene_index(fp: str, cuts, scores) -> None:
+    path = _scene_cache_path(fp)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+    np.stack([cuts, scores], axis=1).astype("<f4").tofile(str(tmp))
+    tmp.replace(path)
+
+
+def synthesize_chapters(cuts, scores, duration: float, target: int = 12) -> List[float]:
+    """Pick the strongest cuts, evenly spaced, as stand-in chapter markers."""
+    if cuts is None or len(cuts) == 0 or not duration or duration <= 0:
+        return []
+    gap = max(60.0, float(duration) / (target + 1))
+    picked: List[float] = []
+    for i in np.argsort(-np.asarray(scores)):
+        ct = float(cuts[i])
+        if ct < gap * 0.5 or ct > duration - gap * 0.5:
+            continue
+        if all(abs(ct - p) >= gap for p in picked):
+            picked.append(ct)
+            if len(picked) >= target:
+                break
+    return sorted(picked)
+
+
+def _scene_index_job(path: str, fp: str, is_current, on_done, _state: Optional[Dict[str, Any]] = None):
+    """Analysis-pool job: scan `path` sequentially at a low rate and cache its scene cuts.
+
+    Frames are read in tiled batches. When other analysis work is queued the
+    job yields between batches: it resubmits itself to resume after the last
+    sampled time, so a long scan doesn't hold up crop detection.
+    """
+    state = _state if _state is not None else {"times": [], "hists": []}
+
+    def _job(grabber: FrameGrabber):
+        result = None
+        finished = True
+        try:
+            if not is_current():
+                return
+            times: List[float] = state["times"]
+            hists: List[Any] = state["hists"]
+            grabber.set_max_fps(_SCENE_MAX_FPS)
+            if not grabber.open(path, width=_SCENE_ANALYSIS_WIDTH, fps=_SCENE_SAMPLE_FPS,
+                                batch=_SCENE_BATCH, start=times[-1] if times else None):
+                return
+            pool = _analysis_pool()
+            while True:
+                batch = grabber.next_frames()
+                if not batch:
+                    break
+                for t, frame in batch:
+                    if times and t <= times[-1] + 1e-3:
+                        continue
+                    times.append(t)
+                    hists.append(frame_histogram(frame))
+                if not is_current():
+                    return
+                if times and pool.pending_count() > 1:
+                    nxt = _scene_index_job(path, fp, is_current, on_done, state)
+                    if pool.submit(f"scenes:{fp}@{times[-1]:.3f}", nxt):
+                        finished = False
+                        return
+            if grabber.duration > 0 and (not times or times[-1] < grabber.duration * 0.9):
+                return  # scan cut short; don't cache a partial index
+            cuts, scores = detect_scene_cuts(times, hists)
+            _save_scene_index(fp, cuts, scores)
+            result = (cuts, scores)
+        except Exception as e:
+            print(f"Scene index error: {e}")
+        finally:
+            if finished:
+                on_done(result)
+
+    return _job
+
+
+# Streaming PCM pipeline. Audio analyses (intro matching, loudness, silence,
+# subtitle sync, ...) share one decode path: mpv renders a file's audio as
+# low-rate mono s16le, which is read in fixed-size chunks and fed to
+# generator analyzers, so memory stays flat however long the file is.
+
+_PCM_RATE = 8000
+_PCM_CHUNK = 4096  # samples per chunk (0.5 s at 8 kHz)
+_MPV_CLI: Optional[str] = None
+
+
+def _mpv_cli_path() -> Optional[str]:
+    """The mpv executable for encode-mode decoding (TANKOBAN_MPV_CLI, next to libmpv, or PATH)."""
+    global _MPV_CLI
+    if _MPV_CLI is None:
+        found = os.environ.get("TANKOBAN_MPV_CLI", "") or shutil.which("mpv") or ""
+        _MPV_CLI = found if found and os.path.isfile(found) else ""
+    return _MPV_CLI or None
+
+
+def _pcm_filter(rate: int) -> str:
+    return f"lavfi=[aresample={int(rate)},aformat=sample_fmts=s16:channel_layouts=mono]"
+
+
+def _pcm_chunks_cli(path: str, start: Optional[float], length: Optional[float], rate: int, chunk: int):
+    """mpv encode mode writing raw PCM to a pipe; yields float32 chunks of exactly `chunk` samples (last may be short)."""
+    cmd = [_mpv_cli_path(), "--config=no", "--really-quiet", "--vid=no", "--sid=no", "--load-scripts=no",
+           f"--af={_pcm_filter(rate)}", "--of=s16le", "--oac=pcm_s16le", "--o=-"]
+    if start is not None:
+        cmd.append(f"--start={float(start):.3f}")
+    if length:
+        cmd.append(f"--length={float(length):.3f}")
+    cmd += ["--", str(path)]
+    flags = subprocess.CREATE_NO_WINDOW if sys.platform.startswith("win") else 0
+    proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            bufsize=0, creationflags=flags)
+    buf = bytearray(chunk * 2)
+    view = memoryview(buf)
+    try:
+        while True:
+            got = 0
+            while got < len(buf):
+                n = proc.stdout.readinto(view[got:])
+                if not n:
+                    break
+                got += n
+            if got >= 2:
+                # astype copies, so the read buffer is reused for the next chunk.
+                yield np.frombuffer(buf, dtype="<i2", count=got // 2).astype(np.float32) / 32768.0
+            if got < len(buf):
+                return
+    finally:
+        try:
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            proc.wait(5)
+        except Exception:
+            pass
+
+
+def _libmpv_pcm_to_file(path: str, out_path: Path, start: Optional[float], length: Optional[float], rate: int, timeout: float = 600.0) -> bool:
+    """Decode audio as fast as possible through a throwaway headless instance with the pcm audio output."""
+    m = None
+    try:
+        m = _make_headless_mpv(vid='no', aid='auto', ao='pcm', ao_pcm_file=str(out_path), ao_pcm_waveheader=False,
+                               untimed=True, pause=False, keep_open='no', audio_display='no', af=_pcm_filter(rate))
+        opts: Dict[str, Any] = {}
+        if start is not None:
+            opts["start"] = f"{float(start):.3f}"
+        if length:
+            opts["length"] = f"{float(length):.3f}"
+        with m.prepare_and_wait_for_event('end-file', timeout=timeout):
+            m.loadfile(str(path), **opts)
+        return True
+    except Exception as e:
+        print(f"PCM decode error: {e}")
+        return False
+    finally:
+        try:
+            if m is not None:
+                m.terminate()
+        except Exception:
+            pass
+
+
+def _pcm_chunks_libmpv(path: str, start: Optional[float], length: Optional[float], rate: int, chunk: int):
+    """Fallback without the mpv executable: libmpv writes a scratch file that is read while it grows."""
+    tmp = _player_cache_dir("pcm") / f"{os.getpid()}-{threading.get_ident()}-{int(time.time() * 1000)}.raw"
+    tmp.parent.mkdir(parents=True, exist_ok=True)
+    tmp.write_bytes(b"")
+    worker = threading.Thread(target=_libmpv_pcm_to_file, args=(path, tmp, start, length, rate), daemon=True)
+    worker.start()
+    need = chunk * 2
+    try:
+        with open(tmp, "rb") as f:
+            pending = b""
+            while True:
+                data = f.read(need - len(pending))
+                pending += data
+                if len(pending) >= need:
+                    yield np.frombuffer(pending, dtype="<i2").astype(np.float32) / 32768.0
+                    pending = b""
+                elif not data:
+                    if not worker.is_alive():
+                        tail = f.read()
+                        pending += tail
+                        if not tail:
+                            break
+                    else:
+                        time.sleep(0.02)
+            if len(pending) >= 2:
+                yield np.frombuffer(pending[: len(pending) // 2 * 2], dtype="<i2").astype(np.float32) / 32768.0
+    finally:
+        worker.join(1.0)
+        try:
+            tmp.unlink()
+        except Exception:
+            pass
+
+
+def pcm_chunks(path: str, start: Optional[float] = None, length: Optional[float] = None, rate: int = _PCM_RATE, chunk: int = _PCM_CHUNK):
+    """Generator of float32 mono PCM chunks for part of a file (negative `start` counts from the end)."""
+    if _mpv_cli_path():
+        return _pcm_chunks_cli(path, start, length, rate, chunk)
+    if mpv is None:
+        raise RuntimeError("no mpv executable or libmpv available for audio decoding")
+    return _pcm_chunks_libmpv(path, start, length, rate, chunk)
+
+
+class PcmRingBuffer:
+    """Fixed-capacity sample buffer that hands out overlapping analysis frames across chunk boundaries."""
+
+    def __init__(self, capacity: int):
+        self._buf = np.zeros(int(capacity), dtype=np.float32)
+        self._start = 0
+        self._end = 0
+        self.consumed = 0  # samples dropped from the front so far (for timestamps)
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def push(self, samples) -> None:
+        n = len(samples)
+        if self._end + n > len(self._buf):
+            live = self._end - self._start
+            if live + n > len(self._buf):
+                raise ValueError("ring buffer overflow: consume frames before pushing more")
+            self._buf[:live] = self._buf[self._start:self._end]
+            self._start, self._end = 0, live
+        self._buf[self._end:self._end + n] = samples
+        self._end += n
+
+    def frames(self, size: int, hop: int):
+        """All complete `size`-sample frames `hop` apart, as a (k, size) view; consumes k * hop samples.
+
+        The view is only valid until the next push().
+        """
+        live = self._end - self._start
+        if live < size:
+            return self._buf[:0].reshape(0, size)
+        k = (live - size) // hop + 1
+        view = np.lib.stride_tricks.sliding_window_view(self._buf[self._start:self._start + (k - 1) * hop + size], size)[::hop]
+        self._start += k * hop
+        self.consumed += k * hop
+        return view
+
+
+def band_energy_analyzer(rate: int, hop: float = 0.1, bands: int = 16, frame: int = 1024):
+    """Analyzer: (frames, bands) float32 log band energies every `hop` seconds, normalized per clip.
+
+    Per-frame mean removal makes the features level-invariant, so the same OP
+    mixed a little louder or quieter in another episode still matches.
+    """
+    step = max(1, int(rate * hop))
+    ring = PcmRingBuffer(frame + 4 * _PCM_CHUNK)
+    window = np.hanning(frame).astype(np.float32)
+    band = np.searchsorted(np.geomspace(250.0, 3500.0, bands + 1), np.fft.rfftfreq(frame, 1.0 / rate)) - 1
+    onehot = np.zeros((len(band), bands), np.float32)
+    ok = (band >= 0) & (band < bands)
+    onehot[np.nonzero(ok)[0], band[ok]] = 1.0
+    rows = []
+    while True:
+        chunk = yield
+        if chunk is None:
+            break
+        ring.push(chunk)
+        block = ring.frames(frame, step)
+        if len(block):
+            power = np.abs(np.fft.rfft(block * window, axis=1)) ** 2
+            rows.append(np.log1p((power @ onehot) * 1e4).astype(np.float32))
+    if not rows:
+        return np.zeros((0, bands), np.float32)
+    feat = np.concatenate(rows)
+    feat -= feat.mean(axis=1, keepdims=True)
+    return ((feat - feat.mean(axis=0)) / (feat.std(axis=0) + 1e-6)).astype(np.float32)
+
+
+def vad_analyzer(rate: int, hop: float = 0.05, margin_db: float = 9.0):
+    """Analyzer: uint8 voice activity (0/1) every `hop` seconds.
+
+    A frame is speech when its 300-3400 Hz energy clears the file's noise floor
+    (10th percentile) by `margin_db` and dominates the frame's spectrum. The
+    floor is only known at the end, so per-frame levels (a few KB per hour)
+    are kept and thresholded once.
+    """
+    frame = max(64, int(rate * hop))
+    ring = PcmRingBuffer(frame + 4 * _PCM_CHUNK)
+    freqs = np.fft.rfftfreq(frame, 1.0 / rate)
+    voice = (freqs >= 300.0) & (freqs <= 3400.0)
+    levels, ratios = [], []
+    while True:
+        chunk = yield
+        if chunk is None:
+            break
+        ring.push(chunk)
+        block = ring.frames(frame, frame)
+        if len(block):
+            power = np.abs(np.fft.rfft(block, axis=1)) ** 2
+            band = power[:, voice].sum(axis=1)
+            levels.append(10.0 * np.log10(band + 1e-10))
+            ratios.append(band / (power.sum(axis=1) + 1e-10))
+    if not levels:
+        return np.zeros(0, np.uint8)
+    level, ratio = np.concatenate(levels), np.concatenate(ratios)
+    floor = float(np.percentile(level, 10))
+    return ((level > floor + margin_db) & (ratio > 0.5)).astype(np.uint8)
+
+
+def _k_weighting_power(freqs, rate: int):
+    """|H(f)|^2 of the BS.1770 K-weighting (high shelf + high pass) designed for `rate`."""
+
+    def _resp(b, a):
+        z = np.exp(-1j * 2.0 * np.pi * freqs / rate)
+        return np.abs((b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)) ** 2
+
+    gain_db, q, fc = 3.99984385397, 0.7071752369554193, 1681.9744509555319
+    amp = 10.0 ** (gain_db / 40.0)
+    w0 = 2.0 * math.pi * fc / rate
+    alpha, cw, sa = math.sin(w0) / (2.0 * q), math.cos(w0), math.sqrt(amp)
+    shelf = _resp(
+        (amp * ((amp + 1) + (amp - 1) * cw + 2 * sa * alpha), -2 * amp * ((amp - 1) + (amp + 1) * cw), amp * ((amp + 1) + (amp - 1) * cw - 2 * sa * alpha)),
+        ((amp + 1) - (amp - 1) * cw + 2 * sa * alpha, 2 * ((amp - 1) - (amp + 1) * cw), (amp + 1) - (amp - 1) * cw - 2 * sa * alpha),
+    )
+    q, fc = 0.5003270373253953, 38.13547087613982
+    w0 = 2.0 * math.pi * fc / rate
+    alpha, cw = math.sin(w0) / (2.0 * q), math.cos(w0)
+    highpass = _resp((1.0, -2.0, 1.0), (1.0 + alpha, -2.0 * cw, 1.0 - alpha))
+    return (shelf * highpass).astype(np.float64)
+
+
+def gated_loudness(z) -> float:
+    """Integrated loudness (LUFS) from per-block mean squares, with the R128 absolute and relative gates."""
+    z = np.asarray(z, dtype=np.float64)
+    lk = -0.691 + 10.0 * np.log10(z + 1e-12)
+    z = z[lk > -70.0]
+    if not len(z):
+        return -70.0
+    rel = -0.691 + 10.0 * np.log10(z.mean()) - 10.0
+    z = z[-0.691 + 10.0 * np.log10(z) > rel]
+    return float(-0.691 + 10.0 * np.log10(z.mean())) if len(z) else -70.0
+
+
+def loudness_analyzer(rate: int, block: float = 0.4, hop: float = 0.1):
+    """Analyzer: {"integrated": LUFS, "peak": dBFS} in the EBU R128 style.
+
+    K-weighting is applied in the frequency domain per 400 ms block (75%
+    overlap), so the mean square of each weighted block comes straight from
+    its spectrum without running an IIR filter over the samples.
+    """
+    frame, step = int(rate * block), max(1, int(rate * hop))
+    ring = PcmRingBuffer(frame + 4 * _PCM_CHUNK)
+    freqs = np.fft.rfftfreq(frame, 1.0 / rate)
+    # Parseval for a real FFT: interior bins count twice; normalize to a mean square.
+    scale = np.full(len(freqs), 2.0)
+    scale[0] = 1.0
+    if frame % 2 == 0:
+        scale[-1] = 1.0
+    weight = _k_weighting_power(freqs, rate) * scale / float(frame * frame)
+    zs, peak = [], 0.0
+    while True:
+        chunk = yield
+        if chunk is None:
+            break
+        if len(chunk):
+            peak = max(peak, float(np.abs(chunk).max()))
+        ring.push(chunk)
+        frames = ring.frames(frame, step)
+        if len(frames):
+            zs.append((np.abs(np.fft.rfft(frames, axis=1)) ** 2) @ weight)
+    z = np.concatenate(zs) if zs else np.zeros(0)
+    return {"integrated": gated_loudness(z), "peak": 20.0 * math.log10(peak) if peak > 0 else -96.0, "blocks": int(len(z))}
+
+
+def envelope_analyzer(rate: int, hop: float = 0.25):
+    """Analyzer: float32 RMS level (dBFS) every `hop` seconds (about 14k values for a 1-hour file)."""
+    step = max(1, int(rate * hop))
+    ring = PcmRingBuffer(step + 4 * _PCM_CHUNK)
+    levels = []
+    while True:
+        chunk = yield
+        if chunk is None:
+            break
+        ring.push(chunk)
+        frames = ring.frames(step, step)
+        if len(frames):
+            levels.append((10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)).astype(np.float32))
+    return np.concatenate(levels) if levels else np.zeros(0, np.float32)
+
+
+def waveform_bins(levels_db, bins: int = 2048):
+    """float16 0..1 envelope of at most `bins` peak-pooled bins, scaled to the file's own dynamic range."""
+    lv = np.asarray(levels_db, dtype=np.float32)
+    if not len(lv):
+        return np.zeros(0, np.float16)
+    if len(lv) > bins:
+        edges = np.linspace(0, len(lv), bins + 1).astype(np.int64)[:-1]
+        lv = np.maximum.reduceat(lv, edges)
+    top = float(np.percentile(lv, 99.5))
+    return np.clip((lv - (top - 45.0)) / 45.0, 0.0, 1.0).astype(np.float16)
+
+
+# Analyzer registry: name -> generator function(rate, **params). Jobs refer to
+# analyzers by name so they can be shipped to pool processes.
+PCM_ANALYZERS: Dict[str, Any] = {
+    "bands": band_energy_analyzer,
+    "vad": vad_analyzer,
+    "loudness": loudness_analyzer,
+    "envelope": envelope_analyzer,
+}
+
+
+def feed_pcm_analyzers(chunks, analyzers: Dict[str, Tuple[str, Dict[str, Any]]], rate: int = _PCM_RATE) -> Tuple[Dict[str, Any], int]:
+    """Drive analyzers over an iterable of chunks: ({label: result}, total_samples)."""
+    gens = {}
+    for label, (name, params) in analyzers.items():
+        g = PCM_ANALYZERS[name](rate, **(params or {}))
+        next(g)
+        gens[label] = g
+    total = 0
+    for chunk in chunks:
+        total += len(chunk)
+        for g in gens.values():
+            g.send(chunk)
+    results: Dict[str, Any] = {}
+    for label, g in gens.items():
+        try:
+            g.send(None)
+        except StopIteration as stop:
+            results[label] = stop.value
+    return results, total
+
+
+def _media_duration(path: str) -> float:
+    try:
+        meta = _probe_cache_store().get(str(path))
+        if meta and float(meta.get("duration") or 0) > 0:
+            return float(meta["duration"])
+    except Exception:
+        pass
+    m = None
+    try:
+        m = _make_headless_mpv(vid='no')
+        if _headless_load(m, str(path), wait_event='file-loaded'):
+            return float(m.duration or 0.0)
+    except Exception:
+        pass
+    finally:
+        try:
+            if m is not None:
+                m.terminate()
+        except Exception:
+            pass
+    return 0.0
+
+
+def run_pcm_analysis(path: str, analyzers: Dict[str, Tuple[str, Dict[str, Any]]], start: Optional[float] = None, length: Optional[float] = None, rate: int = _PCM_RATE) -> Dict[str, Any]:
+    """Decode part of `path` once and run several analyzers over the stream.
+
+    Returns {"results": {...}, "start": clip start in file seconds (None if
+    unknown), "samples": n, "rate": rate}. Top-level and picklable, so it can
+    be submitted to `pcm_analysis_pool()` as is.
+    """
+    results, total = feed_pcm_analyzers(pcm_chunks(path, start, length, rate), analyzers, rate)
+    clip_start: Optional[float] = float(start or 0.0)
+    if clip_start < 0:
+        dur = _media_duration(path)
+        clip_start = max(0.0, dur - total / float(rate)) if dur > 0 else None
+    return {"results": results, "start": clip_start, "samples": total, "rate": rate}
+
+
+_PCM_POOL = None
+
+
+def pcm_analysis_pool():
+    """Shared process pool for audio analyses (spawned workers, so it's safe from the GUI process)."""
+    global _PCM_POOL
+    if _PCM_POOL is None:
+        from concurrent.futures import ProcessPoolExecutor
+        _PCM_POOL = ProcessPoolExecutor(max_workers=_default_worker_count(), mp_context=multiprocessing.get_context("spawn"))
+    return _PCM_POOL
+
+
+# Season intro/outro detection (audio fingerprints cross-correlated between episodes).
+
+_SEGMENTS_VERSION = 1
+_SEG_HOP = 0.1
+_SEG_HEAD_S = 360.0
+_SEG_TAIL_S = 300.0
+_SEG_MIN_LEN = 15.0
+_SEG_MAX_LEN = 150.0
+_SEG_MATCH = 0.5
+
+
+def audio_features(pcm, rate: int = _PCM_RATE, hop: float = _SEG_HOP, bands: int = 16):
+    """`band_energy_analyzer` over an in-memory int16 clip."""
+    x = np.asarray(pcm, dtype=np.float32) / 32768.0
+    chunks = (x[i:i + _PCM_CHUNK] for i in range(0, len(x), _PCM_CHUNK))
+    results, _ = feed_pcm_analyzers(chunks, {"f": ("bands", {"hop": hop, "bands": bands})}, rate)
+    return results["f"]
+
+
+def align_features(fa, fb) -> int:
+    """Lag k maximizing the FFT cross-correlation, i.e. fa[i + k] best matches fb[i]."""
+    na, nb = len(fa), len(fb)
+    nfft = 1 << max(1, (na + nb - 1 - 1).bit_length())
+    spec = np.fft.rfft(fa, nfft, axis=0) * np.conj(np.fft.rfft(fb, nfft, axis=0))
+    corr = np.fft.irfft(spec.sum(axis=1), nfft)
+    lags = np.concatenate((np.arange(0, na), np.arange(-(nb - 1), 0)))
+    vals = np.concatenate((corr[:na], corr[nfft - (nb - 1):] if nb > 1 else corr[:0]))
+    return int(lags[int(np.argmax(vals))])
+
+
+def shared_segment(fa, fb, hop: float = _SEG_HOP):
+    """Longest stretch where two clips carry the same audio: ((a_start, a_end), (b_start, b_end)) in clip seconds, or None."""
+    if len(fa) < 10 or len(fb) < 10:
+        return None
+    k = align_features(fa, fb)
+    i0, i1 = max(0, -k), min(len(fb), len(fa) - k)
+    if i1 - i0 < int(_SEG_MIN_LEN / hop):
+        return None
+    a, b = fa[i0 + k:i1 + k], fb[i0:i1]
+    sim = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1) + 1e-6)
+    win = max(1, int(2.0 / hop))
+    sim = np.convolve(sim, np.ones(win, np.float32) / win, mode="same")
+    hit = np.concatenate(([False], sim > _SEG_MATCH, [False]))
+    edges = np.flatnonzero(hit[1:] != hit[:-1])
+    if len(edges) < 2:
+        return None
+    starts, ends = edges[0::2], edges[1::2]
+    j = int(np.argmax(ends - starts))
+    length = (ends[j] - starts[j]) * hop
+    if length < _SEG_MIN_LEN or length > _SEG_MAX_LEN:
+        return None
+    bs, be = float((i0 + starts[j]) * hop), float((i0 + ends[j]) * hop)
+    return (bs + k * hop, be + k * hop), (bs, be)
+
+
+def _file_sig(path: str) -> List[int]:
+    st = os.stat(path)
+    return [int(st.st_size), int(st.st_mtime_ns)]
+
+
+class SeasonSegmentDetector:
+    """Finds each episode's intro (OP) and outro (ED) by matching audio against neighbours.
+
+    Runs on one background thread over a playlist folder: the head and tail of
+    every episode are streamed through the PCM pipeline on the audio process
+    pool (current episode first, the rest in parallel), reduced to band-energy
+    features (cached per file version), and cross-correlated with the adjacent
+    episode.
+    Results are cached per show root and reported as they arrive through
+    `on_result(path, {"intro": (s, e) | None, "outro": (s, e) | None})`.
+    """
+
+    def __init__(self, show_root: str, episodes: List[str], on_result):
+        self.show_root = str(show_root)
+        self._episodes = list(episodes)
+        self._on_result = on_result
+        self._priority: Optional[str] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        key = hashlib.sha1(f"{self.show_root}|segments".encode("utf-8")).hexdigest()
+        self._cache_path = _player_cache_dir("segments") / f"{key}.json"
+        data = read_json(self._cache_path, None)
+        if not isinstance(data, dict) or data.get("v") != _SEGMENTS_VERSION:
+            data = {"v": _SEGMENTS_VERSION, "episodes": {}}
+        self._data = data
+        self._feats: Dict[Tuple[str, str], Any] = {}
+        self._futures: Dict[Tuple[str, str], Any] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def covers(self, episodes: List[str]) -> bool:
+        return list(episodes) == self._episodes
+
+    def cached(self, path: str) -> Optional[Dict[str, Any]]:
+        """Segments for `path` if known and the file is unchanged."""
+        try:
+            with self._lock:
+                entry = self._data["episodes"].get(str(path))
+            if entry and entry.get("sig") == _file_sig(str(path)):
+                return {k: (tuple(entry[k]) if entry.get(k) else None) for k in ("intro", "outro")}
+        except Exception:
+            pass
+        return None
+
+    def prioritize(self, path: str) -> None:
+        self._priority = str(path)
+
+    def start(self) -> None:
+        if self._thread is None and mpv is not None and np is not None:
+            self._thread = threading.Thread(target=self._run, name="season-segments", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        for fut in list(self._futures.values()):
+            try:
+                fut.cancel()
+            except Exception:
+                pass
+
+    def _feature_file(self, path: str, part: str) -> Path:
+        key = hashlib.sha1(f"{path}|{_file_sig(path)}|{part}|v{_SEGMENTS_VERSION}".encode("utf-8")).hexdigest()
+        return _player_cache_dir("audiofp") / f"{key}.npz"
+
+    def _submit(self, path: str, part: str):
+        start, length = (0.0, _SEG_HEAD_S) if part == "head" else (-_SEG_TAIL_S, None)
+        fut = pcm_analysis_pool().submit(run_pcm_analysis, path, {"f": ("bands", {"hop": _SEG_HOP})}, start, length)
+        self._futures[(path, part)] = fut
+        return fut
+
+    def _prefetch(self, paths: List[str]) -> None:
+        """Queue decoding for every clip not cached yet, so the pool works through the season in parallel."""
+        for path in paths:
+            for part in ("head", "tail"):
+                if (path, part) not in self._futures and (path, part) not in self._feats and not self._feature_file(path, part).exists():
+                    self._submit(path, part)
+
+    def _features(self, path: str, part: str):
+        memo = self._feats.get((path, part))
+        if memo is not None:
+            return memo
+        fpath = self._feature_file(path, part)
+        try:
+            with np.load(str(fpath)) as z:
+                memo = (z["feat"].astype(np.float32), float(z["start"]))
+        except Exception:
+            fut = self._futures.get((path, part)) or self._submit(path, part)
+            try:
+                out = fut.result()
+            except Exception as e:
+                print(f"Audio analysis error ({Path(path).name}): {e}")
+                return None
+            finally:
+                self._futures.pop((path, part), None)
+            if out.get("start") is None:
+                return None
+            memo = (out["results"]["f"], float(out["start"]))
+            try:
+                fpath.parent.mkdir(parents=True, exist_ok=True)
+                tmp = fpath.with_name(fpath.stem + f".{os.getpid()}.tmp.npz")
+                np.savez(str(tmp), feat=memo[0].astype(np.float16), start=np.float64(memo[1]))
+                tmp.replace(fpath)
+            except Exception:
+                pass
+        if len(self._feats) > 8:
+            self._feats.pop(next(iter(self._feats)))
+        self._feats[(path, part)] = memo
+        return memo
+
+    def _match(self, a: str, b: str, part: str):
+        """Shared segment of `a` and `b` in absolute file seconds, as ((a_s, a_e), (b_s, b_e))."""
+        fa, fb = self._features(a, part), self._features(b, part)
+        if fa is None or fb is None:
+            return None
+        seg = shared_segment(fa[0], fb[0])
+        if seg is None:
+            return None
+        (a0, a1), (b0, b1) = seg
+        return (fa[1] + a0, fa[1] + a1), (fb[1] + b0, fb[1] + b1)
+
+    def _store(self, path: str, result: Dict[str, Any]) -> None:
+        entry: Dict[str, Any] = {"sig": _file_sig(path)}
+        for kind, seg in result.items():
+            entry[kind] = [round(seg[0], 2), round(seg[1], 2)] if seg else None
+        with self._lock:
+            self._data["episodes"][path] = entry
+
+    def _pending(self) -> List[str]:
+        order = list(self._episodes)
+        p = self._priority
+        if p in order:
+            order = [p] + [e for e in order if e != p]
+        return [e for e in order if self.cached(e) is None]
+
+    def _run(self) -> None:
+        try:
+            tried: set = set()
+            while not self._stop.is_set():
+                todo = [e for e in self._pending() if e not in tried]
+                if not todo or len(self._episodes) < 2:
+                    return
+                path = todo[0]
+                if not tried:
+                    self._prefetch(todo)
+                tried.add(path)
+                i = self._episodes.index(path)
+                partners = [self._episodes[j] for j in (i + 1, i - 1) if 0 <= j < len(self._episodes)]
+                result: Dict[str, Any] = {"intro": None, "outro": None}
+                for kind, part in (("intro", "head"), ("outro", "tail")):
+                    for other in partners:
+                        if self._stop.is_set():
+                            return
+                        hit = self._match(path, other, part)
+                        if hit:
+                            result[kind] = hit[0]
+                            break
+                self._store(path, result)
+                with self._lock:
+                    atomic_write_json(self._cache_path, self._data)
+                self._on_result(path, result)
+        except Exception as e:
+            print(f"Season segment detection error: {e}")
+
+
+# Subtitle cues and audio-based subtitle sync.
+
+_SUBSYNC_VERSION = 1
+_SUBSYNC_HOP = 0.05
+_SUBSYNC_MAX_SHIFT = 90.0
+_SUBSYNC_VAD_TIMEOUT = 900.0
+
+_SRT_TIME_RE = re.compile(
+    r"(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{1,3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{1,3})"
+)
+_ASS_TAG_RE = re.compile(r"\{[^}]*\}")
+_HTML_TAG_RE = re.compile(r"</?[a-zA-Z][^>]*>")
+
+
+def _cue_seconds(h, m, sec, frac) -> float:
+    return int(h or 0) * 3600 + int(m) * 60 + int(sec) + int(frac) / (10 ** len(frac))
+
+
+def _ass_time(v: str) -> float:
+    h, m, rest = v.strip().split(":")
+    sec, _, frac = rest.partition(".")
+    return _cue_seconds(h, m, sec, frac or "0")
+
+
+def _iter_ass_events(text: str):
+    """(start, end, raw override-tagged text) for each Dialogue line of an ASS/SSA script."""
+    fmt = ["layer", "start", "end", "style", "name", "marginl", "marginr", "marginv", "effect", "text"]
+    for line in text.splitlines():
+        if line.startswith("Format:") and "start" in line.lower():
+            fmt = [f.strip().lower() for f in line[7:].split(",")]
+        elif line.startswith("Dialogue:"):
+            parts = line[9:].split(",", len(fmt) - 1)
+            if len(parts) < len(fmt):
+                continue
+            try:
+                yield _ass_time(parts[fmt.index("start")]), _ass_time(parts[fmt.index("end")]), parts[-1]
+            except Exception:
+                continue
+
+
+def parse_subtitle_cues(text: str) -> List[Tuple[float, float, str]]:
+    """(start, end, plain text) cues from SRT, WebVTT or ASS/SSA text, sorted by start."""
+    cues: List[Tuple[float, float, str]] = []
+    if "[Events]" in text or "\nDialogue:" in text:
+        for start, end, raw in _iter_ass_events(text):
+            body = _ASS_TAG_RE.sub("", raw).replace("\\N", "\n").replace("\\n", "\n").replace("\\h", " ").strip()
+            cues.append((start, end, body))
+    else:
+        blocks = re.split(r"\r?\n\s*\r?\n", text)
+        for block in blocks:
+            lines = block.strip().splitlines()
+            for i, line in enumerate(lines):
+                mt = _SRT_TIME_RE.search(line)
+                if mt:
+                    g = mt.groups()
+                    body = "\n".join(lines[i + 1:])
+                    cues.append((_cue_seconds(*g[0:4]), _cue_seconds(*g[4:8]), _HTML_TAG_RE.sub("", body).strip()))
+                    break
+    cues = [c for c in cues if c[1] > c[0]]
+    cues.sort(key=lambda c: (c[0], c[1]))
+    return cues
+
+
+_SUBINGEST_VERSION = 1
+_SUB_TEXT_EXTS = (".srt", ".ass", ".ssa", ".vtt")
+_LEGACY_SUB_CODECS = ("cp932", "gb18030", "cp1252")
+_CP1252_PUNCT = set("\u2019\u2018\u201c\u201d\u2013\u2014\u2026\u00ab\u00bb\u00a1\u00bf\u00b0\u20ac\u00a0\u00b7")
+
+
+def _charset_score(text: str, codec: str) -> float:
+    """Share of non-ASCII characters that belong to the script a legacy codec is used for."""
+    n = good = 0.0
+    for i, ch in enumerate(text):
+        o = ord(ch)
+        if o < 0x80:
+            continue
+        n += 1
+        if codec == "cp1252":
+            if 0xC0 <= o <= 0x17F or ch in _CP1252_PUNCT:
+                good += 1
+        elif 0x3040 <= o <= 0x30FF:
+            good += 1.0 if codec == "cp932" else 0.5
+        elif 0x4E00 <= o <= 0x9FFF or 0x3000 <= o <= 0x303F or 0xFF01 <= o <= 0xFF5E:
+            # Latin text mis-decoded as double-byte lands ideographs between ASCII letters.
+            if not (0 < i < len(text) - 1 and text[i - 1].isascii() and text[i - 1].isalpha()
+                    and text[i + 1].isascii() and text[i + 1].isalpha()):
+                good += 1
+    return good / n if n else 1.0
+
+
+def decode_subtitle_bytes(data: bytes) -> Tuple[str, str]:
+    """(text, encoding): BOM or UTF-16 sniffing, strict UTF-8, then the most plausible legacy codec."""
+    if data.startswith(b"\xef\xbb\xbf"):
+        return data[3:].decode("utf-8", errors="replace"), "utf-8-sig"
+    if data.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return data.decode("utf-16", errors="replace"), "utf-16"
+    head = data[:4096]
+    if head and head.count(0) > len(head) // 4:
+        enc = "utf-16-le" if head[1::2].count(0) > head[0::2].count(0) else "utf-16-be"
+        return data.decode(enc, errors="replace"), enc
+    try:
+        return data.decode("utf-8"), "utf-8"
+    except UnicodeDecodeError:
+        pass
+    best: Optional[Tuple[float, str, str]] = None
+    for codec in _LEGACY_SUB_CODECS:
+        try:
+            text = data.decode(codec)
+        except UnicodeDecodeError:
+            continue
+        score = _charset_score(text[:200000], codec)
+        if best is None or score > best[0]:
+            best = (score, codec, text)
+    if best is None:
+        return data.decode("cp1252", errors="replace"), "cp1252"
+    return best[2], best[1]
+
+
+def read_subtitle_file(path: str) -> str:
+    with open(path, "rb") as f:
+        data = f.read()
+    return decode_subtitle_bytes(data)[0]
+
+
+def ingest_subtitle(src: str) -> Dict[str, Any]:
+    """Validated UTF-8 copy of an external subtitle, pre-parsed and cached per content fingerprint.
+
+    Returns {"path", "source", "encoding", "lines"}; raises ValueError when a
+    text subtitle holds no timed lines. Binary formats (VobSub, PGS) pass
+    through untouched for mpv to read.
+    """
+    ext = Path(src).suffix.lower()
+    if ext not in _SUB_TEXT_EXTS:
+        return {"path": str(src), "source": str(src), "encoding": "", "lines": None}
+    key = _file_cache_key(src, "subtitle", f"v{_SUBINGEST_VERSION}")
+    out = _player_cache_dir("subs") / f"{key}{ext}" if key else None
+    if out is not None and out.exists():
+        meta = read_json(out.with_suffix(".json"), None)
+        if isinstance(meta, dict) and "encoding" in meta:
+            return {"path": str(out), "source": str(src), "encoding": meta["encoding"], "lines": meta.get("lines")}
+    with open(src, "rb") as f:
+        data = f.read()
+    text, enc = decode_subtitle_bytes(data)
+    cues = parse_subtitle_cues(text)
+    if not cues:
+        raise ValueError("no subtitle lines found")
+    if out is None:
+        return {"path": str(src), "source": str(src), "encoding": enc, "lines": len(cues)}
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.name + f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(text.encode("utf-8"))
+    tmp.replace(out)
+    atomic_write_json(out.with_suffix(".json"), {"encoding": enc, "lines": len(cues), "source": str(src),
+                                                  "cues": [list(c) for c in cues]})
+    return {"path": str(out), "source": str(src), "encoding": enc, "lines": len(cues)}
+
+
+def _sidecar_language(video_path: str, sub_path: str) -> str:
+    """Language suffix of a sidecar ('Ep01.en.srt' -> 'en'), if it looks like one."""
+    rest = Path(sub_path).stem[len(Path(video_path).stem):].strip(".")
+    tag = rest.split(".")[-1] if rest else ""
+    return tag if re.fullmatch(r"[A-Za-z]{2,3}(?:-[A-Za-z]{2,4})?", tag) else ""
+
+
+# Matroska subtitle demuxing. Embedded text tracks are read straight from the
+# container: only element headers are parsed, and every other track's blocks
+# are skipped by seeking, so nothing is decoded.
+
+_MKV_EBML = 0x1A45DFA3
+_MKV_SEGMENT = 0x18538067
+_MKV_INFO = 0x1549A966
+_MKV_TRACKS = 0x1654AE6B
+_MKV_CLUSTER = 0x1F43B675
+_MKV_LEVEL1 = {0x114D9B74, _MKV_INFO, _MKV_TRACKS, _MKV_CLUSTER, 0x1C53BB6B, 0x1941A469, 0x1043A770, 0x1254C367}
+_MKV_TEXT_CODECS = {"S_TEXT/ASS": "ass", "S_TEXT/SSA": "ass", "S_ASS": "ass", "S_SSA": "ass",
+                    "S_TEXT/UTF8": "srt", "S_TEXT/WEBVTT": "srt"}
+_ASS_EVENTS_FORMAT = "[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+
+
+def _ebml_vint(buf: bytes, pos: int, keep_marker: bool = False) -> Optional[Tuple[int, int, bool]]:
+    """(value, length, all-ones) of the EBML varint at buf[pos], or None if it runs past the buffer."""
+    if pos >= len(buf):
+        return None
+    first = buf[pos]
+    n, mask = 1, 0x80
+    while n <= 8 and not first & mask:
+        n, mask = n + 1, mask >> 1
+    if n > 8:
+        raise ValueError("bad EBML varint")
+    if pos + n > len(buf):
+        return None
+    value = first if keep_marker else first & (mask - 1)
+    for c in buf[pos + 1:pos + n]:
+        value = (value << 8) | c
+    return value, n, (not keep_marker and value == (1 << (7 * n)) - 1)
+
+
+def _ebml_header(buf: bytes, pos: int = 0) -> Optional[Tuple[int, Optional[int], int]]:
+    """(element id, data size or None when unknown, header length) at buf[pos]."""
+    eid = _ebml_vint(buf, pos, keep_marker=True)
+    if eid is None:
+        return None
+    size = _ebml_vint(buf, pos + eid[1])
+    if size is None:
+        return None
+    return eid[0], (None if size[2] else size[0]), eid[1] + size[1]
+
+
+def _ebml_children(data: bytes):
+    """(id, payload) of each child element inside a fully read master element."""
+    pos = 0
+    while pos < len(data):
+        hdr = _ebml_header(data, pos)
+        if hdr is None or hdr[1] is None:
+            return
+        eid, size, hl = hdr
+        yield eid, data[pos + hl:pos + hl + size]
+        pos += hl + size
+
+
+def _ebml_uint(data: bytes) -> int:
+    return int.from_bytes(data, "big") if data else 0
+
+
+def _mkv_track_decoder(entry: bytes):
+    """Frame decoder for a TrackEntry's ContentEncodings (zlib or header stripping), or None if unsupported."""
+    steps = []
+    for eid, enc in _ebml_children(entry):
+        if eid != 0x6D80:
+            continue
+        for cid, encoding in _ebml_children(enc):
+            if cid != 0x6240:
+                continue
+            fields = dict(_ebml_children(encoding))
+            if _ebml_uint(fields.get(0x5033, b"")) != 0:
+                return None  # encrypted
+            if not _ebml_uint(fields.get(0x5032, b"\x01")) & 1:
+                continue  # applies to CodecPrivate only
+            comp = dict(_ebml_children(fields.get(0x5034, b"")))
+            algo = _ebml_uint(comp.get(0x4254, b""))
+            if algo == 0:
+                steps.append(lambda d: zlib.decompress(d))
+            elif algo == 3:
+                prefix = comp.get(0x4255, b"")
+                steps.append(lambda d, prefix=prefix: prefix + d)
+            else:
+                return None
+
+    def _decode(data: bytes) -> bytes:
+        for step in steps:
+            data = step(data)
+        return data
+
+    return _decode
+
+
+def _ass_clock(t: float) -> str:
+    cs = int(round(max(0.0, t) * 100))
+    return f"{cs // 360000}:{cs // 6000 % 60:02d}:{cs // 100 % 60:02d}.{cs % 100:02d}"
+
+
+def _srt_clock(t: float) -> str:
+    ms = int(round(max(0.0, t) * 1000))
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d},{ms % 1000:03d}"
+
+
+def mkv_subtitle_document(path: str, track_number: Optional[int] = None, ordinal: Optional[int] = None) -> Optional[str]:
+    """Text of an embedded Matroska/WebM subtitle track as a standalone ASS or SRT document.
+
+    The track is picked by its Matroska TrackNumber (mpv's `src-id`) or, when
+    that is unknown, as the `ordinal`-th subtitle track (mpv's `sid`). Returns
+    None for other containers, unsupported codecs and encrypted tracks.
+    """
+    with open(path, "rb", buffering=0) as f:
+        file_size = os.fstat(f.fileno()).st_size
+
+        def _read(pos: int, n: int) -> bytes:
+            f.seek(pos)
+            return f.read(n)
+
+        hdr = _ebml_header(_read(0, 16))
+        if hdr is None or hdr[0] != _MKV_EBML or hdr[1] is None:
+            return None
+        pos = hdr[2] + hdr[1]
+        hdr = _ebml_header(_read(pos, 16))
+        if hdr is None or hdr[0] != _MKV_SEGMENT:
+            return None
+        pos += hdr[2]
+        seg_end = file_size if hdr[1] is None else min(file_size, pos + hdr[1])
+
+        scale = 1000000
+        track: Optional[Dict[str, Any]] = None
+        blocks: List[Tuple[int, Optional[int], bytes]] = []  # (start ticks, duration ticks, payload)
+
+        def _add_block(cluster_ts: int, block: bytes, duration: Optional[int]) -> None:
+            tn = _ebml_vint(block, 0)
+            if tn is None or tn[0] != track["number"] or len(block) < tn[1] + 3:
+                return
+            if block[tn[1] + 2] & 0x06:
+                return  # laced; never used for text subtitles
+            rel = int.from_bytes(block[tn[1]:tn[1] + 2], "big", signed=True)
+            blocks.append((cluster_ts + rel, duration, block[tn[1] + 3:]))
+
+        def _scan_cluster(start: int, end: int, sized: bool) -> int:
+            cluster_ts = 0
+            p = start
+            while p < end:
+                buf = _read(p, 32)
+                hdr = _ebml_header(buf)
+                if hdr is None:
+                    return end
+                eid, size, hl = hdr
+                if not sized and eid in _MKV_LEVEL1:
+                    return p
+                if size is None:
+                    return end
+                data = p + hl
+                if eid == 0xE7:
+                    cluster_ts = _ebml_uint(_read(data, size))
+                elif eid == 0xA3:
+                    tn = _ebml_vint(buf, hl)
+                    if tn is None or tn[0] == track["number"]:
+                        _add_block(cluster_ts, _read(data, size), None)
+                elif eid == 0xA0:
+                    inner = _ebml_header(buf, hl)
+                    tn = _ebml_vint(buf, hl + inner[2]) if inner is not None and inner[0] == 0xA1 else None
+                    if tn is None or tn[0] == track["number"]:
+                        group = dict(_ebml_children(_read(data, size)))
+                        if 0xA1 in group:
+                            dur = _ebml_uint(group[0x9B]) if 0x9B in group else None
+                            _add_block(cluster_ts, group[0xA1], dur)
+                p = data + size
+            return end
+
+        while pos < seg_end:
+            hdr = _ebml_header(_read(pos, 16))
+            if hdr is None:
+                break
+            eid, size, hl = hdr
+            data = pos + hl
+            if eid == _MKV_CLUSTER:
+                if track is None:
+                    return None
+                pos = _scan_cluster(data, seg_end if size is None else data + size, size is not None)
+                continue
+            if size is None:
+                break
+            if eid == _MKV_INFO:
+                scale = _ebml_uint(dict(_ebml_children(_read(data, size))).get(0x2AD7B1, b"")) or scale
+            elif eid == _MKV_TRACKS and track is None:
+                seen = 0
+                for tid, entry in _ebml_children(_read(data, size)):
+                    if tid != 0xAE:
+                        continue
+                    fields = dict(_ebml_children(entry))
+                    if _ebml_uint(fields.get(0x83, b"")) != 0x11:
+                        continue
+                    seen += 1
+                    number = _ebml_uint(fields.get(0xD7, b""))
+                    if (track_number is not None and number == int(track_number)) or \
+                            (track_number is None and ordinal is not None and seen == int(ordinal)):
+                        codec = fields.get(0x86, b"").decode("ascii", errors="replace")
+                        decode = _mkv_track_decoder(entry)
+                        if codec not in _MKV_TEXT_CODECS or decode is None:
+                            return None
+                        track = {"number": number, "kind": _MKV_TEXT_CODECS[codec], "decode": decode,
+                                 "private": fields.get(0x63A2, b""),
+                                 "default_dur": _ebml_uint(fields.get(0x23E383, b""))}
+                        break
+                if track is None:
+                    return None
+            pos = data + size
+    if track is None:
+        return None
+
+    tick = scale / 1e9
+    blocks.sort(key=lambda b: b[0])
+    events: List[Tuple[float, float, str]] = []
+    for i, (st, dur, payload) in enumerate(blocks):
+        start = st * tick
+        if dur is not None:
+            end = start + dur * tick
+        elif track["default_dur"]:
+            end = start + track["default_dur"] / 1e9
+        else:
+            nxt = next((b[0] * tick for b in blocks[i + 1:] if b[0] > st), start + 5.0)
+            end = min(nxt, start + 10.0)
+        try:
+            text = track["decode"](payload).decode("utf-8", errors="replace").rstrip("\x00")
+        except Exception:
+            continue
+        events.append((start, end, text))
+
+    if track["kind"] == "ass":
+        header = track["private"].decode("utf-8", errors="replace").rstrip("\x00").rstrip()
+        if "[Events]" not in header:
+            header += "\n\n" + _ASS_EVENTS_FORMAT
+        lines = [header.rstrip("\n")]
+        ordered = []
+        for start, end, text in events:
+            # ReadOrder, Layer, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+            parts = text.split(",", 2)
+            if len(parts) < 3:
+                continue
+            try:
+                order = int(parts[0])
+            except ValueError:
+                order = len(ordered)
+            ordered.append((order, f"Dialogue: {parts[1]},{_ass_clock(start)},{_ass_clock(end)},{parts[2]}"))
+        ordered.sort(key=lambda o: o[0])
+        lines.extend(line for _o, line in ordered)
+        return "\n".join(lines) + "\n"
+    out = []
+    for n, (start, end, text) in enumerate(events, 1):
+        out.append(f"{n}\n{_srt_clock(start)} --> {_srt_clock(end)}\n{text.strip()}\n")
+    return "\n".join(out)
+
+
+_SUBDOC_MEMO: "OrderedDict[Tuple[str, str], Optional[str]]" = OrderedDict()
+_SUBDOC_LOCKS: Dict[Tuple[str, str], threading.Lock] = {}
+_SUBDOC_LOCK = threading.Lock()
+
+
+def embedded_subtitle_document(path: str, fp: Optional[str], track: Dict[str, Any]) -> Optional[str]:
+    """An embedded text track demuxed to ASS/SRT text, or None when the container can't be demuxed.
+
+    One extraction serves every consumer (cue index, ASS complexity): the
+    document is cached per fingerprint on disk and memoized per file in
+    memory, and concurrent callers for the same track wait for the first.
+    """
+    mkey = (str(path), subtitle_track_ident(track))
+    cache = None
+    if fp:
+        key = hashlib.sha1(f"{fp}|{mkey[1]}|subdoc|v{_CUES_VERSION}".encode("utf-8")).hexdigest()
+        cache = _player_cache_dir("subdocs") / f"{key}.txt"
+    with _SUBDOC_LOCK:
+        lock = _SUBDOC_LOCKS.setdefault(mkey, threading.Lock())
+    with lock:
+        with _SUBDOC_LOCK:
+            if mkey in _SUBDOC_MEMO:
+                _SUBDOC_MEMO.move_to_end(mkey)
+                doc = _SUBDOC_MEMO[mkey]
+                if doc is None or cache is None or cache.exists():
+                    return doc
+            else:
+                doc = None
+        if doc is None and cache is not None:
+            try:
+                doc = cache.read_text(encoding="utf-8")
+            except Exception:
+                doc = None
+        if doc is None:
+            try:
+                src_id = track.get('src-id')
+                doc = mkv_subtitle_document(path, int(src_id) if src_id is not None else None, int(track.get('id') or 0))
+            except Exception as e:
+                print(f"Subtitle demux error: {e}")
+                doc = None
+        if doc is not None and cache is not None and not cache.exists():
+            try:
+                cache.parent.mkdir(parents=True, exist_ok=True)
+                tmp = cache.with_name(cache.name + f".{os.getpid()}.tmp")
+                tmp.write_text(doc, encoding="utf-8")
+                tmp.replace(cache)
+            except Exception:
+                pass
+        with _SUBDOC_LOCK:
+            _SUBDOC_MEMO[mkey] = doc
+            while len(_SUBDOC_MEMO) > 4:
+                _SUBDOC_LOCKS.pop(_SUBDOC_MEMO.popitem(last=False)[0], None)
+        return doc
+
+
+def _extract_embedded_cues(path: str, track: Dict[str, Any], timeout: float = 300.0) -> List[Tuple[float, float, str]]:
+    """Cue timings/text of a non-demuxable embedded track, by running it through a silent headless instance.
+
+    Audio is decoded into the null output unthrottled, so this takes about as
+    long as an audio decode of the file. Raises RuntimeError if the pass fails
+    or exceeds `timeout` seconds, so partial results are never cached.
+    """
+    sid = int(track.get('id') or 0)
+    cues: List[Tuple[float, float, str]] = []
+    state: Dict[str, Any] = {}
+    lock = threading.Lock()
+    m = None
+
+    def _on(name, value):
+        with lock:
+            state[name] = value
+            if name == "sub-end" and value is not None and state.get("sub-start") is not None:
+                st, en = float(state["sub-start"]), float(value)
+                if en > st and (not cues or cues[-1][0] != st):
+                    cues.append((st, en, str(state.get("sub-text") or "")))
+
+    try:
+        m = _make_headless_mpv(vid='no', aid='auto', ao='null', sid=str(int(sid)), untimed=True, pause=False,
+                               keep_open='no', audio_display='no')
+        for prop in ("sub-text", "sub-start", "sub-end"):
+            m.observe_property(prop, _on)
+        with m.prepare_and_wait_for_event('end-file', timeout=timeout):
+            m.loadfile(str(path))
+    except Exception as e:
+        raise RuntimeError(f"subtitle extraction failed: {e}") from e
+    finally:
+        try:
+            if m is not None:
+                m.terminate()
+        except Exception:
+            pass
+    with lock:
+        cues.sort(key=lambda c: (c[0], c[1]))
+        return list(cues)
+
+
+def rasterize_cues(cues, n: int, hop: float = _SUBSYNC_HOP):
+    """uint8 array of length `n`: 1 where a cue is on screen (grid of `hop` seconds)."""
+    raster = np.zeros(int(n), np.uint8)
+    for st, en, *_ in cues:
+        a, b = int(st / hop), int(math.ceil(en / hop))
+        if b > 0 and a < n:
+            raster[max(0, a):min(n, b)] = 1
+    return raster
+
+
+def estimate_subtitle_offset(vad, raster, hop: float = _SUBSYNC_HOP, max_shift: float = _SUBSYNC_MAX_SHIFT) -> Tuple[float, float]:
+    """(delay seconds, confidence) that best lines cues up with speech, via FFT cross-correlation.
+
+    The delay follows mpv's sub-delay sign (positive shows subtitles later).
+    Confidence is the peak's z-score against the other candidate shifts.
+    """
+    a = np.asarray(vad, np.float32)
+    b = np.asarray(raster, np.float32)
+    n = max(len(a), len(b))
+    a = np.pad(a, (0, n - len(a))) - a.mean()
+    b = np.pad(b, (0, n - len(b))) - b.mean()
+    nfft = 1 << (2 * n - 1).bit_length()
+    corr = np.fft.irfft(np.fft.rfft(a, nfft) * np.conj(np.fft.rfft(b, nfft)), nfft)
+    k = int(max_shift / hop)
+    lags = np.concatenate((np.arange(0, k + 1), np.arange(-k, 0)))
+    vals = np.concatenate((corr[:k + 1], corr[nfft - k:]))
+    best = int(np.argmax(vals))
+    conf = float((vals[best] - vals.mean()) / (vals.std() + 1e-9))
+    return float(lags[best] * hop), conf
+
+
+def speech_activity(path: str, fp: Optional[str]):
+    """Voice-activity grid for a whole file (bit-packed cache per fingerprint)."""
+    cache = None
+    if fp:
+        key = hashlib.sha1(f"{fp}|vad|{_SUBSYNC_HOP}|v{_SUBSYNC_VERSION}".encode("utf-8")).hexdigest()
+        cache = _player_cache_dir("vad") / f"{key}.npz"
+        try:
+            with np.load(str(cache)) as z:
+                return np.unpackbits(z["bits"])[: int(z["n"])]
+        except Exception:
+            pass
+    from concurrent.futures import TimeoutError as FutureTimeout
+    fut = pcm_analysis_pool().submit(run_pcm_analysis, path, {"vad": ("vad", {"hop": _SUBSYNC_HOP})})
+    try:
+        vad = fut.result(timeout=_SUBSYNC_VAD_TIMEOUT)["results"]["vad"]
+    except FutureTimeout:
+        fut.cancel()
+        raise RuntimeError("speech detection timed out")
+    if cache is not None:
+        try:
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache.with_name(cache.stem + f".{os.getpid()}.tmp.npz")
+            np.savez(str(tmp), n=np.int64(len(vad)), bits=np.packbits(vad))
+            tmp.replace(cache)
+        except Exception:
+            pass
+    return vad
+
+
+# Subtitle cue index (line navigation and the transcript drawer).
+
+_CUES_VERSION = 1
+_BITMAP_SUB_CODECS = {"hdmv_pgs_subtitle", "dvd_subtitle", "dvb_subtitle", "xsub"}
+
+
+def subtitle_track_ident(track: Dict[str, Any]) -> str:
+    """Stable identity of a subtitle track across sessions (external file stat, or embedded stream)."""
+    ext = str(track.get('external-filename') or "")
+    if ext:
+        try:
+            st = os.stat(ext)
+            return f"ext:{ext}:{st.st_size}:{st.st_mtime_ns}"
+        except Exception:
+            return f"ext:{ext}"
+    return f"emb:{track.get('ff-index')}:{track.get('codec')}:{track.get('lang')}:{track.get('title')}"
+
+
+def subtitle_track_cues(path: str, fp: Optional[str], track: Dict[str, Any]) -> List[Tuple[float, float, str]]:
+    """Cues of a subtitle track: external files are parsed directly, embedded text tracks extracted once and cached.
+
+    Embedded tracks share embedded_subtitle_document() with the ASS complexity
+    check; other containers fall back to a headless playback pass.
+    """
+    ext = str(track.get('external-filename') or "")
+    if ext:
+        # Ingested copies carry their pre-parsed cues alongside.
+        hit = read_json(Path(ext).with_suffix(".json"), None) if Path(ext).parent == _player_cache_dir("subs") else None
+        if isinstance(hit, dict) and isinstance(hit.get("cues"), list):
+            return [(float(a), float(b), str(t)) for a, b, t in hit["cues"]]
+        return parse_subtitle_cues(read_subtitle_file(ext))
+    if str(track.get('codec') or "") in _BITMAP_SUB_CODECS:
+        return []
+    if fp:
+        hit = read_json(_cue_cache_path(fp, track), None)
+        if isinstance(hit, dict) and isinstance(hit.get("cues"), list):
+            return [(float(a), float(b), str(t)) for a, b, t in hit["cues"]]
+    doc = embedded_subtitle_document(path, fp, track)
+    cues = parse_subtitle_cues(doc) if doc is not None else _extract_embedded_cues(path, track)
+    if fp:
+        save_subtitle_track_cues(fp, track, cues)
+    return cues
+
+
+def _cue_cache_path(fp: str, track: Dict[str, Any]) -> Path:
+    key = hashlib.sha1(f"{fp}|{subtitle_track_ident(track)}|v{_CUES_VERSION}".encode("utf-8")).hexdigest()
+    return _player_cache_dir("cues") / f"{key}.json"
+
+
+def save_subtitle_track_cues(fp: str, track: Dict[str, Any], cues: List[Tuple[float, float, str]]) -> None:
+    """Cache an embedded track's extracted cues (used when they were read before the fingerprint was known)."""
+    if not fp or not cues or track.get('external-filename'):
+        return
+    try:
+        atomic_write_json(_cue_cache_path(fp, track), {"cues": [list(c) for c in cues]})
+    except Exception:
+        pass
+
+
+class SubtitleCueIndex:
+    """Sorted, array-backed cues with binary-search lookup (subtitle-clock seconds).
+
+    `_reach[i]` is the latest end among cues 0..i, so the active-cue lookup
+    stays correct for overlapping lines without scanning the whole list.
+    """
+
+    def __init__(self, cues: List[Tuple[float, float, str]]):
+        cues = sorted(cues, key=lambda c: (c[0], c[1]))
+        self.starts = array('d', (c[0] for c in cues))
+        self.ends = array('d', (c[1] for c in cues))
+        self.texts: List[str] = [c[2] for c in cues]
+        self._reach = array('d', self.ends)
+        for i in range(1, len(self._reach)):
+            if self._reach[i] < self._reach[i - 1]:
+                self._reach[i] = self._reach[i - 1]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def active(self, t: float) -> int:
+        """Latest-starting cue on screen at `t`, or -1."""
+        i = bisect.bisect_right(self.starts, t) - 1
+        while i >= 0 and self._reach[i] > t:
+            if self.ends[i] > t:
+                return i
+            i -= 1
+        return -1
+
+    def line_at(self, t: float) -> int:
+        """Active cue, else the last one that started before `t` (-1 before the first line)."""
+        i = self.active(t)
+        return i if i >= 0 else bisect.bisect_right(self.starts, t) - 1
+
+    def next_after(self, t: float) -> int:
+        i = bisect.bisect_right(self.starts, t + 0.05)
+        return i if i < len(self.starts) else -1
+
+    def previous(self, t: float) -> int:
+        i = self.active(t)
+        return i - 1 if i >= 0 else bisect.bisect_right(self.starts, t) - 1
+
+
+# Season-wide subtitle search (persisted inverted index).
+
+_SUBSEARCH_VERSION = 1
+_SUB_WORD_RE = re.compile(r"\w+")
+_SIDECAR_SUB_EXTS = (".srt", ".ass", ".ssa", ".vtt")
+
+
+def subtitle_tokens(text: str) -> List[str]:
+    """Lowercased word tokens; unspaced CJK runs become overlapping character bigrams."""
+    out: List[str] = []
+    for w in _SUB_WORD_RE.findall(str(text or "").lower()):
+        if len(w) > 2 and any(ch >= "\u3000" for ch in w):
+            out.extend(w[i:i + 2] for i in range(len(w) - 1))
+        else:
+            out.append(w)
+    return out
+
+
+def sidecar_subtitles(video_path: str) -> List[str]:
+    """Subtitle files next to a video whose names start with the video's stem ('Ep01.srt', 'Ep01.en.ass')."""
+    try:
+        p = Path(video_path)
+        stem = p.stem.lower()
+        out = []
+        for f in p.parent.iterdir():
+            name = f.name.lower()
+            if f.suffix.lower() in _SIDECAR_SUB_EXTS and (f.stem.lower() == stem or name.startswith(stem + ".")):
+                out.append(str(f))
+        return sorted(out, key=_natural_sort_key)
+    except Exception:
+        return []
+
+
+def _episode_search_cues(path: str, prefer_lang: str = "") -> List[Tuple[float, float, str]]:
+    """Subtitle lines used to index one episode: a sidecar file if present, else its best embedded text track."""
+    lang = str(prefer_lang or "").lower()
+    sidecars = sidecar_subtitles(path)
+    if sidecars:
+        pick = next((f for f in sidecars if lang and f".{lang}." in Path(f).name.lower()), sidecars[0])
+        return subtitle_track_cues(path, None, {"external-filename": pick})
+    meta = _probe_cache_store().get(path)
+    if meta is None and mpv is not None:
+        m = None
+        try:
+            m = _make_headless_mpv(vid='no', aid='no', sid='no', cache='no')
+            meta = _probe_file(m, path)
+            _probe_cache_store().put(path, meta)
+        except Exception:
+            meta = None
+        finally:
+            try:
+                if m is not None:
+                    m.terminate()
+            except Exception:
+                pass
+    if meta is None:
+        # Unknown is not "no subtitles": raise so the indexer retries instead of stamping an empty entry.
+        raise RuntimeError("could not probe subtitle tracks")
+    subs = [t for t in (meta or {}).get("subtitles") or []
+            if not t.get("external") and str(t.get("codec") or "") not in _BITMAP_SUB_CODECS]
+    if not subs:
+        return []
+    subs.sort(key=lambda t: (not (lang and str(t.get("lang") or "").lower() == lang), not t.get("default"), bool(t.get("forced"))))
+    return subtitle_track_cues(path, _fingerprints().get(path), subs[0])
+
+
+class SubtitleSearchIndex:
+    """Persistent inverted index (token -> episode, line) over subtitle text.
+
+    SQLite (WAL) like ProbeCache. Each file row carries a stamp of the video's
+    and its sidecars' size/mtime; a file is re-indexed only when the stamp
+    changes, so reopening an indexed season costs one stat per episode.
+    """
+
+    def __init__(self, path: Path):
+        self._path = Path(path)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _conn_locked(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self._path), timeout=5.0, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE, stamp TEXT, lines INTEGER, updated REAL)")
+            db.execute("CREATE TABLE IF NOT EXISTS cues (file_id INTEGER, cue INTEGER, t REAL, text TEXT, PRIMARY KEY (file_id, cue)) WITHOUT ROWID")
+            db.execute("CREATE TABLE IF NOT EXISTS postings (token TEXT, file_id INTEGER, cue INTEGER, PRIMARY KEY (token, file_id, cue)) WITHOUT ROWID")
+            # (file_id, token) lets a search seek each in-scope episode's postings directly.
+            db.execute("DROP INDEX IF EXISTS postings_file")
+            db.execute("CREATE INDEX IF NOT EXISTS postings_file_token ON postings (file_id, token)")
+            db.execute("CREATE TEMP TABLE IF NOT EXISTS search_scope (file_id INTEGER PRIMARY KEY, n INTEGER)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(str(path)))
+
+    @staticmethod
+    def stamp(path: str) -> Optional[str]:
+        try:
+            parts = [f"v{_SUBSEARCH_VERSION}"]
+            for f in [path] + sidecar_subtitles(path):
+                st = os.stat(f)
+                parts.append(f"{Path(f).name}:{st.st_size}:{st.st_mtime_ns}")
+            return "|".join(parts)
+        except Exception:
+            return None
+
+    def is_current(self, path: str, stamp: Optional[str]) -> bool:
+        with self._lock:
+            try:
+                row = self._conn_locked().execute("SELECT stamp FROM files WHERE path=?", (self._key(path),)).fetchone()
+            except Exception:
+                return False
+        return row is not None and row[0] == stamp
+
+    def replace(self, path: str, stamp: str, cues: List[Tuple[float, float, str]]):
+        """Swap in one episode's lines and postings in a single short transaction."""
+        key = self._key(path)
+        postings = set()
+        for i, c in enumerate(cues):
+            for tok in subtitle_tokens(c[2]):
+                postings.add((tok, i))
+        with self._lock:
+            try:
+                db = self._conn_locked()
+                with db:
+                    db.execute("INSERT OR IGNORE INTO files (path) VALUES (?)", (key,))
+                    fid = db.execute("SELECT id FROM files WHERE path=?", (key,)).fetchone()[0]
+                    db.execute("DELETE FROM cues WHERE file_id=?", (fid,))
+                    db.execute("DELETE FROM postings WHERE file_id=?", (fid,))
+                    db.executemany("INSERT INTO cues VALUES (?, ?, ?, ?)",
+                                   [(fid, i, float(c[0]), " ".join(str(c[2]).split())) for i, c in enumerate(cues)])
+                    db.executemany("INSERT INTO postings VALUES (?, ?, ?)", [(tok, fid, i) for tok, i in postings])
+                    db.execute("UPDATE files SET stamp=?, lines=?, updated=? WHERE id=?", (stamp, len(cues), time.time(), fid))
+            except Exception as e:
+                print(f"Subtitle index write error: {e}")
+
+    def search(self, query: str, paths: List[str], limit: int = 200) -> List[Tuple[str, float, str]]:
+        """(path, time, line) hits containing every query word (the last one as a prefix), in episode order.
+
+        The scope goes into a temp table and every word is matched through the
+        (file_id, token) index of the in-scope episodes only; the intersection,
+        ordering and limit all run inside SQLite.
+        """
+        toks = subtitle_tokens(query)
+        if not toks or not paths:
+            return []
+        prefix_last = not str(query).rstrip()[-1:].isspace() and not any(ch >= "\u3000" for ch in toks[-1])
+        with self._lock:
+            try:
+                db = self._conn_locked()
+                keys = {self._key(p): n for n, p in enumerate(paths)}
+                scope: List[Tuple[int, int]] = []
+                key_list = list(keys)
+                for i in range(0, len(key_list), 500):
+                    chunk = key_list[i:i + 500]
+                    rows = db.execute(f"SELECT id, path FROM files WHERE path IN ({','.join('?' * len(chunk))})", chunk)
+                    scope.extend((fid, keys[key]) for fid, key in rows)
+                if not scope:
+                    return []
+                db.execute("DELETE FROM search_scope")
+                db.executemany("INSERT OR REPLACE INTO search_scope VALUES (?, ?)", scope)
+                parts: List[str] = []
+                args: List[Any] = []
+                for i, tok in enumerate(toks):
+                    if prefix_last and i == len(toks) - 1:
+                        parts.append("SELECT p.file_id, p.cue FROM search_scope s JOIN postings p "
+                                     "ON p.file_id = s.file_id AND p.token >= ? AND p.token < ?")
+                        args += [tok, tok + "\uffff"]
+                    else:
+                        parts.append("SELECT p.file_id, p.cue FROM search_scope s JOIN postings p "
+                                     "ON p.file_id = s.file_id AND p.token = ?")
+                        args.append(tok)
+                sql = (f"SELECT s.n, c.t, c.text FROM ({' INTERSECT '.join(parts)}) q "
+                       "JOIN search_scope s ON s.file_id = q.file_id "
+                       "JOIN cues c ON c.file_id = q.file_id AND c.cue = q.cue "
+                       "ORDER BY s.n, q.cue LIMIT ?")
+                rows = db.execute(sql, args + [max(1, int(limit))]).fetchall()
+                return [(paths[n], float(t), str(text)) for n, t, text in rows]
+            except Exception as e:
+                print(f"Subtitle search error: {e}")
+                return []
+
+    def close(self):
+        with self._lock:
+            try:
+                if self._db is not None:
+                    self._db.close()
+            except Exception:
+                pass
+            self._db = None
+
+
+_subtitle_search: Optional[SubtitleSearchIndex] = None
+_subtitle_search_lock = threading.Lock()
+
+
+def _subtitle_search_store() -> SubtitleSearchIndex:
+    global _subtitle_search
+    with _subtitle_search_lock:
+        if _subtitle_search is None:
+            _subtitle_search = SubtitleSearchIndex(_player_cache_dir("subsearch.db"))
+        return _subtitle_search
+
+
+class SubtitleSearchIndexer:
+    """Background thread that brings the search index up to date for a set of episodes.
+
+    The current episode goes first; stale or missing files are (re)indexed one
+    at a time and `on_progress(done, total)` is called from the worker thread.
+    """
+
+    def __init__(self, paths: List[str], prefer_lang: str = "", on_progress=None):
+        self.paths = list(paths)
+        self._prefer_lang = prefer_lang
+        self._on_progress = on_progress
+        self._first: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.done = 0
+
+    def covers(self, paths: List[str]) -> bool:
+        return set(paths) <= set(self.paths)
+
+    def prioritize(self, path: str):
+        self._first = str(path)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="subsearch", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        index = _subtitle_search_store()
+        paths = list(self.paths)
+        if self._first in paths:
+            paths.remove(self._first)
+            paths.insert(0, self._first)
+        self.done = 0
+        for path in paths:
+            if self._stop.is_set():
+                return
+            try:
+                stamp = SubtitleSearchIndex.stamp(path)
+                if stamp is not None and not index.is_current(path, stamp):
+                    index.replace(path, stamp, _episode_search_cues(path, self._prefer_lang))
+            except Exception as e:
+                print(f"Subtitle indexing error ({Path(path).name}): {e}")
+            self.done += 1
+            if self._on_progress is not None:
+                self._on_progress(self.done, len(paths))
+
+
+# ASS typesetting complexity (automatic subtitle performance mode).
+
+_ASS_COMPLEXITY_VERSION = 2
+_ASS_HEAVY_OPS_PER_MIN = 150.0   # animated/clipped/moved/drawn events per minute of script
+_ASS_HEAVY_PEAK = 40             # events on screen at once
+_ASS_OP_RES = {
+    "transform": re.compile(r"\\t\("),
+    "clip": re.compile(r"\\i?clip\("),
+    "move": re.compile(r"\\move\("),
+    "drawing": re.compile(r"\\p[1-9]"),
+    "blur": re.compile(r"\\(?:blur|be)[\d.]"),
+}
+_ASS_FONT_RE = re.compile(r"\\fn([^\\}]+)")
+
+
+def _ass_style_fonts(text: str) -> List[str]:
+    fonts, idx = [], 1
+    for line in text.splitlines():
+        if line.startswith("Format:") and "fontname" in line.lower():
+            cols = [c.strip().lower() for c in line[7:].split(",")]
+            idx = cols.index("fontname")
+        elif line.startswith("Style:"):
+            cols = line[6:].split(",")
+            if len(cols) > idx:
+                fonts.append(cols[idx].strip())
+    return fonts
+
+
+def ass_complexity(events: List[Tuple[float, float, str]], fonts: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Typesetting load of an ASS script from its raw events: tag counts, event density and fonts."""
+    ops = {k: 0 for k in _ASS_OP_RES}
+    font_set = {f.lower() for f in (fonts or []) if f}
+    edges = []
+    for st, en, raw in events:
+        if "\\" in raw:
+            for k, rx in _ASS_OP_RES.items():
+                ops[k] += len(rx.findall(raw))
+            font_set.update(f.strip().lower() for f in _ASS_FONT_RE.findall(raw))
+        edges.append((st, 1))
+        edges.append((en, -1))
+    edges.sort()
+    peak = cur = 0
+    for _t, d in edges:
+        cur += d
+        peak = max(peak, cur)
+    span = (max(en for _s, en, _r in events) - min(st for st, _e, _r in events)) if events else 0.0
+    minutes = max(1.0, span / 60.0)
+    heavy_ops = ops["transform"] + ops["clip"] + ops["move"] + ops["drawing"]
+    return {
+        "v": _ASS_COMPLEXITY_VERSION,
+        "events": len(events),
+        "events_per_s": round(len(events) / max(1.0, span), 2),
+        "peak": peak,
+        "ops": ops,
+        "fonts": len(font_set),
+        "heavy": bool(heavy_ops / minutes >= _ASS_HEAVY_OPS_PER_MIN or peak >= _ASS_HEAVY_PEAK),
+    }
+
+
+def subtitle_track_complexity(path: str, fp: Optional[str], track: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """ass_complexity() of an ASS/SSA track (None for other formats or non-demuxable containers).
+
+    Embedded tracks are measured from their real Dialogue events, using the
+    same extraction as the cue index (embedded_subtitle_document).
+    """
+    ext = str(track.get('external-filename') or "")
+    codec = str(track.get('codec') or "").lower()
+    if ext:
+        if Path(ext).suffix.lower() not in (".ass", ".ssa"):
+            return None
+        text = read_subtitle_file(ext)
+        return ass_complexity(list(_iter_ass_events(text)), _ass_style_fonts(text))
+    if codec not in ("ass", "ssa"):
+        return None
+    cache = None
+    if fp:
+        key = hashlib.sha1(f"{fp}|{subtitle_track_ident(track)}|asscx|v{_ASS_COMPLEXITY_VERSION}".encode("utf-8")).hexdigest()
+        cache = _player_cache_dir("asscx") / f"{key}.json"
+        hit = read_json(cache, None)
+        if isinstance(hit, dict) and hit.get("v") == _ASS_COMPLEXITY_VERSION:
+            return hit
+    doc = embedded_subtitle_document(path, fp, track)
+    if doc is None:
+        return None
+    events = list(_iter_ass_events(doc))
+    result = ass_complexity(events, _ass_style_fonts(doc))
+    if cache is not None and events:
+        try:
+            atomic_write_json(cache, result)
+        except Exception:
+            pass
+    return result
+
+
+# Loudness normalization (static per-file gain from a cached R128-style measurement).
+
+_LOUDNESS_VERSION = 1
+_LOUDNESS_RATE = 16000
+_LOUDNESS_TARGET = -18.0  # LUFS, the ReplayGain 2 reference level
+_LOUDNESS_MAX_GAIN = 12.0
+
+
+def _loudness_cache_path(fp: str) -> Path:
+    key = hashlib.sha1(f"{fp}|loudness|v{_LOUDNESS_VERSION}".encode("utf-8")).hexdigest()
+    return _player_cache_dir("loudness") / f"{key}.json"
+
+
+def _waveform_cache_path(fp: str) -> Path:
+    key = hashlib.sha1(f"{fp}|waveform|v{_LOUDNESS_VERSION}".encode("utf-8")).hexdigest()
+    return _player_cache_dir("waveform") / f"{key}.f16"
+
+
+def normalization_gain(measure: Dict[str, Any], target: float = _LOUDNESS_TARGET) -> float:
+    """dB of gain that brings a file to `target`, limited so sample peaks stay 1 dB under full scale."""
+    try:
+        integrated = float(measure["integrated"])
+        if integrated <= -70.0:
+            return 0.0
+        gain = max(-_LOUDNESS_MAX_GAIN, min(_LOUDNESS_MAX_GAIN, target - integrated))
+        return round(min(gain, -1.0 - float(measure.get("peak", -96.0))), 2) if gain > 0 else round(gain, 2)
+    except Exception:
+        return 0.0
+
+
+# Quiet-span map for smart speed (derived from the cached speech-activity grid).
+
+_QUIET_VERSION = 1
+_QUIET_MIN_SPAN = 2.0
+_QUIET_PAD = 0.3
+
+
+def quiet_spans(activity, hop: float = _SUBSYNC_HOP, min_span: float = _QUIET_MIN_SPAN, pad: float = _QUIET_PAD):
+    """(k, 2) float32 [start, end) seconds with no speech for at least `min_span`, trimmed by `pad` at both ends."""
+    act = np.asarray(activity, dtype=bool)
+    quiet = np.concatenate(([False], ~act, [False]))
+    edges = np.flatnonzero(quiet[1:] != quiet[:-1])
+    spans = edges.reshape(-1, 2).astype(np.float64) * hop
+    spans[:, 0] += pad
+    spans[:, 1] -= pad
+    return spans[(spans[:, 1] - spans[:, 0]) >= min_span].astype(np.float32)
+
+
+def _quiet_cache_path(fp: str) -> Path:
+    key = hashlib.sha1(f"{fp}|quiet|v{_QUIET_VERSION}".encode("utf-8")).hexdigest()
+    return _player_cache_dir("quiet") / f"{key}.f32"
+
+
+def load_quiet_map(path: str, fp: str):
+    """Quiet spans for a file (cached per fingerprint; computes speech activity if needed)."""
+    cache = _quiet_cache_path(fp)
+    try:
+        data = np.fromfile(str(cache), dtype="<f4")
+        return data.reshape(-1, 2)
+    except Exception:
+        pass
+    spans = quiet_spans(speech_activity(path, fp))
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache.with_suffix(cache.suffix + f".{os.getpid()}.tmp")
+        spans.astype("<f4").tofile(str(tmp))
+        tmp.replace(cache)
+    except Exception:
+        pass
+    return spans
+
+
+class SeekPreviewSprites:
+    """Low-res preview frames for scrubber hover, generated off the playback instance.
+
+    A dedicated headless mpv on its own thread (single decoder thread, paced
+    between grabs) fills a fixed-layout sprite file in the player cache, keyed
+    by content fingerprint::
+
+        [4 KiB JSON header][one fill-flag byte per frame][frames, BGRX rows]
+
+    The file is memory-mapped, so hover lookups are a slice copy and nothing is
+    decoded on the UI thread. Coarse frames (every INTERVAL seconds) are filled
+    in bisection order so the whole timeline becomes usable early; hovering
+    queues denser FINE_INTERVAL frames around the pointer, kept in a small
+    in-memory LRU.
+    """
+
+    FRAME_W = 160
+    FRAME_H = 90
+    INTERVAL = 10.0
+    FINE_INTERVAL = 2.0
+    FINE_RADIUS = 12.0
+    FINE_MEMORY = 240
+    HEADER = 4096
+    DISK_MAX_BYTES = 512 * 1024 * 1024
+    PACE_S = 0.01
+
+    _cache: Optional[DiskLRUCache] = None
+
+    def __init__(self, path: str, fingerprint: str):
+        self._path = str(path)
+        self._key = hashlib.sha1(f"{fingerprint}|sprites|{self.FRAME_W}x{self.FRAME_H}|{self.INTERVAL}".encode("utf-8")).hexdigest()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._mm: Optional[mmap.mmap] = None
+        self._fh = None
+        self._count = 0
+        self._duration = 0.0
+        self._flags_off = self.HEADER
+        self._frames_off = self.HEADER
+        self._fine: "OrderedDict[int, bytes]" = OrderedDict()
+        self._refine_target: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self.generation = 0  # bumped whenever a frame lands, so viewers know to re-read
+
+    @classmethod
+    def _disk(cls) -> DiskLRUCache:
+        if cls._cache is None:
+            cls._cache = DiskLRUCache(_player_cache_dir("sprites"), cls.DISK_MAX_BYTES, ".sprites")
+        return cls._cache
+
+    @property
+    def frame_bytes(self) -> int:
+        return self.FRAME_W * self.FRAME_H * 4
+
+    # ---- UI thread ----
+
+    def start(self):
+        if self._thread is None and mpv is not None:
+            self._thread = threading.Thread(target=self._run, name="seek-preview", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def request_refine(self, t: float):
+        """Ask for dense frames around `t` (latest request wins)."""
+        self._refine_target = float(t)
+        self._wake.set()
+
+    def frame_at(self, t: float) -> Optional[QImage]:
+        """Closest available frame to `t`, or None. Cheap enough to call per mouse move."""
+        try:
+            fi = int(round(float(t) / self.FINE_INTERVAL))
+            with self._lock:
+                data = self._fine.get(fi)
+                if data is None:
+                    data = self._coarse_near_locked(float(t))
+            if data is None:
+                return None
+            return QImage(data, self.FRAME_W, self.FRAME_H, self.FRAME_W * 4, QImage.Format.Format_RGB32)
+        except Exception:
+            return None
+
+    def _coarse_near_locked(self, t: float) -> Optional[bytes]:
+        mm = self._mm
+        if mm is None or self._count <= 0:
+            return None
+        i0 = max(0, min(self._count - 1, int(round(t / self.INTERVAL))))
+        # Nearest filled frame, at most a few slots away.
+        for d in (0, 1, -1, 2, -2, 3, -3):
+            i = i0 + d
+            if 0 <= i < self._count and mm[self._flags_off + i]:
+                off = self._frames_off + i * self.frame_bytes
+                return mm[off:off + self.frame_bytes]
+        return None
+
+    # ---- Worker thread ----
+
+    def _open_sheet(self, duration: float) -> bool:
+        count = max(1, int(math.ceil(duration / self.INTERVAL)) + 1)
+        flags_len = ((count + 4095) // 4096) * 4096
+        size = self.HEADER + flags_len + count * self.frame_bytes
+        dst = self._disk().get(self._key) or self._disk().reserve(self._key, size)
+        if dst is None:
+            return False
+        fh = open(dst, "r+b")
+        if os.fstat(fh.fileno()).st_size != size:
+            fh.truncate(size)
+        mm = mmap.mmap(fh.fileno(), size)
+        header = json.dumps({"v": 1, "w": self.FRAME_W, "h": self.FRAME_H, "interval": self.INTERVAL,
+                             "count": count, "duration": duration}).encode("utf-8")
+        mm[0:len(header)] = header
+        with self._lock:
+            self._fh, self._mm = fh, mm
+            self._count = count
+            self._duration = duration
+            self._flags_off = self.HEADER
+            self._frames_off = self.HEADER + flags_len
+        return True
+
+    @staticmethod
+    def _bisection_order(n: int) -> List[int]:
+        """0, n-1, middle, quarter points, ... so coverage is even at every stage."""
+        order, seen = [], set()
+        step = 1 << max(0, (n - 1).bit_length())
+        while step >= 1:
+            for i in range(0, n, step):
+                if i not in seen:
+                    seen.add(i)
+                    order.append(i)
+            step //= 2
+        return order
+
+    def _grab(self, m, t: float) -> Optional[bytes]:
+        if not _headless_seek(m, max(0.0, min(t, self._duration - 0.5)), timeout=5.0, exact=True):
+            return None
+        raw = m.command('screenshot-raw', 'video')
+        if not isinstance(raw, dict):
+            return None
+        w, h, stride, data = int(raw["w"]), int(raw["h"]), int(raw["stride"]), raw["data"]
+        if w != self.FRAME_W or h != self.FRAME_H:
+            return None
+        row = self.FRAME_W * 4
+        if stride == row:
+            return bytes(data[: row * h])
+        return b"".join(data[y * stride: y * stride + row] for y in range(h))
+
+    def _next_refine(self) -> Optional[int]:
+        t = self._refine_target
+        if t is None:
+            return None
+        c = int(round(t / self.FINE_INTERVAL))
+        r = int(self.FINE_RADIUS / self.FINE_INTERVAL)
+        last = int(self._duration / self.FINE_INTERVAL)
+        with self._lock:
+            for d in range(0, r + 1):
+                for i in ((c + d, c - d) if d else (c,)):
+                    if 0 <= i <= last and i not in self._fine:
+                        return i
+        self._refine_target = None
+        return None
+
+    def _run(self):
+        m = None
+        try:
+            m = _make_headless_mpv(vd_lavc_threads=1, demuxer_max_bytes='8MiB', cache='no')
+            vf = (f"scale=w={self.FRAME_W}:h={self.FRAME_H}:force_original_aspect_ratio=decrease,"
+                  f"pad={self.FRAME_W}:{self.FRAME_H}:(ow-iw)/2:(oh-ih)/2,format=bgr0")
+            if self._stop.is_set() or not _headless_load(m, self._path, timeout=15.0, vf=vf):
+                return
+            duration = float(m.duration or 0.0)
+            if duration <= 0 or not self._open_sheet(duration):
+                return
+            pending = [i for i in self._bisection_order(self._count) if not self._mm[self._flags_off + i]]
+            while not self._stop.is_set():
+                fi = self._next_refine()
+                if fi is not None:
+                    data = self._grab(m, fi * self.FINE_INTERVAL)
+                    if data is not None:
+                        with self._lock:
+                            self._fine[fi] = data
+                            while len(self._fine) > self.FINE_MEMORY:
+                                self._fine.popitem(last=False)
+                            self.generation += 1
+                elif pending:
+                    i = pending.pop(0)
+                    data = self._grab(m, i * self.INTERVAL)
+                    if data is not None:
+                        off = self._frames_off + i * self.frame_bytes
+                        with self._lock:
+                            self._mm[off:off + self.frame_bytes] = data
+                            self._mm[self._flags_off + i] = 1
+                            self.generation += 1
+                else:
+                    self._wake.wait(1.0)
+                    self._wake.clear()
+                    continue
+                # Stay a background citizen next to the playback decoder.
+                time.sleep(self.PACE_S)
+        except Exception as e:
+            print(f"Seek preview error: {e}")
+        finally:
+            with self._lock:
+                mm, fh = self._mm, self._fh
+                self._mm, self._fh = None, None
+            for obj in (mm, fh):
+                try:
+                    if obj is not None:
+                        if obj is mm:
+                            obj.flush()
+                        obj.close()
+                except Exception:
+                    pass
+            try:
+                if m is not None:
+                    m.terminate()
+            except Exception:
+                pass
+
+
+_PROBE_VERSION = 1
+
+
+def _probe_track(t: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize one mpv track-list entry to the probe/metadata schema."""
+    out: Dict[str, Any] = {
+        "id": t.get("id"),
+        "type": t.get("type"),
+        "codec": t.get("codec"),
+        "lang": t.get("lang"),
+        "title": t.get("title"),
+        "default": bool(t.get("default")),
+        "forced": bool(t.get("forced")),
+        "external": bool(t.get("external")),
+    }
+    if t.get("type") == "video":
+        out["w"] = t.get("demux-w")
+        out["h"] = t.get("demux-h")
+        out["fps"] = t.get("demux-fps")
+        out["albumart"] = bool(t.get("albumart"))
+    elif t.get("type") == "audio":
+        out["channels"] = t.get("demux-channel-count")
+        out["samplerate"] = t.get("demux-samplerate")
+    return {k: v for k, v in out.items() if v is not None}
+
+
+def _probe_from_mpv(m) -> Dict[str, Any]:
+    """Collect metadata from an instance whose file has reached 'file-loaded'."""
+    def _prop(name, default=None):
+        try:
+            v = getattr(m, name.replace('-', '_'))
+            return default if v is None else v
+        except Exception:
+            return default
+
+    tracks = [_probe_track(t) for t in (_prop('track-list', []) or []) if isinstance(t, dict)]
+    video = next((t for t in tracks if t.get("type") == "video" and not t.get("albumart")), None)
+    chapters = []
+    for c in (_prop('chapter-list', []) or []):
+        try:
+            chapters.append({"time": float(c.get("time") or 0.0), "title": str(c.get("title") or "")})
+        except Exception:
+            continue
+    try:
+        duration = float(_prop('duration', 0.0) or 0.0)
+    except Exception:
+        duration = 0.0
+    return {
+        "v": _PROBE_VERSION,
+        "duration": duration,
+        "container": _prop('file-format', ""),
+        "video_codec": (video or {}).get("codec"),
+        "width": (video or {}).get("w"),
+        "height": (video or {}).get("h"),
+        "fps": (video or {}).get("fps"),
+        "audio": [t for t in tracks if t.get("type") == "audio"],
+        "subtitles": [t for t in tracks if t.get("type") == "sub"],
+        "tracks": tracks,
+        "chapters": chapters,
+    }
+
+
+def _probe_file(m, path: str, timeout: float = 15.0) -> Dict[str, Any]:
+    """Open `path` far enough to read metadata (no decoding) and return the probe dict."""
+    if not _headless_load(m, path, timeout=timeout, wait_event='file-loaded'):
+        raise RuntimeError("mpv could not open file")
+    try:
+        return _probe_from_mpv(m)
+    finally:
+        try:
+            m.command('stop')
+        except Exception:
+            pass
+
+
+class ProbeCache:
+    """Persistent media-metadata cache keyed by (path, size, mtime).
+
+    SQLite (WAL) so a 10k-file library stays a single indexed file; a hit
+    requires the stored size and mtime to match the file on disk, so rescans
+    only probe files that changed. Writes are batched like ResumeStore.
+    Records derived from playback rather than a probe carry ``partial`` and
+    are only served to callers that ask for them.
+    """
+
+    FLUSH_DELAY_S = 2.0
+    FLUSH_BATCH = 200
+
+    def __init__(self, path: Path):
+        self._path = Path(path)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._pending: Dict[str, Tuple[int, int, str]] = {}
+        self._flush_timer: Optional[threading.Timer] = None
+
+    def _conn_locked(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self._path), timeout=5.0, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS probe ("
+                " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, data TEXT, updated REAL)"
+            )
+            db.commit()
+            self._db = db
+        return self._db
+
+    @staticmethod
+    def _ident(path: str) -> Optional[Tuple[str, int, int]]:
+        try:
+            st = os.stat(path)
+            return os.path.normcase(os.path.abspath(str(path))), int(st.st_size), int(st.st_mtime_ns)
+        except Exception:
+            return None
+
+    def get(self, path: str, allow_partial: bool = False) -> Optional[Dict[str, Any]]:
+        ident = self._ident(path)
+        if ident is None:
+            return None
+        key, size, mtime = ident
+        with self._lock:
+            row = self._pending.get(key)
+            if row is None:
+                try:
+                    row = self._conn_locked().execute(
+                        "SELECT size, mtime_ns, data FROM probe WHERE path=?", (key,)
+                    ).fetchone()
+                except Exception as e:
+                    print(f"Probe cache read error: {e}")
+                    return None
+        if row is None or int(row[0]) != size or int(row[1]) != mtime:
+            return None
+        try:
+            data = json.loads(row[2])
+            if not isinstance(data, dict) or data.get("v") != _PROBE_VERSION:
+                return None
+            return data if (allow_partial or not data.get("partial")) else None
+        except Exception:
+            return None
+
+    def put(self, path: str, info: Dict[str, Any]):
+        ident = self._ident(path)
+        if ident is None:
+            return
+        key, size, mtime = ident
+        try:
+            blob = json.dumps(info, separators=(",", ":"), ensure_ascii=False)
+        except Exception:
+            return
+        flush_now = False
+        with self._lock:
+            self._pending[key] = (size, mtime, blob)
+            if len(self._pending) >= self.FLUSH_BATCH:
+                flush_now = True
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.FLUSH_DELAY_S, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        if flush_now:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            timer, self._flush_timer = self._flush_timer, None
+            if timer is not None:
+                try:
+                    timer.cancel()
+                except Exception:
+                    pass
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            now = time.time()
+            try:
+                db = self._conn_locked()
+                with db:
+                    db.executemany(
+                        "INSERT OR REPLACE INTO probe (path, size, mtime_ns, data, updated) VALUES (?, ?, ?, ?, ?)",
+                        [(k, sz, mt, blob, now) for k, (sz, mt, blob) in batch.items()],
+                    )
+            except Exception as e:
+                print(f"Probe cache write error: {e}")
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            try:
+                if self._db is not None:
+                    self._db.close()
+            except Exception:
+                pass
+            self._db = None
+
+
+_probe_cache: Optional[ProbeCache] = None
+_probe_cache_lock = threading.Lock()
+
+
+def _probe_cache_store() -> ProbeCache:
+    global _probe_cache
+    with _probe_cache_lock:
+        if _probe_cache is None:
+            _probe_cache = ProbeCache(_player_cache_dir("probe.db"))
+        return _probe_cache
+
+
+# ============================================================================
+# Local playback state (standalone launches without the library)
+# ============================================================================
+
+class ResumeStore:
+    """Indexed resume store for standalone launches (no --progress-file).
+
+    SQLite in WAL mode: one row per file keyed by normalized path, with the
+    content fingerprint indexed as a second key so renamed/moved files still
+    resume. A fingerprint match only counts as a rename when the old path is
+    gone, so separate copies of the same content keep their own positions.
+    Lookups are single index probes; writes land in an in-memory pending map
+    and are committed in one transaction per batch.
+    """
+
+    FLUSH_DELAY_S = 3.0
+    _COLUMNS = ("position", "duration", "finished", "aid", "sid", "sub_visibility", "audio_delay", "sub_delay", "speed", "updated")
+
+    def __init__(self, path: Path):
+        self._path = Path(path)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._flush_timer: Optional[threading.Timer] = None
+
+    @staticmethod
+    def path_key(path: str) -> str:
+        try:
+            return os.path.normcase(os.path.abspath(str(path)))
+        except Exception:
+            return str(path)
+
+    def _conn_locked(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self._path), timeout=2.0, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS resume ("
+                " path TEXT PRIMARY KEY, fp TEXT,"
+                " position REAL, duration REAL, finished INTEGER,"
+                " aid TEXT, sid TEXT, sub_visibility INTEGER,"
+                " audio_delay REAL, sub_delay REAL, speed REAL, updated REAL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS resume_fp ON resume(fp)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    def get(self, path: str, fingerprint: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Resume record by exact path, else by content fingerprint (renamed file)."""
+        key = self.path_key(path)
+        cols = ", ".join(self._COLUMNS)
+        with self._lock:
+            rec = self._pending.get(key)
+            if rec is not None:
+                return dict(rec)
+            if fingerprint:
+                for k, r in self._pending.items():
+                    if r.get("fp") == fingerprint and not os.path.exists(k):
+                        return dict(r)
+            try:
+                db = self._conn_locked()
+                row = db.execute(f"SELECT {cols} FROM resume WHERE path=?", (key,)).fetchone()
+                if row is None and fingerprint:
+                    rows = db.execute(
+                        f"SELECT path, {cols} FROM resume WHERE fp=? ORDER BY updated DESC",
+                        (fingerprint,),
+                    ).fetchall()
+                    row = next((r[1:] for r in rows if not os.path.exists(r[0])), None)
+            except Exception as e:
+                print(f"Resume store read error: {e}")
+                return None
+        if row is None:
+            return None
+        return dict(zip(self._COLUMNS, row))
+
+    def put(self, path: str, fingerprint: Optional[str], record: Dict[str, Any]):
+        key = self.path_key(path)
+        rec = {c: record.get(c) for c in self._COLUMNS}
+        rec["updated"] = float(record.get("updated") or time.time())
+        rec["fp"] = fingerprint or None
+        with self._lock:
+            self._pending[key] = rec
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.FLUSH_DELAY_S, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        with self._lock:
+            timer, self._flush_timer = self._flush_timer, None
+            if timer is not None:
+                try:
+                    timer.cancel()
+                except Exception:
+                    pass
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            try:
+                db = self._conn_locked()
+                with db:
+                    for key, r in batch.items():
+                        if r.get("fp"):
+                            # A moved/renamed file keeps a single row; other live copies keep theirs.
+                            stale = [p for (p,) in db.execute("SELECT path FROM resume WHERE fp=? AND path<>?", (r["fp"], key))
+                                     if not os.path.exists(p)]
+                            db.executemany("DELETE FROM resume WHERE path=?", [(p,) for p in stale])
+                    db.executemany(
+                        "INSERT OR REPLACE INTO resume (path, fp, position, duration, finished, aid, sid,"
+                        " sub_visibility, audio_delay, sub_delay, speed, updated)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [
+                            (key, r.get("fp"), r.get("position"), r.get("duration"),
+                             1 if r.get("finished") else 0, r.get("aid"), r.get("sid"),
+                             None if r.get("sub_visibility") is None else (1 if r.get("sub_visibility") else 0),
+                             r.get("audio_delay"), r.get("sub_delay"), r.get("speed"), r.get("updated"))
+                            for key, r in batch.items()
+                        ],
+                    )
+            except Exception as e:
+                print(f"Resume store write error: {e}")
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            try:
+                if self._db is not None:
+                    self._db.close()
+            except Exception:
+                pass
+            self._db = None
+
+
+class WatchHistoryLedger:
+    """Append-only watch history with background compaction.
+
+    Events (session start/end, watched segments, speed changes, progress
+    phases) are appended as compact JSON lines to a small active segment file
+    (``ledger-NNNNNN.jsonl``). Lines are flushed immediately but fsync'd at most
+    every FSYNC_INTERVAL_S and at session end. Full segments are rotated and
+    folded by a background thread into per-video summaries (``summary.json``),
+    then deleted, so no file is ever rewritten from the start and queries only
+    touch the summaries plus one bounded segment. Several player processes can
+    share the directory: each writer owns its segment through an O_EXCL
+    ``.owner`` file and compaction never folds an owned segment; compaction
+    itself is serialized by an O_EXCL lock file, and each process reloads its
+    view from the new summary afterwards.
+    """
+
+    SEGMENT_MAX_BYTES = 1024 * 1024
+    FSYNC_INTERVAL_S = 10.0
+    COMPACT_LOCK_STALE_S = 120.0
+    OWNER_STALE_S = 6 * 3600.0  # an owner file this old belongs to a crashed process
+    VERSION = 1
+
+    def __init__(self, directory: Path):
+        self._dir = Path(directory)
+        self._lock = threading.RLock()
+        self._fh = None
+        self._seg_no = 0
+        self._last_fsync = 0.0
+        self._summary: Optional[Dict[str, Any]] = None
+        self._sessions: Dict[str, str] = {}
+        self._compacting = False
+        self._owner_token = f"{os.getpid()}:{id(self)}:{time.time()}".encode("ascii")
+
+    # ---- Writing ----
+
+    def append(self, event: Dict[str, Any]):
+        ev = dict(event)
+        ev.setdefault("t", round(time.time(), 3))
+        line = json.dumps(ev, separators=(",", ":"), ensure_ascii=False) + "\n"
+        with self._lock:
+            try:
+                self._ensure_loaded_locked()
+                if self._fh is not None and not self._holds_segment():
+                    # Our segment was taken over as stale and folded: continue in a new one.
+                    self._release_locked()
+                    self._summary = None
+                    self._ensure_loaded_locked()
+                fh = self._open_locked()
+                try:
+                    os.utime(self._owner_path(self._seg_no))
+                except Exception:
+                    pass
+                fh.write(line)
+                fh.flush()
+                now = time.monotonic()
+                if ev.get("e") == "end" or (now - self._last_fsync) >= self.FSYNC_INTERVAL_S:
+                    os.fsync(fh.fileno())
+                    self._last_fsync = now
+                self._fold(self._summary, ev, self._sessions)
+                rotate = fh.tell() >= self.SEGMENT_MAX_BYTES
+            except Exception as e:
+                print(f"Watch history write error: {e}")
+                return
+            if rotate:
+                self._rotate_locked()
+        if rotate:
+            self.compact_async()
+
+    def close(self):
+        with self._lock:
+            self._release_locked()
+
+    def _release_locked(self):
+        """Close the active segment and give up its ownership so it can be folded."""
+        if self._fh is None:
+            return
+        try:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._fh.close()
+        except Exception:
+            pass
+        self._fh = None
+        try:
+            if self._holds_segment():
+                self._owner_path(self._seg_no).unlink()
+        except Exception:
+            pass
+
+    def _holds_segment(self) -> bool:
+        """True while the active segment's owner file is still ours."""
+        try:
+            with open(self._owner_path(self._seg_no), "rb") as f:
+                return f.read() == self._owner_token
+        except Exception:
+            return False
+
+    def _segment_path(self, n: int) -> Path:
+        return self._dir / f"ledger-{n:06d}.jsonl"
+
+    def _owner_path(self, n: int) -> Path:
+        return self._dir / f"ledger-{n:06d}.owner"
+
+    def _owned(self, n: int) -> bool:
+        """True while a live writer holds segment `n`."""
+        try:
+            return time.time() - self._owner_path(n).stat().st_mtime < self.OWNER_STALE_S
+        except Exception:
+            return False
+
+    @staticmethod
+    def _is_folded(summary: Dict[str, Any], n: int) -> bool:
+        return n <= int(summary.get("folded_through", 0)) or n in set(summary.get("folded_extra") or [])
+
+    def _segments(self) -> List[int]:
+        out = []
+        try:
+            for f in self._dir.glob("ledger-*.jsonl"):
+                try:
+                    out.append(int(f.stem.split("-", 1)[1]))
+                except Exception:
+                    pass
+        except Exception:
+            pass
+        return sorted(out)
+
+    def _open_locked(self):
+        """Claim a fresh segment number (never one another process is writing) and open it."""
+        if self._fh is None:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            # The on-disk summary may have folded further than our view: never reuse a folded number.
+            n = self._seg_no
+            for summary in (self._summary or {}, read_json(self._dir / "summary.json", None) or {}):
+                n = max([n, int(summary.get("folded_through", 0))] + [int(x) for x in summary.get("folded_extra") or []])
+            n = max([n] + self._segments()) + 1
+            while True:
+                try:
+                    fd = os.open(str(self._owner_path(n)), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                    os.write(fd, self._owner_token)
+                    os.close(fd)
+                    break
+                except FileExistsError:
+                    n += 1
+            self._seg_no = n
+            self._fh = open(self._segment_path(n), "a", encoding="utf-8")
+        return self._fh
+
+    def _rotate_locked(self):
+        self._release_locked()
+        try:
+            self._open_locked()
+        except Exception as e:
+            print(f"Watch history rotate error: {e}")
+
+    # ---- Summaries ----
+
+    @staticmethod
+    def _empty_summary() -> Dict[str, Any]:
+        return {"version": WatchHistoryLedger.VERSION, "folded_through": 0, "videos": {}}
+
+    @staticmethod
+    def _fold(summary: Dict[str, Any], ev: Dict[str, Any], sessions: Dict[str, str]):
+        """Apply one ledger event to the per-video summaries."""
+        kind = ev.get("e")
+        sid = str(ev.get("s") or "")
+        key = ev.get("k") or sessions.get(sid)
+        if not key:
+            return
+        videos = summary.setdefault("videos", {})
+        v = videos.get(key)
+        if v is None:
+            v = videos[key] = {"sessions": 0, "watched": 0.0, "first": ev.get("t"), "last": ev.get("t")}
+        v["last"] = max(float(v.get("last") or 0.0), float(ev.get("t") or 0.0))
+        if kind == "start":
+            sessions[sid] = key
+            v["sessions"] = int(v.get("sessions", 0)) + 1
+            for f in ("path", "title", "video_id", "show_id", "show_root", "fp"):
+                if ev.get(f):
+                    v[f] = ev.get(f)
+        elif kind == "seg":
+            try:
+                v["watched"] = float(v.get("watched", 0.0)) + max(0.0, float(ev.get("w", 0.0)))
+            except Exception:
+                pass
+        elif kind == "end":
+            sessions.pop(sid, None)
+            for src, dst in (("pos", "position"), ("dur", "duration"), ("fp", "fp")):
+                if ev.get(src) is not None:
+                    v[dst] = ev.get(src)
+            try:
+                v["max_position"] = max(float(v.get("max_position", 0.0)), float(ev.get("max", 0.0) or 0.0))
+            except Exception:
+                pass
+            if ev.get("fin"):
+                v["finished"] = True
+
+    @staticmethod
+    def _replay(path: Path, summary: Dict[str, Any], sessions: Dict[str, str]):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        WatchHistoryLedger._fold(summary, json.loads(line), sessions)
+                    except Exception:
+                        # Torn final line after a crash: skip it.
+                        continue
+        except Exception:
+            pass
+
+    def _ensure_loaded_locked(self):
+        if self._summary is not None:
+            return
+        data = read_json(self._dir / "summary.json", None)
+        if not isinstance(data, dict) or data.get("version") != self.VERSION:
+            data = self._empty_summary()
+        self._summary = data
+        self._sessions = dict(data.get("open_sessions") or {})
+        for n in self._segments():
+            if not self._is_folded(data, n):
+                self._replay(self._segment_path(n), self._summary, self._sessions)
+
+    def compact_async(self):
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+        threading.Thread(target=self._compact, daemon=True).start()
+
+    def _claim_compaction(self) -> bool:
+        """Take the cross-process compaction lock (a stale one from a crashed process is broken)."""
+        lock = self._dir / "compact.lock"
+        for _attempt in range(2):
+            try:
+                fd = os.open(str(lock), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode("ascii"))
+                os.close(fd)
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - lock.stat().st_mtime < self.COMPACT_LOCK_STALE_S:
+                        return False
+                    lock.unlink()
+                except Exception:
+                    return False
+            except Exception:
+                return False
+        return False
+
+    def _compact(self):
+        """Fold segments no writer holds into summary.json and delete them.
+
+        Owned segments are skipped, so folding can leave gaps: those numbers go
+        to ``folded_extra`` until the watermark ``folded_through`` reaches them.
+        """
+        claimed = False
+        try:
+            claimed = self._claim_compaction()
+            if not claimed:
+                return
+            base = read_json(self._dir / "summary.json", None)
+            if not isinstance(base, dict) or base.get("version") != self.VERSION:
+                base = self._empty_summary()
+            sessions = dict(base.get("open_sessions") or {})
+            closed = [n for n in self._segments() if not self._is_folded(base, n) and not self._owned(n)]
+            if not closed:
+                return
+            for n in closed:
+                self._replay(self._segment_path(n), base, sessions)
+            done = set(int(x) for x in base.get("folded_extra") or []) | set(closed)
+            existing = set(self._segments())
+            mark = int(base.get("folded_through", 0))
+            top = max(done | existing)
+            # Numbers with no segment and no live owner (a claim that never wrote) don't hold the mark back.
+            while mark < top and (mark + 1 in done or (mark + 1 not in existing and not self._owned(mark + 1))):
+                mark += 1
+            base["folded_through"] = mark
+            base["folded_extra"] = sorted(n for n in done if n > mark)
+            base["open_sessions"] = sessions
+            atomic_write_json(self._dir / "summary.json", base)
+            for n in closed:
+                for path in (self._segment_path(n), self._owner_path(n)):
+                    try:
+                        path.unlink()
+                    except Exception:
+                        pass
+            with self._lock:
+                # Rebuild from the new summary plus the remaining segments, so the folded
+                # set is current and other processes' folded events are picked up.
+                self._summary = None
+                self._ensure_loaded_locked()
+        except Exception as e:
+            print(f"Watch history compaction error: {e}")
+        finally:
+            if claimed:
+                try:
+                    (self._dir / "compact.lock").unlink()
+                except Exception:
+                    pass
+            with self._lock:
+                self._compacting = False
+
+    # ---- Queries ----
+
+    def videos(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self._ensure_loaded_locked()
+            return {k: dict(v) for k, v in (self._summary.get("videos") or {}).items()}
+
+    def most_recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recently watched videos, newest first."""
+        items = [dict(v, key=k) for k, v in self.videos().items()]
+        items.sort(key=lambda v: float(v.get("last") or 0.0), reverse=True)
+        return items[: max(0, int(limit))]
+
+    def watch_time_by_show(self) -> Dict[str, float]:
+        """Total watched seconds per show (show id, else show folder)."""
+        out: Dict[str, float] = {}
+        for v in self.videos().values():
+            show = str(v.get("show_id") or v.get("show_root") or "")
+            if show:
+                out[show] = out.get(show, 0.0) + float(v.get("watched") or 0.0)
+        return out
+
+
+# ============================================================================
+# Build 13 UI Components
+# ============================================================================
+
+class VolumeHUD(QWidget):
+    """Smooth animated volume HUD overlay."""
+    
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.Tool)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents, True)
+        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground, True)
+        
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(14, 10, 14, 10)
+        layout.setSpacing(10)
+
+        self.symbol_label = QLabel("◕")
+        self.symbol_label.setStyleSheet(
+            "font-size: 18px; color: rgba(255, 255, 255, 0.95); font-family: 'Segoe UI', 'Tahoma', sans-serif;"
+        )
+        layout.addWidget(self.symbol_label)
+
+        self.bar_container = QWidget()
+        self.bar_container.setFixedSize(140, 10)
+        self.bar_container.setStyleSheet(
+            "background: rgba(0, 0, 0, 0.35); border: 1px solid rgba(255, 255, 255, 0.35);"
+        )
+        self.bar = QWidget(self.bar_container)
+        self.bar.setStyleSheet("background: rgba(255, 255, 255, 0.9);")
+        layout.addWidget(self.bar_container)
+
+        self.percent_label = QLabel("100%")
+        self.percent_label.setStyleSheet(
+            "font-size: 13px; font-weight: bold; color: rgba(255, 255, 255, 0.95);"
+            "font-family: 'Segoe UI', 'Tahoma', sans-serif;"
+        )
+        layout.addWidget(self.percent_label)
+
+        self.setStyleSheet("""
+            QWidget {
+                background: rgba(0, 0, 0, 0.68);
+                border-radius: 4px;
+                border: 2px solid rgba(255, 255, 255, 0.35);
+            }
+        """)
+        
+        self.opacity_effect = QGraphicsOpacityEffect(self)
+        self.setGraphicsEffect(self.opacity_effect)
+        self.opacity_effect.setOpacity(0.0)
+        
+        self.fade_anim = QPropertyAnimation(self.opacity_effect, b"opacity")
+        self.fade_anim.setEasingCurve(QEasingCurve.Type.InOutQuad)
+        
+        self.hide_timer = QTimer(self)
+        self.hide_timer.setSingleShot(True)
+        self.hide_timer.timeout.connect(self._fade_out)
+        
+        self.hide()
+    
+    def show_volume(self, volume: int):
+        volume = max(0, min(100, volume))
+        self.percent_label.setText(f"{volume}%")
+        bar_width = int(140 * volume / 100)
+        self.bar.setGeometry(0, 0, bar_width, 10)
+        
+        if volume == 0:
+            self.symbol_label.setText("⊘")
+        elif volume < 33:
+            self.symbol_label.setText("◔")
+        elif volume < 66:
+            self.symbol_label.setText("◑")
+        else:
+            self.symbol_label.setText("◕")
+        
+        parent = self.parent()
+        if parent:
+            self.adjustSize()
+            x = (parent.width() - self.width()) // 2
+            y = parent.height() // 3
+            self.move(x, y)
+        
+        self.show()
+        self.fade_anim.stop()
+        self.fade_anim.setDuration(150)
+        self.fade_anim.setStartValue(self.opacity_effect.opacity())
+        self.fade_anim.setEndValue(1.0)
+        self.fade_anim.start()
+        
+        self.hide_timer.stop()
+        self.hide_timer.start(1000)
+    
+    def _fade_out(self):
+        self.fade_anim.stop()
+        self.fade_anim.setDuration(200)
+        self.fade_anim.setStartValue(self.opacity_effect.opacity())
+        self.fade_anim.setEndValue(0.0)
+        self.fade_anim.finished.connect(self.hide)
+        self.fade_anim.start()
+
+
+class MpvRenderHost(QWidget):
+    """
+    Build 13 Render Host - Non-interactive surface with intentional event routing.
+    
+    Equivalent of #mpvHost in Build 110. Routes specific events only:
+    - Wheel for volume
+    - Right-click for menu
+    - Mouse movement for edge reveal
+    """
+    
+    wheel_volume_signal = Signal(int)
+    right_click_signal = Signal(QPoint)
+    mouse_move_signal = Signal(QPoint)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMouseTracking(True)
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.setStyleSheet("background-color: black;")
+        self._mpv_instance = None
+    
+        # Build 20.5: Click tracking for double-click detection
+        self._left_click_last_t = None
+    def attach_mpv(self, mpv_instance):
+        try:
+            self._mpv_instance = mpv_instance
+            self._mpv_instance.wid = str(int(self.winId()))
+        except Exception as e:
+            print(f"MpvRenderHost attach_mpv error: {e}")
+    
+    def wheelEvent(self, event: QWheelEvent):
+        try:
+            delta = event.angleDelta().y()
+            self.wheel_volume_signal.emit(delta)
+        except Exception:
+            pass
+        event.accept()
+    
+    def mousePressEvent(self, event):
+        try:
+            # Right click: context menu (preserve existing behavior)
+            if event.button() == Qt.MouseButton.RightButton:
+                global_pos = self.mapToGlobal(event.pos())
+                self.right_click_signal.emit(global_pos)
+                event.accept()
+                return
+
+            # Left click: dismiss overlays (if any) and keep focus.
+            # IMPORTANT: do NOT play/pause on click (prevents double-click causing a single-click toggle).
+            if event.button() == Qt.MouseButton.LeftButton:
+                w = self.window()
+                try:
+                    if w and hasattr(w, "_dismiss_overlays_on_click") and w._dismiss_overlays_on_click():
+                        event.accept()
+                        return
+                except Exception:
+                    pass
+
+                # Keep hotkeys working after click
+                try:
+                    if w:
+                        w.activateWindow()
+                        w.raise_()
+                        w.setFocus(Qt.FocusReason.ActiveWindowFocusReason)
+                        w.grabKeyboard()
+                except Exception:
+                    pass
+                try:
+                    self.setFocus(Qt.FocusReason.ActiveWindowFocusReason)
+                except Exception:
+                    pass
+
+                event.accept()
+                return
+        except Exception:
+            pass
+        event.ignore()
+
+
+
+    
+
+    def mouseDoubleClickEvent(self, event):
+        """Double-click toggles fullscreen (left button only)."""
+        try:
+            if event.button() == Qt.MouseButton.LeftButton:
+                # Build 20.5: Clear click timestamp so double-click is clean
+                try:
+                    self._left_click_last_t = None
+                except Exception:
+                    pass
+                w = self.window()
+                if w and hasattr(w, '_toggle_fullscreen'):
+                    w._toggle_fullscreen()
+                # Keep keys/hotkeys reliable after toggling
+                try:
+                    if w:
+                        w.activateWindow()
+                        w.raise_()
+                        w.setFocus(Qt.FocusReason.ActiveWindowFocusReason)
+                        w.grabKeyboard()
+                except Exception:
+                    pass
+                try:
+                    self.setFocus(Qt.FocusReason.ActiveWindowFocusReason)
+                except Exception:
+                    pass
+                event.accept()
+                return
+        except Exception:
+            pass
+        event.ignore()
+    def mouseMoveEvent(self, event):
+        try:
+            w = self.window()
+            if w and hasattr(w, "_on_mouse_activity"):
+                w._on_mouse_activity(event.pos())
+            elif w and hasattr(w, "_handle_mouse_move_for_hud"):
+                # Fallback
+                w._handle_mouse_move_for_hud(event.pos())
+        except Exception:
+            pass
+        event.accept()
 
 
 
@@ -799,6 +4949,36 @@ class TopStripWidget(QWidget):
         except Exception:
             pass
 
+class SeekPreviewPopup(QWidget):
+    """Frame preview shown above the scrubber while hovering (tool window over the video)."""
+
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.Tool)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents, True)
+        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground, True)
+        self.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating, True)
+        self._pixmap: Optional[QPixmap] = None
+
+    def set_image(self, img: QImage):
+        self._pixmap = QPixmap.fromImage(img)
+        w, h = self._pixmap.width() + 4, self._pixmap.height() + 4
+        if self.width() != w or self.height() != h:
+            self.resize(w, h)
+        self.update()
+
+    def paintEvent(self, event):
+        if self._pixmap is None:
+            return
+        p = QPainter(self)
+        p.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+        p.setPen(QPen(QColor(255, 255, 255, 40), 1))
+        p.setBrush(QColor(12, 12, 12, 220))
+        p.drawRoundedRect(self.rect().adjusted(0, 0, -1, -1), 6, 6)
+        p.drawPixmap(2, 2, self._pixmap)
+        p.end()
+
+
 class SeekSlider(QSlider):
     """Thin scrubber slider with a hover time bubble + reliable click/drag seeking."""
 
@@ -826,14 +5006,38 @@ class SeekSlider(QSlider):
         self._bubble.hide()
         self.setMouseTracking(True)
 
+        # Faint loudness envelope behind the groove (pixmap rebuilt only on resize/new data)
+        self._waveform = None
+        self._wave_pixmap: Optional[QPixmap] = None
+        self._wave_key = None
+
+        # Hover preview frames (provider set by the player once the file's sprites exist)
+        self._preview_source: Optional[SeekPreviewSprites] = None
+        self._preview: Optional[SeekPreviewPopup] = None
+        self._preview_slot = None
+        self._preview_at: Optional[Tuple[int, float, int]] = None
+
     # ---- Public API ----
 
+    def set_preview_source(self, source: Optional["SeekPreviewSprites"]):
+        self._preview_source = source
+        self._preview_slot = None
+        if source is None:
+            self._hide_preview()
+
     def set_duration(self, dur: Optional[float]):
         try:
             self._duration = float(dur) if dur is not None else None
         except Exception:
             self._duration = None
 
+    def set_waveform(self, bins):
+        """Loudness envelope (0..1 per bin across the whole file), or None to clear."""
+        self._waveform = bins
+        self._wave_pixmap = None
+        self._wave_key = None
+        self.update()
+
     def set_chapters(self, chapters: Optional[List[float]]):
         """Set chapter times (seconds) to paint small markers on the scrubber."""
         try:
@@ -901,9 +5105,61 @@ class SeekSlider(QSlider):
             by = -self._bubble.height() - 10
             self._bubble.move(bx, by)
             self._bubble.show()
+            self._show_preview(x, t, by)
         except Exception:
             self._bubble.hide()
 
+    def _show_preview(self, x: int, t: float, bubble_y: int):
+        """Hover frame: a slice copy from the mapped sprite sheet, only when the frame changes.
+
+        The cached slot carries the sheet generation, so a refined frame that
+        lands while the pointer rests in one slot replaces the coarse one.
+        """
+        src = self._preview_source
+        if src is None:
+            return
+        try:
+            src.request_refine(t)
+            slot = (int(round(t / src.FINE_INTERVAL)), src.generation)
+            if self._preview_at is None:
+                QTimer.singleShot(250, self, self._recheck_preview)
+            self._preview_at = (x, t, bubble_y)
+            if slot != self._preview_slot or self._preview is None or not self._preview.isVisible():
+                img = src.frame_at(t)
+                if img is None:
+                    self._hide_preview()
+                    return
+                if self._preview is None:
+                    self._preview = SeekPreviewPopup(self.window())
+                self._preview.set_image(img)
+                self._preview_slot = slot
+            pw, ph = self._preview.width(), self._preview.height()
+            g = self.mapToGlobal(QPoint(int(x - pw / 2), bubble_y - ph - 6))
+            left = self.mapToGlobal(QPoint(0, 0)).x()
+            gx = max(left, min(left + self.width() - pw, g.x()))
+            self._preview.move(gx, g.y())
+            if not self._preview.isVisible():
+                self._preview.show()
+        except Exception:
+            self._hide_preview()
+
+    def _recheck_preview(self):
+        """While the preview is up, pick up frames that arrived since it was drawn."""
+        at, self._preview_at = self._preview_at, None
+        try:
+            if at is not None and self._preview is not None and self._preview.isVisible():
+                self._show_preview(*at)
+        except Exception:
+            pass
+
+    def _hide_preview(self):
+        self._preview_at = None
+        try:
+            if self._preview is not None:
+                self._preview.hide()
+        except Exception:
+            pass
+
     def _seek_from_x(self, x: int):
         """Update slider value from x and emit fraction."""
         val = self._value_for_x(x)
@@ -915,7 +5171,44 @@ class SeekSlider(QSlider):
 
     # ---- Painting ----
 
+    def _waveform_pixmap(self, groove: QRect) -> Optional[QPixmap]:
+        dpr = float(self.devicePixelRatioF() or 1.0)
+        key = (groove.width(), self.height(), dpr)
+        if self._wave_pixmap is not None and self._wave_key == key:
+            return self._wave_pixmap
+        bins = self._waveform
+        cols = int(groove.width() * dpr)
+        rows = int(self.height() * dpr)
+        if np is None or bins is None or cols <= 2 or rows <= 2:
+            return None
+        vals = np.asarray(bins, dtype=np.float32)
+        edges = np.linspace(0, len(vals), cols + 1).astype(np.int64)
+        vals = np.maximum.reduceat(vals, np.minimum(edges[:-1], len(vals) - 1))
+        pm = QPixmap(cols, rows)
+        pm.fill(Qt.GlobalColor.transparent)
+        p = QPainter(pm)
+        p.setPen(QPen(QColor(255, 255, 255, 34), 1))
+        mid = rows / 2.0
+        half = mid - 1.0
+        for x, v in enumerate(vals.tolist()):
+            a = max(0.5, v * half)
+            p.drawLine(x, int(mid - a), x, int(mid + a))
+        p.end()
+        pm.setDevicePixelRatio(dpr)
+        self._wave_pixmap, self._wave_key = pm, key
+        return pm
+
     def paintEvent(self, event):
+        if self._waveform is not None:
+            try:
+                groove = self._groove_rect()
+                pm = self._waveform_pixmap(groove)
+                if pm is not None:
+                    p = QPainter(self)
+                    p.drawPixmap(groove.left(), 0, pm)
+                    p.end()
+            except Exception:
+                pass
         super().paintEvent(event)
         try:
             if not self._duration or self._duration <= 0:
@@ -1035,10 +5328,15 @@ class SeekSlider(QSlider):
         try:
             if not self._dragging:
                 self._bubble.hide()
+                self._hide_preview()
         except Exception:
             pass
         super().leaveEvent(event)
 
+    def hideEvent(self, event):
+        self._hide_preview()
+        super().hideEvent(event)
+
 
 class TrackPopover(QFrame):
     """Small in-HUD popover for selecting audio/subtitle tracks (non-modal; does not block scrubbing)."""
@@ -2435,133 +6733,1129 @@ class TracksDrawer(SlideDrawer):
                 pass
 
 
-class PlaylistDrawer(SlideDrawer):
-    """Embedded-style playlist drawer (right side)."""
+class PlaylistSearchIndex:
+    """Token + trigram index over playlist names for as-you-type search.
+
+    Entries are keyed by path, so when the playlist changes only the added and
+    removed paths touch the posting sets; rows are re-mapped with one dict pass.
+    New entries can be indexed in small steps (`begin_sync` + `sync_step`) so a
+    10k-entry folder never blocks a frame.
+    Queries intersect every term's candidate set before scoring anything, and
+    fall back to a deletion-neighbourhood token lookup (typos and transposed
+    letters) plus trigram overlap for typo-tolerant matches.
+    """
+
+    def __init__(self):
+        self._entry_for_path: Dict[str, int] = {}
+        self._text: Dict[int, str] = {}
+        self._episode: Dict[int, Optional[int]] = {}
+        self._trigrams: Dict[str, set] = {}
+        self._tokens: Dict[str, set] = {}
+        self._deletes: Dict[str, set] = {}
+        self._sorted_tokens: Optional[List[str]] = None
+        self._row_for_entry: Dict[int, int] = {}
+        self._next_entry = 0
+        self._pending: Optional[List[str]] = None
+        self._wanted: List[str] = []
+
+    # ---- Index maintenance ----
+
+    @staticmethod
+    def _grams(text: str) -> set:
+        padded = f" {text} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    @staticmethod
+    def _norm_token(tok: str) -> str:
+        # "05" and "5" should match the same episode token.
+        if tok.isdigit():
+            return tok.lstrip("0") or "0"
+        return tok
+
+    @staticmethod
+    def _variants(tok: str) -> set:
+        """The token and every one-letter deletion of it (its deletion neighbourhood)."""
+        return {tok} | {tok[:i] + tok[i + 1:] for i in range(len(tok))}
+
+    @staticmethod
+    def _edit_distance(a: str, b: str) -> int:
+        """Optimal-string-alignment distance: edits plus adjacent transpositions ("shwo" -> "show" is 1)."""
+        prev2: List[int] = []
+        prev = list(range(len(b) + 1))
+        for i in range(1, len(a) + 1):
+            cur = [i] + [0] * len(b)
+            for j in range(1, len(b) + 1):
+                cost = 0 if a[i - 1] == b[j - 1] else 1
+                cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+                if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                    cur[j] = min(cur[j], prev2[j - 2] + 1)
+            prev2, prev = prev, cur
+        return prev[-1]
+
+    def _token_added(self, tok: str) -> None:
+        self._sorted_tokens = None
+        if len(tok) >= 3 and not tok.isdigit():
+            for v in self._variants(tok):
+                self._deletes.setdefault(v, set()).add(tok)
+
+    def _token_removed(self, tok: str) -> None:
+        self._sorted_tokens = None
+        if len(tok) >= 3 and not tok.isdigit():
+            for v in self._variants(tok):
+                bucket = self._deletes.get(v)
+                if bucket is not None:
+                    bucket.discard(tok)
+                    if not bucket:
+                        del self._deletes[v]
+
+    def _add(self, path: str) -> int:
+        eid = self._next_entry
+        self._next_entry += 1
+        text = _normalize_search_text(os.path.basename(path) or path)
+        ep = _episode_number_hint(path)
+        self._entry_for_path[path] = eid
+        self._text[eid] = text
+        self._episode[eid] = ep
+        for g in self._grams(text):
+            self._trigrams.setdefault(g, set()).add(eid)
+        toks = {self._norm_token(t) for t in text.split(" ") if t}
+        if ep is not None:
+            toks.update({str(ep), f"e{ep}", f"ep{ep}"})
+        for t in toks:
+            bucket = self._tokens.get(t)
+            if bucket is None:
+                bucket = self._tokens[t] = set()
+                self._token_added(t)
+            bucket.add(eid)
+        return eid
+
+    def _remove(self, path: str) -> None:
+        eid = self._entry_for_path.pop(path, None)
+        if eid is None:
+            return
+        text = self._text.pop(eid, "")
+        ep = self._episode.pop(eid, None)
+        for g in self._grams(text):
+            bucket = self._trigrams.get(g)
+            if bucket is not None:
+                bucket.discard(eid)
+                if not bucket:
+                    del self._trigrams[g]
+        toks = {self._norm_token(t) for t in text.split(" ") if t}
+        if ep is not None:
+            toks.update({str(ep), f"e{ep}", f"ep{ep}"})
+        for t in toks:
+            bucket = self._tokens.get(t)
+            if bucket is not None:
+                bucket.discard(eid)
+                if not bucket:
+                    del self._tokens[t]
+                    self._token_removed(t)
+
+    def begin_sync(self, paths: List[str]) -> None:
+        """Start bringing the index in line with `paths` (removals are applied immediately)."""
+        wanted = [str(p) for p in (paths or [])]
+        wanted_set = set(wanted)
+        for gone in [p for p in self._entry_for_path if p not in wanted_set]:
+            self._remove(gone)
+        self._wanted = wanted
+        self._pending = [p for p in wanted if p not in self._entry_for_path]
+        self._row_for_entry = {}
+
+    def sync_step(self, max_items: int = 400) -> bool:
+        """Index up to `max_items` pending paths; returns True once the index is current."""
+        pending = getattr(self, "_pending", None)
+        if pending is None:
+            return True
+        n = max(1, int(max_items))
+        for p in pending[:n]:
+            if p not in self._entry_for_path:
+                self._add(p)
+        del pending[:n]
+        if pending:
+            return False
+        row_for_entry: Dict[int, int] = {}
+        for row, p in enumerate(getattr(self, "_wanted", [])):
+            eid = self._entry_for_path.get(p)
+            if eid is not None:
+                row_for_entry.setdefault(eid, row)
+        self._row_for_entry = row_for_entry
+        self._pending = None
+        self._wanted = []
+        return True
+
+    def sync(self, paths: List[str]) -> None:
+        """Bring the index in line with `paths`, touching only added/removed entries."""
+        self.begin_sync(paths)
+        while not self.sync_step(1 << 30):
+            pass
+
+    # ---- Query ----
+
+    def search(self, query: str, limit: int = 500) -> List[int]:
+        """Return playlist rows matching `query`, best first."""
+        q = _normalize_search_text(query)
+        if not q:
+            return []
+        terms = list(dict.fromkeys(t for t in q.split(" ") if t))
+
+        # Narrow with set intersections first (C speed); score only the survivors.
+        plans = []
+        cand: Optional[set] = None
+        for term in sorted(terms, key=len, reverse=True):
+            plan = self._term_candidates(term, cand)
+            cand = plan[-1] if cand is None else (cand & plan[-1])
+            if not cand:
+                return []
+            plans.append((term,) + plan)
+
+        scores = dict.fromkeys(cand, 0.0)
+        for term, exact, prefix, fuzzy, _all in plans:
+            rest = set(scores)
+            for weight, group in [(3.0, exact), (2.0, prefix)] + fuzzy:
+                hit = rest & group
+                for eid in hit:
+                    scores[eid] += weight
+                rest -= hit
+            for eid in rest:
+                if term in self._text.get(eid, ""):
+                    scores[eid] += 2.0
+                else:
+                    # Trigram false positive (grams present, but not contiguous).
+                    del scores[eid]
+        rows = []
+        for eid, sc in scores.items():
+            row = self._row_for_entry.get(eid)
+            if row is not None:
+                rows.append((-sc, row))
+        return [row for _sc, row in heapq.nsmallest(max(1, int(limit)), rows)]
+
+    def _prefix_tokens(self, prefix: str) -> List[str]:
+        toks = self._sorted_tokens
+        if toks is None:
+            toks = self._sorted_tokens = sorted(self._tokens)
+        i = bisect.bisect_left(toks, prefix)
+        out = []
+        while i < len(toks) and toks[i].startswith(prefix):
+            out.append(toks[i])
+            i += 1
+        return out
+
+    def _term_candidates(self, term: str, within: Optional[set]) -> Tuple[set, set, List[Tuple[float, set]], set]:
+        """(exact-token hits, token-prefix hits, [(fuzzy score, entries)] best first, all candidates) for one term."""
+        ntok = self._norm_token(term)
+        exact = self._tokens.get(ntok, set())
+        prefix: set = set()
+        fuzzy: List[Tuple[float, set]] = []
+
+        if len(term) < 3:
+            # Too short for trigrams: token-prefix match via the sorted token list.
+            for tok in self._prefix_tokens(term):
+                if tok != ntok:
+                    prefix |= self._tokens[tok]
+            return exact, prefix, fuzzy, exact | prefix
+
+        grams = self._grams(term)
+        # Drop the padded boundary grams; the term may sit mid-word.
+        inner = {g for g in grams if " " not in g} or grams
+        postings = sorted((self._trigrams.get(g, set()) for g in inner), key=len)
+        substr = set(postings[0]).intersection(*postings[1:]) if postings and postings[0] else set()
+        if exact or substr:
+            return exact, prefix, fuzzy, exact | substr
+
+        # Fuzzy fallback: tokens one edit/transposition away (two for long terms),
+        # else entries sharing at least half of the term's trigrams.
+        limit = 2 if len(term) >= 7 else 1
+        near = set()
+        for v in self._variants(term):
+            near |= self._deletes.get(v, set())
+        for tok in near:
+            d = self._edit_distance(term, tok)
+            if d <= limit:
+                fuzzy.append((1.5 - 0.25 * d, self._tokens.get(tok, set())))
+        if not fuzzy:
+            counts: Dict[int, int] = {}
+            for g in inner:
+                for eid in self._trigrams.get(g, ()):
+                    if within is None or eid in within:
+                        counts[eid] = counts.get(eid, 0) + 1
+            need = max(1, (len(inner) + 1) // 2)
+            by_count: Dict[int, set] = {}
+            for eid, c in counts.items():
+                if c >= need:
+                    by_count.setdefault(c, set()).add(eid)
+            fuzzy = [(c / float(len(inner)), grp) for c, grp in by_count.items()]
+        fuzzy.sort(key=lambda f: -f[0])
+        return exact, prefix, fuzzy, set().union(*(grp for _w, grp in fuzzy))
+
+
+class EpisodeThumbnailProvider(QObject):
+    """Episode poster frames for the playlist drawer.
+
+    Frames are grabbed by a small pool of headless mpv instances (never the
+    playback instance), stored in a size-capped on-disk LRU keyed by file
+    identity, and kept as a bounded in-memory pixmap LRU for painting.
+    Requests only come from rows the view paints, newest first. A failed grab
+    (timeout, busy instance, file still being copied) is retried after an
+    exponential backoff rather than given up on for the session.
+    """
+
+    thumbnail_ready = Signal(str)
+    _image_ready = Signal(str, QImage)
+
+    THUMB_W = 96
+    THUMB_H = 54
+    GRAB_W = 320
+    DISK_MAX_BYTES = 256 * 1024 * 1024
+    MEMORY_ITEMS = 300
+    RETRY_BASE_S = 30.0
+    RETRY_MAX_S = 600.0
+
+    def __init__(self, parent=None, workers: int = 2):
+        super().__init__(parent)
+        self._disk = DiskLRUCache(_player_cache_dir("thumbs"), self.DISK_MAX_BYTES, ".jpg")
+        self._pixmaps: "OrderedDict[str, QPixmap]" = OrderedDict()
+        self._failed: Dict[str, Tuple[float, int]] = {}  # path -> (retry after, failures)
+        self._workers = max(1, int(workers))
+        self._pool: Optional[HeadlessMpvPool] = None
+        self._placeholder: Optional[QPixmap] = None
+        self._image_ready.connect(self._on_image_ready)
+
+    def available(self) -> bool:
+        return mpv is not None
+
+    def icon_size(self) -> QSize:
+        return QSize(self.THUMB_W, self.THUMB_H)
+
+    def placeholder(self) -> QPixmap:
+        if self._placeholder is None:
+            pm = QPixmap(self.THUMB_W, self.THUMB_H)
+            pm.fill(QColor(255, 255, 255, 18))
+            self._placeholder = pm
+        return self._placeholder
+
+    def pixmap_for(self, path: str) -> Optional[QPixmap]:
+        """Cached thumbnail for `path`, or None after queueing a background grab."""
+        if not path:
+            return None
+        pm = self._pixmaps.get(path)
+        if pm is not None:
+            self._pixmaps.move_to_end(path)
+            return pm
+        failed = self._failed.get(path)
+        if (failed is not None and time.monotonic() < failed[0]) or not self.available():
+            return None
+        try:
+            if self._pool is None:
+                self._pool = HeadlessMpvPool(
+                    self._grab,
+                    workers=self._workers,
+                    max_pending=48,
+                    name="thumbs",
+                )
+            self._pool.submit(path, path)
+        except Exception as e:
+            print(f"Thumbnail pool error: {e}")
+            self._mark_failed(path)
+        return None
+
+    def _mark_failed(self, path: str):
+        n = self._failed.get(path, (0.0, 0))[1] + 1
+        delay = min(self.RETRY_MAX_S, self.RETRY_BASE_S * (2 ** (n - 1)))
+        self._failed[path] = (time.monotonic() + delay, n)
+
+    def cancel_pending(self):
+        if self._pool is not None:
+            self._pool.cancel_pending()
+
+    def shutdown(self):
+        try:
+            if self._pool is not None:
+                self._pool.shutdown()
+        except Exception:
+            pass
+        self._pool = None
+
+    # ---- Worker thread ----
+
+    def _grab(self, m, key: str, path: str):
+        cache_key = _file_cache_key(path, "thumb", str(self.GRAB_W))
+        if not cache_key:
+            self._image_ready.emit(path, QImage())
+            return
+        cached = self._disk.get(cache_key)
+        if cached is None:
+            tmp = self._disk.tmp_path(cache_key)
+            ok = _headless_load(
+                m, path, timeout=12.0,
+                start='25%',
+                vf=f'scale=w={self.GRAB_W}:h=-2',
+            )
+            if ok:
+                try:
+                    m.command('screenshot-to-file', str(tmp), 'video')
+                except Exception:
+                    ok = False
+            try:
+                m.command('stop')
+            except Exception:
+                pass
+            cached = self._disk.put_file(cache_key, tmp) if ok else None
+        img = QImage(str(cached)) if cached is not None else QImage()
+        if not img.isNull():
+            img = img.scaled(
+                self.THUMB_W, self.THUMB_H,
+                Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+                Qt.TransformationMode.SmoothTransformation,
+            )
+            x = max(0, (img.width() - self.THUMB_W) // 2)
+            y = max(0, (img.height() - self.THUMB_H) // 2)
+            img = img.copy(x, y, self.THUMB_W, self.THUMB_H)
+        self._image_ready.emit(path, img)
+
+    # ---- UI thread ----
+
+    def _on_image_ready(self, path: str, img: QImage):
+        if img.isNull():
+            self._mark_failed(path)
+            return
+        self._failed.pop(path, None)
+        self._pixmaps[path] = QPixmap.fromImage(img)
+        self._pixmaps.move_to_end(path)
+        while len(self._pixmaps) > self.MEMORY_ITEMS:
+            self._pixmaps.popitem(last=False)
+        self.thumbnail_ready.emit(path)
+
+
+class PlaylistModel(QAbstractListModel):
+    """Read-only list model over the player's playlist paths.
+
+    The model keeps a reference to the playlist list instead of copying it and
+    derives display names on demand (only for rows the view actually paints),
+    so binding a 2,000-entry folder costs the same as binding ten.
+
+    An optional filter (search results) maps view rows onto playlist rows;
+    UserRole always reports the playlist row.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._paths: List[str] = []
+        self._names: Dict[int, str] = {}
+        self._bound_len = 0
+        self._current = -1
+        self._filter: Optional[List[int]] = None
+        self._view_row_for: Dict[int, int] = {}
+        self._thumbs: Optional[EpisodeThumbnailProvider] = None
+        self._thumb_rows: Dict[str, int] = {}
+
+    # ---- Public API ----
+
+    def set_thumbnail_provider(self, provider: Optional["EpisodeThumbnailProvider"]):
+        if self._thumbs is not None:
+            try:
+                self._thumbs.thumbnail_ready.disconnect(self._on_thumbnail_ready)
+            except Exception:
+                pass
+        self._thumbs = provider
+        self._thumb_rows = {}
+        if provider is not None:
+            provider.thumbnail_ready.connect(self._on_thumbnail_ready)
+
+    def _on_thumbnail_ready(self, path: str):
+        row = self._thumb_rows.pop(path, -1)
+        if row < 0 or self.path_at(row) != path:
+            return
+        v = self.view_row(row)
+        if v >= 0:
+            idx = self.index(v, 0)
+            self.dataChanged.emit(idx, idx, [Qt.ItemDataRole.DecorationRole])
+
+    def set_playlist(self, paths: List[str], current_index: int) -> bool:
+        """Bind playlist paths; only resets the model when the list actually changed.
+
+        Returns True when the model was reset (the caller should re-apply any filter).
+        """
+        paths = paths if isinstance(paths, list) else []
+        if paths is self._paths and len(paths) == self._bound_len:
+            self.set_current_index(current_index)
+            return False
+        self.beginResetModel()
+        self._paths = paths
+        self._bound_len = len(paths)
+        self._names = {}
+        self._filter = None
+        self._view_row_for = {}
+        self._thumb_rows = {}
+        self._current = int(current_index) if 0 <= int(current_index) < len(paths) else -1
+        self.endResetModel()
+        return True
+
+    def set_filter(self, rows: Optional[List[int]]) -> None:
+        """Show only the given playlist rows (in order), or everything when None."""
+        self.beginResetModel()
+        if rows is None:
+            self._filter = None
+            self._view_row_for = {}
+        else:
+            n = len(self._paths)
+            self._filter = [int(r) for r in rows if 0 <= int(r) < n]
+            self._view_row_for = {r: i for i, r in enumerate(self._filter)}
+        self.endResetModel()
+
+    def is_filtered(self) -> bool:
+        return self._filter is not None
+
+    def set_current_index(self, index: int):
+        """Move the now-playing marker with one dataChanged covering the old and new rows."""
+        try:
+            new = int(index)
+        except Exception:
+            new = -1
+        if not (0 <= new < len(self._paths)):
+            new = -1
+        old = self._current
+        if new == old:
+            return
+        self._current = new
+        rows = [v for v in (self.view_row(old), self.view_row(new)) if v >= 0]
+        if not rows:
+            return
+        self.dataChanged.emit(
+            self.index(min(rows), 0),
+            self.index(max(rows), 0),
+            [Qt.ItemDataRole.DisplayRole],
+        )
+
+    def current_index(self) -> int:
+        return self._current
+
+    def playlist_count(self) -> int:
+        return len(self._paths)
+
+    def paths(self) -> List[str]:
+        return self._paths
+
+    def source_row(self, view_row: int) -> int:
+        if self._filter is None:
+            return view_row if 0 <= view_row < len(self._paths) else -1
+        try:
+            return self._filter[view_row]
+        except Exception:
+            return -1
+
+    def view_row(self, source_row: int) -> int:
+        if not (0 <= source_row < len(self._paths)):
+            return -1
+        if self._filter is None:
+            return source_row
+        return self._view_row_for.get(source_row, -1)
+
+    def path_at(self, row: int) -> str:
+        try:
+            return str(self._paths[row])
+        except Exception:
+            return ""
+
+    def name_at(self, row: int) -> str:
+        name = self._names.get(row)
+        if name is None:
+            name = os.path.basename(self.path_at(row)) or self.path_at(row)
+            self._names[row] = name
+        return name
+
+    # ---- QAbstractListModel ----
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        if self._filter is not None:
+            return len(self._filter)
+        return len(self._paths)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.source_row(index.row())
+        if row < 0:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            prefix = "▶ " if row == self._current else "   "
+            return f"{prefix}{self.name_at(row)}"
+        if role == Qt.ItemDataRole.UserRole:
+            return row
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return self.path_at(row)
+        if role == Qt.ItemDataRole.DecorationRole and self._thumbs is not None:
+            path = self.path_at(row)
+            pm = self._thumbs.pixmap_for(path)
+            if pm is None:
+                self._thumb_rows[path] = row
+                return self._thumbs.placeholder()
+            return pm
+        return None
+
+
+class PlaylistDrawer(SlideDrawer):
+    """Embedded-style playlist drawer (right side)."""
+
+    episode_selected = Signal(int)
+    auto_advance_changed = Signal(bool)
+
+    def __init__(self, parent: QWidget):
+        super().__init__('right', parent)
+
+        self.setStyleSheet(
+            """
+            QFrame#SlideDrawer {
+                background: rgba(8, 8, 10, 0.92);
+                border: 1px solid rgba(255, 255, 255, 0.08);
+                border-radius: 12px;
+            }
+            QLabel { color: rgba(255, 255, 255, 0.90); }
+            QPushButton {
+                background: rgba(255, 255, 255, 0.08);
+                border: 1px solid rgba(255, 255, 255, 0.12);
+                border-radius: 10px;
+                padding: 6px 10px;
+                color: rgba(255, 255, 255, 0.92);
+            }
+            QPushButton:hover { background: rgba(255, 255, 255, 0.14); }
+            QCheckBox { color: rgba(255, 255, 255, 0.88); }
+            QLineEdit {
+                background: rgba(0, 0, 0, 0.40);
+                border: 1px solid rgba(255, 255, 255, 0.12);
+                border-radius: 8px;
+                color: rgba(255, 255, 255, 0.92);
+                padding: 5px 8px;
+            }
+            QListView {
+                background: rgba(0, 0, 0, 0.40);
+                border: 1px solid rgba(255, 255, 255, 0.10);
+                border-radius: 8px;
+                color: rgba(255, 255, 255, 0.92);
+                outline: none;
+            }
+            QListView::item {
+                padding: 4px 8px;
+                border-bottom: 1px solid rgba(255, 255, 255, 0.06);
+            }
+            QListView::item:last { border-bottom: none; }
+            QListView::item:hover { background: rgba(255, 255, 255, 0.06); }
+            QListView::item:selected {
+                background: rgba(96, 130, 255, 0.38);
+                color: rgba(255, 255, 255, 0.98);
+            }
+            QListView::item:selected:active { background: rgba(96, 130, 255, 0.48); }
+            """
+        )
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(14, 12, 14, 12)
+        layout.setSpacing(10)
+
+        title = QLabel("Playlist")
+        title.setStyleSheet("font-size: 14px; font-weight: 600;")
+        layout.addWidget(title)
+
+        self.folder_label = QLabel("")
+        self.folder_label.setWordWrap(True)
+        self.folder_label.setStyleSheet("font-size: 11px; color: rgba(255,255,255,0.85);")
+        layout.addWidget(self.folder_label)
+
+        self.auto_advance = QCheckBox("Auto-advance")
+        self.auto_advance.setChecked(True)
+        self.auto_advance.stateChanged.connect(lambda s: self.auto_advance_changed.emit(bool(s)))
+        layout.addWidget(self.auto_advance)
+
+        # Search: index is built lazily on first keystroke, then kept in sync incrementally.
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Search episodes…")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self._on_search_text_changed)
+        self.search_edit.returnPressed.connect(self._on_search_return)
+        self.search_edit.installEventFilter(self)
+        layout.addWidget(self.search_edit)
+        self._search_index = PlaylistSearchIndex()
+        self._search_index_dirty = True
+        self._search_index_timer = QTimer(self)
+        self._search_index_timer.setInterval(0)
+        self._search_index_timer.timeout.connect(self._index_step)
+
+        # Model/view instead of QListWidget: no per-episode item objects, display
+        # text is computed lazily for visible rows only.
+        self.model = PlaylistModel(self)
+        self.episode_list = QListView()
+        self.episode_list.setModel(self.model)
+        self.episode_list.setSpacing(0)
+        self.episode_list.setUniformItemSizes(True)
+        self.episode_list.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        self.episode_list.doubleClicked.connect(self._on_episode_double_clicked)
+        layout.addWidget(self.episode_list, stretch=1)
+        self._thumbs: Optional[EpisodeThumbnailProvider] = None
+
+        nav = QHBoxLayout()
+        self.prev_btn = QPushButton("⏮\ufe0e")
+        self.prev_btn.setToolTip("Previous episode")
+        self.prev_btn.clicked.connect(lambda: self._navigate(-1))
+        nav.addWidget(self.prev_btn)
+
+        self.next_btn = QPushButton("⏭\ufe0e")
+        self.next_btn.setToolTip("Next episode")
+        self.next_btn.clicked.connect(lambda: self._navigate(+1))
+        nav.addWidget(self.next_btn)
+
+        nav.addStretch()
+
+        close_btn = QPushButton("✕")
+        close_btn.clicked.connect(lambda: self.close(self.parent().width() if self.parent() else 1200))
+        nav.addWidget(close_btn)
+
+        layout.addLayout(nav)
+
+        self._current_index = -1
+        self._folder_path = ""
+
+    def set_playlist(self, folder_path: str, paths: List[str], current_index: int):
+        """Bind the playlist arrays; cost is independent of the folder size."""
+        try:
+            if folder_path != self._folder_path:
+                self._folder_path = folder_path
+                self.folder_label.setText(folder_path)
+
+            if self.model.set_playlist(paths, current_index):
+                self._search_index_dirty = True
+                if self.search_edit.text().strip():
+                    self._apply_search(self.search_edit.text())
+                else:
+                    self._start_background_index()
+            self._current_index = self.model.current_index()
+            self._select_current_row()
+
+            count = self.model.playlist_count()
+            self.prev_btn.setEnabled(self._current_index > 0)
+            self.next_btn.setEnabled(0 <= self._current_index < count - 1)
+        except Exception as e:
+            print(f"PlaylistDrawer set_playlist error: {e}")
+
+    def set_thumbnail_provider(self, provider: Optional[EpisodeThumbnailProvider]):
+        """Show episode thumbnails (grabbed lazily for visible rows only)."""
+        self._thumbs = provider
+        self.model.set_thumbnail_provider(provider)
+        if provider is not None:
+            self.episode_list.setIconSize(provider.icon_size())
+
+    def populate_playlist(self, folder_path: str, episodes: List[Dict], current_index: int):
+        """Compat wrapper for callers that still pass episode dicts."""
+        try:
+            paths = [str(ep.get('path', '')) for ep in (episodes or [])]
+        except Exception:
+            paths = []
+        self.set_playlist(folder_path, paths, current_index)
+
+    def close(self, stage_w: int):
+        self._release_search_keyboard()
+        if self._thumbs is not None:
+            self._thumbs.cancel_pending()
+        super().close(stage_w)
+
+    # ---- Search ----
+
+    def _apply_search(self, text: str):
+        try:
+            q = str(text or "").strip()
+            if not q:
+                if self.model.is_filtered():
+                    self.model.set_filter(None)
+                    self._select_current_row()
+                return
+            self._finish_index()
+            self.model.set_filter(self._search_index.search(q))
+            if self.model.rowCount() > 0:
+                self.episode_list.setCurrentIndex(self.model.index(0, 0))
+                self.episode_list.scrollToTop()
+        except Exception as e:
+            print(f"PlaylistDrawer search error: {e}")
+
+    def _start_background_index(self):
+        """Index new playlist entries in small idle-time steps."""
+        try:
+            self._search_index.begin_sync(self.model.paths())
+            self._search_index_dirty = False
+            self._search_index_timer.start()
+        except Exception:
+            pass
+
+    def _index_step(self):
+        try:
+            if self._search_index.sync_step(300):
+                self._search_index_timer.stop()
+        except Exception:
+            self._search_index_timer.stop()
+
+    def _finish_index(self):
+        """Make sure the index is current before answering a query."""
+        if self._search_index_dirty:
+            self._search_index.begin_sync(self.model.paths())
+            self._search_index_dirty = False
+        self._search_index_timer.stop()
+        while not self._search_index.sync_step(1 << 30):
+            pass
+
+    def _on_search_text_changed(self, text: str):
+        self._apply_search(text)
+
+    def _on_search_return(self):
+        """Enter plays the highlighted (or first) search hit."""
+        try:
+            idx = self.episode_list.currentIndex()
+            view_row = idx.row() if idx.isValid() else 0
+            row = self.model.source_row(view_row)
+            if row >= 0:
+                self.episode_selected.emit(row)
+        except Exception:
+            pass
+
+    def _claim_search_keyboard(self):
+        # The player window grabs the keyboard for hotkeys; hand it to the field while typing.
+        try:
+            self.search_edit.grabKeyboard()
+        except Exception:
+            pass
+
+    def _release_search_keyboard(self):
+        try:
+            if QWidget.keyboardGrabber() is self.search_edit:
+                self.search_edit.releaseKeyboard()
+                w = self.window()
+                if w:
+                    w.setFocus(Qt.FocusReason.OtherFocusReason)
+                    w.grabKeyboard()
+        except Exception:
+            pass
+
+    def eventFilter(self, obj, event):
+        try:
+            if obj is self.search_edit:
+                et = event.type()
+                if et in (QEvent.Type.FocusIn, QEvent.Type.MouseButtonPress):
+                    self._claim_search_keyboard()
+                elif et == QEvent.Type.FocusOut:
+                    self._release_search_keyboard()
+                elif et == QEvent.Type.KeyPress:
+                    key = event.key()
+                    if key == Qt.Key.Key_Escape:
+                        if self.search_edit.text():
+                            self.search_edit.clear()
+                        else:
+                            self._release_search_keyboard()
+                        return True
+                    if key in (Qt.Key.Key_Down, Qt.Key.Key_Up):
+                        n = self.model.rowCount()
+                        if n:
+                            cur = self.episode_list.currentIndex()
+                            r = cur.row() if cur.isValid() else -1
+                            r = max(0, min(n - 1, r + (1 if key == Qt.Key.Key_Down else -1)))
+                            self.episode_list.setCurrentIndex(self.model.index(r, 0))
+                        return True
+        except Exception:
+            pass
+        return super().eventFilter(obj, event)
+
+    def _select_current_row(self):
+        try:
+            row = self.model.view_row(self._current_index)
+            if row < 0:
+                self.episode_list.clearSelection()
+                return
+            idx = self.model.index(row, 0)
+            self.episode_list.setCurrentIndex(idx)
+            self.episode_list.scrollTo(idx, QListView.ScrollHint.PositionAtCenter)
+        except Exception:
+            pass
+
+    def _on_episode_double_clicked(self, index: QModelIndex):
+        try:
+            if index.isValid():
+                row = self.model.source_row(index.row())
+                if row >= 0:
+                    self.episode_selected.emit(row)
+        except Exception:
+            pass
+
+    def _navigate(self, direction: int):
+        try:
+            ni = self._current_index + direction
+            if 0 <= ni < self.model.playlist_count():
+                self.episode_selected.emit(ni)
+        except Exception:
+            pass
+
+
+class TranscriptModel(QAbstractListModel):
+    """Read-only view over a SubtitleCueIndex; rows are formatted lazily for painted rows only."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._index: Optional[SubtitleCueIndex] = None
+        self._offset = 0.0
+
+    def set_index(self, index: Optional[SubtitleCueIndex], offset: float = 0.0):
+        self.beginResetModel()
+        self._index = index
+        self._offset = float(offset or 0.0)
+        self.endResetModel()
+
+    def set_offset(self, offset: float):
+        offset = float(offset or 0.0)
+        if offset != self._offset and self._index is not None and len(self._index):
+            self._offset = offset
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._index) - 1, 0))
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self._index is None:
+            return 0
+        return len(self._index)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or self._index is None:
+            return None
+        row = index.row()
+        if role == Qt.ItemDataRole.DisplayRole:
+            text = " ".join(self._index.texts[row].split())
+            return f"{_fmt_time(max(0.0, self._index.starts[row] + self._offset))}   {text}"
+        if role == Qt.ItemDataRole.UserRole:
+            return row
+        return None
+
+
+class SubtitleHitModel(QAbstractListModel):
+    """Season-wide subtitle search hits: (path, time, line) rows."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._hits: List[Tuple[str, float, str]] = []
+        self._names: Dict[str, str] = {}
+
+    def set_hits(self, hits: List[Tuple[str, float, str]]):
+        self.beginResetModel()
+        self._hits = list(hits)
+        self.endResetModel()
+
+    def hit(self, row: int) -> Optional[Tuple[str, float, str]]:
+        return self._hits[row] if 0 <= row < len(self._hits) else None
 
-    episode_selected = Signal(int)
-    auto_advance_changed = Signal(bool)
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._hits)
 
-    def __init__(self, parent: QWidget):
-        super().__init__('right', parent)
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        path, t, text = self._hits[index.row()]
+        name = self._names.get(path)
+        if name is None:
+            info = parse_episode_name(Path(path).name)
+            ep = info.get("episode")
+            name = f"S{int(info['season']):02d}E{ep:g}" if info.get("season") is not None and ep is not None else (
+                f"Ep {ep:g}" if ep is not None else Path(path).stem)
+            self._names[path] = name
+        return f"{name} · {_fmt_time(t)}   {text}"
 
-        self.setStyleSheet(
-            """
-            QFrame#SlideDrawer {
-                background: rgba(8, 8, 10, 0.92);
-                border: 1px solid rgba(255, 255, 255, 0.08);
-                border-radius: 12px;
-            }
-            QLabel { color: rgba(255, 255, 255, 0.90); }
-            QPushButton {
-                background: rgba(255, 255, 255, 0.08);
-                border: 1px solid rgba(255, 255, 255, 0.12);
-                border-radius: 10px;
-                padding: 6px 10px;
-                color: rgba(255, 255, 255, 0.92);
-            }
-            QPushButton:hover { background: rgba(255, 255, 255, 0.14); }
-            QCheckBox { color: rgba(255, 255, 255, 0.88); }
-            QListWidget {
-                background: rgba(0, 0, 0, 0.40);
-                border: 1px solid rgba(255, 255, 255, 0.10);
-                border-radius: 8px;
-                color: rgba(255, 255, 255, 0.92);
-                outline: none;
-            }
-            QListWidget::item {
-                padding: 4px 8px;
-                border-bottom: 1px solid rgba(255, 255, 255, 0.06);
-            }
-            QListWidget::item:last { border-bottom: none; }
-            QListWidget::item:hover { background: rgba(255, 255, 255, 0.06); }
-            QListWidget::item:selected {
-                background: rgba(96, 130, 255, 0.38);
-                color: rgba(255, 255, 255, 0.98);
-            }
-            QListWidget::item:selected:active { background: rgba(96, 130, 255, 0.48); }
-            """
-        )
+
+class TranscriptDrawer(SlideDrawer):
+    """Subtitle transcript drawer (left side) that follows playback, with season-wide line search."""
+
+    cue_selected = Signal(int)
+    search_requested = Signal(str)
+    hit_selected = Signal(str, float)
+
+    def __init__(self, parent: QWidget):
+        super().__init__('left', parent)
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(14, 12, 14, 12)
         layout.setSpacing(10)
 
-        title = QLabel("Playlist")
+        title = QLabel("Transcript")
         title.setStyleSheet("font-size: 14px; font-weight: 600;")
         layout.addWidget(title)
 
-        self.folder_label = QLabel("")
-        self.folder_label.setWordWrap(True)
-        self.folder_label.setStyleSheet("font-size: 11px; color: rgba(255,255,255,0.85);")
-        layout.addWidget(self.folder_label)
-
-        self.auto_advance = QCheckBox("Auto-advance")
-        self.auto_advance.setChecked(True)
-        self.auto_advance.stateChanged.connect(lambda s: self.auto_advance_changed.emit(bool(s)))
-        layout.addWidget(self.auto_advance)
-
-        self.episode_list = QListWidget()
-        self.episode_list.setSpacing(0)
-        self.episode_list.setUniformItemSizes(True)
-        self.episode_list.itemDoubleClicked.connect(self._on_episode_double_clicked)
-        layout.addWidget(self.episode_list, stretch=1)
+        # Search across every episode's subtitles (debounced; the index answers in milliseconds).
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Search all episodes…")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.setStyleSheet(
+            "QLineEdit { background: rgba(0, 0, 0, 0.30); border: 1px solid rgba(255, 255, 255, 0.12);"
+            " border-radius: 8px; color: rgba(255, 255, 255, 0.92); padding: 5px 8px; }"
+        )
+        self.search_edit.textChanged.connect(lambda _t: self._search_timer.start())
+        self.search_edit.returnPressed.connect(self._on_search_return)
+        self.search_edit.installEventFilter(self)
+        layout.addWidget(self.search_edit)
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(150)
+        self._search_timer.timeout.connect(lambda: self.search_requested.emit(self.search_edit.text().strip()))
+
+        self.status_label = QLabel("")
+        self.status_label.setWordWrap(True)
+        self.status_label.setStyleSheet("font-size: 11px; color: rgba(255,255,255,0.70);")
+        layout.addWidget(self.status_label)
+
+        self.index_label = QLabel("")
+        self.index_label.setStyleSheet("font-size: 11px; color: rgba(255,255,255,0.55);")
+        self.index_label.hide()
+        layout.addWidget(self.index_label)
+
+        self.model = TranscriptModel(self)
+        self.hit_model = SubtitleHitModel(self)
+        self._cue_status = ""
+        self.cue_list = QListView()
+        self.cue_list.setModel(self.model)
+        self.cue_list.setWordWrap(True)
+        self.cue_list.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        self.cue_list.setStyleSheet(
+            "QListView { background: rgba(0, 0, 0, 0.22); border: 1px solid rgba(255, 255, 255, 0.12);"
+            " border-radius: 10px; color: rgba(255, 255, 255, 0.92); outline: none; }"
+            " QListView::item { padding: 3px 6px; }"
+            " QListView::item:selected { background: rgba(96, 130, 255, 0.38); }"
+        )
+        self.cue_list.doubleClicked.connect(self._on_cue_double_clicked)
+        layout.addWidget(self.cue_list, stretch=1)
 
         nav = QHBoxLayout()
-        self.prev_btn = QPushButton("⏮\ufe0e")
-        self.prev_btn.setToolTip("Previous episode")
-        self.prev_btn.clicked.connect(lambda: self._navigate(-1))
-        nav.addWidget(self.prev_btn)
-
-        self.next_btn = QPushButton("⏭\ufe0e")
-        self.next_btn.setToolTip("Next episode")
-        self.next_btn.clicked.connect(lambda: self._navigate(+1))
-        nav.addWidget(self.next_btn)
-
         nav.addStretch()
-
         close_btn = QPushButton("✕")
         close_btn.clicked.connect(lambda: self.close(self.parent().width() if self.parent() else 1200))
         nav.addWidget(close_btn)
-
         layout.addLayout(nav)
 
-        self._current_index = -1
-        self._playlist_data: List[Dict] = []
+        self._row = -1
+
+    def set_cues(self, index: Optional[SubtitleCueIndex], offset: float = 0.0, status: str = ""):
+        self._row = -1
+        self.model.set_index(index, offset)
+        if not status and index is not None and not len(index):
+            status = "No subtitle lines on this track."
+        self._cue_status = status
+        if not self.is_searching():
+            self._set_status(status)
+
+    def _set_status(self, text: str):
+        self.status_label.setText(text)
+        self.status_label.setVisible(bool(text))
+
+    def set_index_progress(self, done: int, total: int):
+        self.index_label.setText(f"Indexing subtitles: {done}/{total} episodes" if done < total else "")
+        self.index_label.setVisible(done < total)
+
+    def is_searching(self) -> bool:
+        return self.cue_list.model() is self.hit_model
+
+    def set_hits(self, query: str, hits: List[Tuple[str, float, str]]):
+        """Show search hits (an empty query returns to the transcript)."""
+        if not query:
+            if self.is_searching():
+                self._row = -1
+                self.cue_list.setModel(self.model)
+            self._set_status(self._cue_status)
+            return
+        self.hit_model.set_hits(hits)
+        if not self.is_searching():
+            self.cue_list.setModel(self.hit_model)
+        self._set_status(f"{len(hits)} line{'s' if len(hits) != 1 else ''}" + ("+" if len(hits) >= 200 else ""))
+        if hits:
+            self.cue_list.setCurrentIndex(self.hit_model.index(0, 0))
+            self.cue_list.scrollToTop()
 
-    def populate_playlist(self, folder_path: str, episodes: List[Dict], current_index: int):
+    def close(self, stage_w: int):
+        self._release_search_keyboard()
+        super().close(stage_w)
+
+    def follow(self, row: int, offset: float = 0.0):
+        """Highlight the current line; cheap when the line hasn't changed."""
+        if self.is_searching():
+            return
+        self.model.set_offset(offset)
+        if row == self._row:
+            return
+        self._row = row
+        if row < 0:
+            self.cue_list.clearSelection()
+            return
+        idx = self.model.index(row, 0)
+        self.cue_list.setCurrentIndex(idx)
+        # Don't yank the list away while the user is browsing it.
+        if not self.cue_list.underMouse():
+            self.cue_list.scrollTo(idx, QListView.ScrollHint.PositionAtCenter)
+
+    def _on_cue_double_clicked(self, index: QModelIndex):
         try:
-            self._playlist_data = episodes
-            self._current_index = current_index
-            self.folder_label.setText(folder_path)
+            if not index.isValid():
+                return
+            if self.is_searching():
+                hit = self.hit_model.hit(index.row())
+                if hit is not None:
+                    self.hit_selected.emit(hit[0], hit[1])
+            else:
+                self.cue_selected.emit(index.row())
+        except Exception:
+            pass
 
-            self.episode_list.clear()
-            for idx, ep in enumerate(episodes):
-                name = ep.get('name', Path(ep['path']).name)
-                prefix = "▶ " if idx == current_index else "   "
-                it = QListWidgetItem(f"{prefix}{name}")
-                it.setData(Qt.ItemDataRole.UserRole, idx)
-                self.episode_list.addItem(it)
-                if idx == current_index:
-                    it.setSelected(True)
+    def _on_search_return(self):
+        """Enter opens the highlighted (or first) hit."""
+        self._search_timer.stop()
+        self.search_requested.emit(self.search_edit.text().strip())
+        idx = self.cue_list.currentIndex()
+        if self.is_searching():
+            self._on_cue_double_clicked(idx if idx.isValid() else self.hit_model.index(0, 0))
 
-            self.prev_btn.setEnabled(current_index > 0)
-            self.next_btn.setEnabled(current_index < len(episodes) - 1)
-        except Exception as e:
-            print(f"PlaylistDrawer populate_playlist error: {e}")
+    def _claim_search_keyboard(self):
+        # The player window grabs the keyboard for hotkeys; hand it to the field while typing.
+        try:
+            self.search_edit.grabKeyboard()
+        except Exception:
+            pass
 
-    def _on_episode_double_clicked(self, item):
+    def _release_search_keyboard(self):
         try:
-            self.episode_selected.emit(int(item.data(Qt.ItemDataRole.UserRole)))
+            if QWidget.keyboardGrabber() is self.search_edit:
+                self.search_edit.releaseKeyboard()
+                w = self.window()
+                if w:
+                    w.setFocus(Qt.FocusReason.OtherFocusReason)
+                    w.grabKeyboard()
         except Exception:
             pass
 
-    def _navigate(self, direction: int):
+    def eventFilter(self, obj, event):
         try:
-            ni = self._current_index + direction
-            if 0 <= ni < len(self._playlist_data):
-                self.episode_selected.emit(ni)
+            if obj is self.search_edit:
+                et = event.type()
+                if et in (QEvent.Type.FocusIn, QEvent.Type.MouseButtonPress):
+                    self._claim_search_keyboard()
+                elif et == QEvent.Type.FocusOut:
+                    self._release_search_keyboard()
+                elif et == QEvent.Type.KeyPress:
+                    key = event.key()
+                    if key == Qt.Key.Key_Escape:
+                        if self.search_edit.text():
+                            self.search_edit.clear()
+                        else:
+                            self._release_search_keyboard()
+                        return True
+                    if key in (Qt.Key.Key_Down, Qt.Key.Key_Up):
+                        model = self.cue_list.model()
+                        n = model.rowCount()
+                        if n:
+                            cur = self.cue_list.currentIndex()
+                            r = cur.row() if cur.isValid() else -1
+                            r = max(0, min(n - 1, r + (1 if key == Qt.Key.Key_Down else -1)))
+                            self.cue_list.setCurrentIndex(model.index(r, 0))
+                        return True
         except Exception:
             pass
+        return super().eventFilter(obj, event)
 
 
 # ============================================================================
@@ -2663,6 +7957,13 @@ class PlayerWindow(QMainWindow):
         self._last_sid = None
         self._last_sub_visibility = None
         self._respect_subtitle_styles = False
+
+        # Per-show track rules, evaluated when a file loads (see TrackPreferences)
+        self._track_prefs: Optional[TrackPreferences] = None
+        self._track_plan: Dict[str, Optional[str]] = {}
+        self._track_plan_path = ""
+        # Select a sidecar automatically only after a sidecar pick (None: no pick or rule yet)
+        self._prefer_external_subs: Optional[bool] = None
         
         # Build 19: Track last known position + reliable initial seek
         self._last_time_pos = float(start_seconds) if start_seconds and start_seconds > 0 else 0.0
@@ -2708,6 +8009,35 @@ class PlayerWindow(QMainWindow):
         if not self._playlist:
             self._build_folder_playlist()
 
+        # Content fingerprint of the open file (rename-proof key for resume/caches)
+        self._content_fp: Optional[str] = None
+
+        # Standalone resume (used only when no --progress-file is given)
+        self._resume_store: Optional[ResumeStore] = None
+        self._resume_checked_fp = False
+        self._audio_delay = 0.0
+        self._sub_delay = 0.0
+
+        # Subtitle cue index of the selected track (line navigation, transcript)
+        self._cue_index: Optional[SubtitleCueIndex] = None
+        self._cue_key: Optional[Tuple[str, str]] = None
+        self._cue_status = ""
+        self._cue_building: Optional[Tuple[str, str]] = None
+        self._cue_unsaved: Optional[Tuple[str, Dict[str, Any], List[Tuple[float, float, str]]]] = None
+
+        # Typesetting load of the selected ASS track; heavy scripts switch on the subtitle perf mode
+        self._ass_complexity: Optional[Dict[str, Any]] = None
+        self._sub_perf_mode = False
+
+        # Watch-history ledger (one session per opened file)
+        self._history: Optional[WatchHistoryLedger] = None
+        self._history_session = ""
+        self._history_seg: Optional[List[float]] = None
+
+        # Show-level (cross-season) episode index, built off the UI thread after load
+        self._show_index: Optional[ShowEpisodeIndex] = None
+        self._show_index_building = False
+
 
         # Build16: constrain playlist to the active folder (season folder), never the whole show tree
         try:
@@ -2760,6 +8090,9 @@ class PlayerWindow(QMainWindow):
         self._muted = False
         # Build 23: Persisted player settings (volume/mute + subtitle HUD lift)
         self._subtitle_hud_lift_px = 40
+        self._auto_skip_segments = False
+        self._normalize_loudness = True
+        self._smart_speed = False
         self._settings_file = self._derive_settings_file()
         self._settings_flush_timer = QTimer(self)
         self._settings_flush_timer.setSingleShot(True)
@@ -2863,6 +8196,10 @@ class PlayerWindow(QMainWindow):
                     self._subtitle_hud_lift_px = max(0, min(300, lv))
                 except Exception:
                     pass
+
+            self._auto_skip_segments = bool(data.get("auto_skip_segments", False))
+            self._normalize_loudness = bool(data.get("normalize_loudness", True))
+            self._smart_speed = bool(data.get("smart_speed", False))
         except Exception:
             pass
 
@@ -2887,6 +8224,9 @@ class PlayerWindow(QMainWindow):
                 "volume": int(max(0, min(100, int(getattr(self, "_volume", 100) or 0)))),
                 "muted": bool(getattr(self, "_muted", False)),
                 "subtitle_hud_lift_px": int(max(0, min(300, int(getattr(self, "_subtitle_hud_lift_px", 40) or 0)))),
+                "auto_skip_segments": bool(getattr(self, "_auto_skip_segments", False)),
+                "normalize_loudness": bool(getattr(self, "_normalize_loudness", True)),
+                "smart_speed": bool(getattr(self, "_smart_speed", False)),
                 "timestamp": time.time(),
             }
             atomic_write_json(sf, obj)
@@ -2899,7 +8239,7 @@ class PlayerWindow(QMainWindow):
             folder = self._show_root_path
             files = sorted(
                 [f for f in folder.glob("*") if f.is_file() and _is_video_file(str(f))],
-                key=lambda x: _natural_sort_key(x.name)
+                key=lambda x: _episode_sort_key(x.name)
             )
             self._playlist = [str(f) for f in files]
             
@@ -2999,6 +8339,26 @@ class PlayerWindow(QMainWindow):
         # Build 13+: Toast feedback (embedded-style)
         self.toast = ToastHUD(stage_container)
 
+        # Skip intro/outro (shown while playback is inside a detected segment)
+        self.skip_segment_btn = QPushButton("Skip intro", stage_container)
+        self.skip_segment_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.skip_segment_btn.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.skip_segment_btn.setStyleSheet(
+            """
+            QPushButton {
+                background: rgba(12, 12, 12, 0.82);
+                color: rgba(255, 255, 255, 0.95);
+                border: 1px solid rgba(255, 255, 255, 0.35);
+                border-radius: 4px;
+                padding: 8px 16px;
+                font-size: 13px;
+            }
+            QPushButton:hover { background: rgba(255, 255, 255, 0.16); }
+            """
+        )
+        self.skip_segment_btn.clicked.connect(self._skip_current_segment)
+        self.skip_segment_btn.hide()
+
         # Toast state (avoid initial load spam; allow suppression for UI-initiated changes)
         self._track_toasts_armed = False
         self._last_aid = None
@@ -3041,6 +8401,20 @@ class PlayerWindow(QMainWindow):
         self.playlist_drawer = PlaylistDrawer(stage_container)
         self.playlist_drawer.episode_selected.connect(self._load_episode_at_index)
         self.playlist_drawer.auto_advance_changed.connect(self._set_auto_advance)
+        self._episode_thumbs = None
+        try:
+            if mpv is not None:
+                self._episode_thumbs = EpisodeThumbnailProvider(self)
+                self.playlist_drawer.set_thumbnail_provider(self._episode_thumbs)
+        except Exception as e:
+            print(f"Episode thumbnails unavailable: {e}")
+
+        self.transcript_drawer = TranscriptDrawer(stage_container)
+        self.transcript_drawer.cue_selected.connect(self._seek_to_cue)
+        self.transcript_drawer.search_requested.connect(self._search_subtitles)
+        self.transcript_drawer.hit_selected.connect(self._open_subtitle_hit)
+        self._subsearch_indexer: Optional[SubtitleSearchIndexer] = None
+        self._subsearch_seq = 0
         
         # Build 13: Context menu (will be created on-demand)
         self._context_menu = None
@@ -3076,13 +8450,25 @@ class PlayerWindow(QMainWindow):
         except Exception:
             pass
 
+        # Skip intro/outro button: bottom-right, above the HUD
+        try:
+            btn = getattr(self, "skip_segment_btn", None)
+            if btn is not None:
+                btn.adjustSize()
+                btn.move(self.width() - btn.width() - 28, self.height() - bottom_height - btn.height() - 18)
+                btn.raise_()
+        except Exception:
+            pass
+
         # Drawers (do not affect render geometry)
         try:
             drawer_w = min(520, max(360, int(self.width() * 0.38)))
             self.tracks_drawer.configure(width=drawer_w, top=0, bottom=bottom_height)
             self.playlist_drawer.configure(width=drawer_w, top=0, bottom=bottom_height)
+            self.transcript_drawer.configure(width=drawer_w, top=0, bottom=bottom_height)
             self.tracks_drawer.update_stage_geometry(self.width(), self.height())
             self.playlist_drawer.update_stage_geometry(self.width(), self.height())
+            self.transcript_drawer.update_stage_geometry(self.width(), self.height())
         except Exception:
             pass
 
@@ -3131,12 +8517,16 @@ class PlayerWindow(QMainWindow):
                 sub_pos = 95
             sub_pos = max(55, min(98, sub_pos))
 
+            # Heavy typesetting keeps its own layout: forcing margins/overrides makes libass
+            # re-lay out every event on each HUD show/hide.
+            perf = bool(getattr(self, '_sub_perf_mode', False))
+
             # ASS subtitles can ignore margins unless forced.
             try:
-                self._mpv.command('set', 'sub-ass-force-margins', 'yes')
+                self._mpv.command('set', 'sub-ass-force-margins', 'no' if perf else 'yes')
             except Exception:
                 try:
-                    self._mpv.sub_ass_force_margins = 'yes'
+                    self._mpv.sub_ass_force_margins = 'no' if perf else 'yes'
                 except Exception:
                     pass
 
@@ -3151,7 +8541,7 @@ class PlayerWindow(QMainWindow):
 
             # Keep ASS override mode stable across HUD show/hide so subtitle outlines
             # do not visually pop when controls auto-hide.
-            ass_mode = 'no' if bool(getattr(self, '_respect_subtitle_styles', False)) else 'yes'
+            ass_mode = 'no' if (perf or bool(getattr(self, '_respect_subtitle_styles', False))) else 'yes'
             try:
                 self._mpv.command('set', 'sub-ass-override', ass_mode)
             except Exception:
@@ -3502,12 +8892,9 @@ class PlayerWindow(QMainWindow):
             except Exception:
                 pass
 
-            # Carry current track prefs forward (best-effort)
+            # Carry subtitle visibility forward; tracks are picked by the show's rules (best-effort)
             try:
-                if getattr(self, "_last_aid", None) is not None:
-                    self._pref_aid = str(getattr(self, "_last_aid"))
-                if getattr(self, "_last_sid", None) is not None:
-                    self._pref_sid = str(getattr(self, "_last_sid"))
+                self._pref_aid = self._pref_sid = ""
                 if getattr(self, "_last_sub_visibility", None) is not None:
                     self._pref_sub_visibility = 'yes' if bool(getattr(self, "_last_sub_visibility")) else 'no'
             except Exception:
@@ -3832,6 +9219,8 @@ class PlayerWindow(QMainWindow):
                 sub_shadow_offset=1.5,
                 sub_shadow_color='#B0000000',
                 sub_font_size=46,
+                # Sidecar subtitles are discovered and ingested off the UI thread (_discover_sidecar_subtitles).
+                sub_auto='no',
             )
             
             # Attach to render host
@@ -3852,6 +9241,18 @@ class PlayerWindow(QMainWindow):
                 pass
             self._mpv.observe_property('pause', self._on_pause_change)
             self._mpv.observe_property('eof-reached', self._on_eof)
+            try:
+                self._mpv.observe_property('track-list', self._on_track_list)
+            except Exception:
+                pass
+            try:
+                self._mpv.event_callback('file-loaded')(self._on_file_loaded)
+            except Exception:
+                pass
+            try:
+                self._mpv.observe_property('video-params', self._on_video_params)
+            except Exception:
+                pass
 
             # Track/subtitle change toasts
             try:
@@ -3909,6 +9310,13 @@ class PlayerWindow(QMainWindow):
         self._ui_timer.timeout.connect(self._update_ui)
         self._ui_timer.start(250)
         
+        # Scrub seek coalescing: at most one keyframe seek per interval while dragging
+        self._scrub_target: Optional[float] = None
+        self._scrub_seek_timer = QTimer(self)
+        self._scrub_seek_timer.setSingleShot(True)
+        self._scrub_seek_timer.setInterval(60)
+        self._scrub_seek_timer.timeout.connect(self._flush_scrub_seek)
+
         # Controls hide timer
         self._hide_controls_timer = QTimer(self)
         self._hide_controls_timer.setSingleShot(True)
@@ -3963,9 +9371,11 @@ class PlayerWindow(QMainWindow):
         """Handle duration changes."""
         try:
             if value is None:
-                self._last_duration = None
+                # Between files: keep the cached duration hint for the file being opened.
+                self._last_duration = getattr(self, "_meta_duration_hint", None)
             else:
                 self._last_duration = float(value)
+                self._meta_live_update("duration", float(value))
         except Exception:
             pass
 
@@ -4052,6 +9462,7 @@ class PlayerWindow(QMainWindow):
             # BUILD22: track current selection for persistence
             self._last_sid = value
             QTimer.singleShot(0, self, lambda v=value: self._emit_sid_toast(v))
+            QTimer.singleShot(0, self, self._request_cue_index)
         except Exception:
             pass
 
@@ -4081,6 +9492,9 @@ class PlayerWindow(QMainWindow):
             label = self._format_audio_track_label(value)
             txt = f"♪ {label}" if label else '♪'
             self.toast.show_toast(txt)
+            # A user switch that didn't go through the tracks drawer (A / Alt+A cycling).
+            if value not in (None, 'no', False):
+                self._learn_track_pick("audio", value)
             try:
                 if self.tracks_drawer.is_open():
                     self._refresh_track_lists()
@@ -4101,12 +9515,15 @@ class PlayerWindow(QMainWindow):
             if value == getattr(self, '_last_sid', None):
                 return
             self._last_sid = value
-            if value in (None, 'no', 0, '0', False):
+            off = value in (None, 'no', 0, '0', False)
+            if off:
                 txt = 'CC ⦸'
             else:
                 label = self._format_subtitle_track_label(value)
                 txt = f"CC {label}" if label else 'CC'
             self.toast.show_toast(txt)
+            # A user switch that didn't go through the tracks drawer (S / Alt+L cycling).
+            self._learn_track_pick("sub", None if off else value)
             try:
                 if self.tracks_drawer.is_open():
                     self._refresh_track_lists()
@@ -4130,13 +9547,148 @@ class PlayerWindow(QMainWindow):
                         continue
             ch = [t for t in ch if t >= 0.0]
             ch.sort()
+            if _name is not None and not ch and getattr(self, "_meta_live", None) is not None and "chapters" not in self._meta_live:
+                # mpv reports an empty list while a new file opens; keep cached markers until it knows.
+                if getattr(self, "_chapter_times", None):
+                    return
             self._chapter_times = ch
             try:
-                self.bottom_hud.set_chapters(ch)
+                self.bottom_hud.set_chapters(ch or getattr(self, "_scene_chapters", []))
             except Exception:
                 pass
+            if _name is not None and isinstance(value, list) and value:
+                self._meta_live_update("chapters", [
+                    {"time": float(c.get('time') or 0.0), "title": str(c.get('title') or "")}
+                    for c in value if isinstance(c, dict)
+                ])
+        except Exception:
+            return
+
+    # ========== Cached file metadata (instant tracks/chapters on open) ==========
+
+    def _apply_cached_metadata(self, path: Path):
+        """Render tracks/chapters/duration from the probe cache before mpv has parsed the file."""
+        self._meta_cached = None
+        self._meta_live = {}
+        self._meta_path = str(path)
+        self._meta_duration_hint = None
+        try:
+            meta = _probe_cache_store().get(str(path), allow_partial=True)
         except Exception:
+            meta = None
+        if not meta:
+            return False
+        self._meta_cached = meta
+        try:
+            dur = float(meta.get("duration") or 0.0)
+            if dur > 0:
+                self._meta_duration_hint = dur
+                self._last_duration = dur
+        except Exception:
+            pass
+        try:
+            chapters = meta.get("chapters") or []
+            if chapters:
+                self._on_chapter_list(None, chapters)
+        except Exception:
+            pass
+        try:
+            tracks = [dict(t) for t in (meta.get("tracks") or [])]
+            self._track_plan = self._plan_tracks(tracks)
+            self._track_plan_path = str(path)
+            for kind in ("audio", "sub"):
+                group = [t for t in tracks if t.get("type") == kind]
+                want = self._track_plan.get(kind)
+                pick = next((t for t in group if want and str(t.get("id")) == want), None)
+                if pick is None and want is None:
+                    pick = next((t for t in group if t.get("default") or t.get("forced")), None)
+                if pick is None and kind == "audio" and group:
+                    pick = group[0]
+                for t in group:
+                    t["selected"] = t is pick
+            self._refresh_track_lists(tracks)
+        except Exception as e:
+            print(f"Cached metadata error: {e}")
+        return True
+
+    def _on_track_list(self, _name, value):
+        """mpv track-list observer (mpv thread): refresh drawers and reconcile the cache on the Qt thread."""
+        if not isinstance(value, list):
             return
+        tracks = [dict(t) for t in value if isinstance(t, dict)]
+
+        def _apply():
+            try:
+                if tracks:
+                    self._refresh_track_lists(tracks)
+                    self._meta_live_update("tracks", [_probe_track(t) for t in tracks if not t.get("external")])
+                    self._request_cue_index(tracks)
+            except Exception:
+                pass
+
+        try:
+            QTimer.singleShot(0, self, _apply)
+        except Exception:
+            pass
+
+    def _meta_live_update(self, field: str, value: Any):
+        """Collect authoritative metadata from mpv (any thread); reconcile once it settles."""
+        def _store():
+            try:
+                live = getattr(self, "_meta_live", None)
+                if live is None:
+                    return
+                live[field] = value
+                timer = getattr(self, "_meta_reconcile_timer", None)
+                if timer is None:
+                    timer = QTimer(self)
+                    timer.setSingleShot(True)
+                    timer.setInterval(1500)
+                    timer.timeout.connect(self._reconcile_cached_metadata)
+                    self._meta_reconcile_timer = timer
+                timer.start()
+            except Exception:
+                pass
+
+        try:
+            QTimer.singleShot(0, self, _store)
+        except Exception:
+            pass
+
+    def _reconcile_cached_metadata(self):
+        """Refresh the probe cache if mpv's view of the file differs from what was cached."""
+        try:
+            live = getattr(self, "_meta_live", None)
+            path = getattr(self, "_meta_path", "")
+            if not live or "tracks" not in live or not path or str(self._file_path) != path:
+                return
+            cached = getattr(self, "_meta_cached", None) or {}
+            tracks = live.get("tracks") or []
+            video = next((t for t in tracks if t.get("type") == "video" and not t.get("albumart")), None)
+            info = dict(cached)
+            info.update({
+                "v": _PROBE_VERSION,
+                "duration": float(live.get("duration") or cached.get("duration") or 0.0),
+                "video_codec": (video or {}).get("codec"),
+                "width": (video or {}).get("w"),
+                "height": (video or {}).get("h"),
+                "fps": (video or {}).get("fps"),
+                "audio": [t for t in tracks if t.get("type") == "audio"],
+                "subtitles": [t for t in tracks if t.get("type") == "sub"],
+                "tracks": tracks,
+                "chapters": live.get("chapters", cached.get("chapters") or []),
+            })
+            if not cached:
+                # Built from playback, not a probe: --probe and the search indexer must not take it as a hit.
+                info["partial"] = True
+                info.setdefault("container", "")
+            keys = ("duration", "tracks", "chapters")
+            if cached and all(cached.get(k) == info.get(k) for k in keys):
+                return
+            self._meta_cached = info
+            threading.Thread(target=_probe_cache_store().put, args=(path, info), daemon=True).start()
+        except Exception as e:
+            print(f"Metadata reconcile error: {e}")
 
     
     def _on_pause_change(self, _name, value):
@@ -4218,12 +9770,17 @@ class PlayerWindow(QMainWindow):
                             dt = float(now_m) - float(last_wall)
                             dpos = float(pos_f) - float(last_pos)
                             if dt > 0 and dpos > 0:
-                                sp = float(getattr(self, "_speed", 1.0) or 1.0)
+                                sp = self._effective_speed()
                                 speed = sp if sp > 0 else 1.0
                                 max_count = max(3.0, (dt * speed * 1.75) + 1.0)
                                 # Large jumps are almost certainly seeks/scrubs — don't count as watched time.
                                 if dpos <= max_count:
                                     self._watched_time += dpos
+                                    self._history_extend_segment(float(last_pos), float(pos_f), dpos)
+                                else:
+                                    self._history_close_segment()
+                            elif dpos < 0:
+                                self._history_close_segment()
                         except Exception:
                             pass
 
@@ -4234,6 +9791,10 @@ class PlayerWindow(QMainWindow):
                     except Exception:
                         pass
 
+            self._update_skip_segment(pos)
+            self._smart_speed_tick(pos)
+            self._transcript_tick(pos)
+
             # Update diagnostics if visible (best-effort)
             if self._info_visible:
                 self._update_diagnostics()
@@ -4251,10 +9812,36 @@ class PlayerWindow(QMainWindow):
                 "Quality": self._quality_mode,
                 "Speed": f"{self._speed}x",
             }
+            loud = getattr(self, "_loudness", None)
+            if loud:
+                info["Loudness"] = f"{float(loud['integrated']):.1f} LUFS ({getattr(self, '_loudness_gain_applied', 0.0):+.1f} dB)"
+            cx = getattr(self, "_ass_complexity", None)
+            if cx:
+                ops = cx.get("ops") or {}
+                info["ASS"] = (f"{'heavy' if cx.get('heavy') else 'light'} · {cx.get('events', 0)} ev, peak {cx.get('peak', 0)}, "
+                               f"\\t {ops.get('transform', 0)} \\clip {ops.get('clip', 0)} \\move {ops.get('move', 0)}, "
+                               f"{cx.get('fonts', 0)} fonts" + (" → perf mode" if getattr(self, "_sub_perf_mode", False) else ""))
+            cost = self._subtitle_render_cost()
+            if cost is not None:
+                info["Sub Render"] = f"{cost:.2f} ms/frame"
             self.diagnostics.update_diagnostics(info)
         except Exception:
             pass
     
+    def _subtitle_render_cost(self) -> Optional[float]:
+        """Average per-frame GPU time (ms) of the VO's subtitle/OSD overlay passes, if the VO reports passes."""
+        try:
+            passes = self._mpv.vo_passes or {}
+            total, seen = 0.0, False
+            for p in passes.get("fresh") or []:
+                desc = str(p.get("desc") or "").lower()
+                if "osd" in desc or "overlay" in desc or "sub" in desc:
+                    total += float(p.get("avg") or 0) / 1e6
+                    seen = True
+            return total if seen else None
+        except Exception:
+            return None
+
     # ========== Controls Visibility ==========
 
     def _show_cursor(self):
@@ -4316,6 +9903,8 @@ class PlayerWindow(QMainWindow):
                 return True
             if hasattr(self, 'playlist_drawer') and self.playlist_drawer and self.playlist_drawer.is_open():
                 return True
+            if hasattr(self, 'transcript_drawer') and self.transcript_drawer and self.transcript_drawer.is_open():
+                return True
             # Compact popovers (audio/subtitles)
             if getattr(self, 'audio_popover', None) and self.audio_popover.isVisible():
                 return True
@@ -4447,11 +10036,38 @@ class PlayerWindow(QMainWindow):
                 self.bottom_hud.set_chapters([])
             except Exception:
                 pass
+            self._history_end_session("switch")
+
+            # Standalone launches resume from the local store
+            if not (start_at and start_at > 0) and not self._progress_file:
+                start_at = self._standalone_resume_position(path)
+
+            # Track rules resolve against the cached probe, so mpv opens the right tracks;
+            # the file-loaded callback re-checks them against the real track list.
+            self._track_prefs = self._show_track_prefs()
+            self._track_plan, self._track_plan_path = {}, str(path)
+            if getattr(self, "_prefer_external_subs", None) is None and self._track_prefs.rules.get("sub"):
+                self._prefer_external_subs = any(r.get("external") for r in self._track_prefs.rules["sub"])
+            if not getattr(self, "_last_sub_lang", ""):
+                self._last_sub_lang = self._track_prefs.language("sub")
+            self._apply_sub_visibility_pref()
+
+            # Cached probe: tracks/chapters/duration render before mpv has parsed the file
+            have_meta = self._apply_cached_metadata(path)
+
             # Build 19: set pending initial seek (best-effort) before/after load
             self._pending_initial_seek = float(start_at) if start_at and start_at > 0 else None
             self._initial_seek_attempts = 0
 
-            self._mpv.loadfile(str(path))
+            # Frame size of the new file arrives through the video-params observer.
+            self._video_dims = None
+
+            opts = {}
+            if self._track_plan.get("audio"):
+                opts["aid"] = self._track_plan["audio"]
+            if self._track_plan.get("sub"):
+                opts["sid"] = self._track_plan["sub"]
+            self._mpv.loadfile(str(path), **opts)
             if start_at > 0:
                 try:
                     self._mpv.command('seek', str(start_at), 'absolute')
@@ -4476,73 +10092,122 @@ class PlayerWindow(QMainWindow):
                 self.top_strip.set_title(path.name)
             except Exception:
                 pass
-            self._refresh_track_lists()
+            if not have_meta:
+                self._refresh_track_lists()
             try:
                 self._arm_track_toasts_after_load()
             except Exception:
                 pass
 
-            # BUILD22: Apply persisted track preferences after load (best-effort)
-            try:
-                QTimer.singleShot(250, self, self._apply_track_prefs_after_load)
-            except Exception:
-                pass
+            self._discover_sidecar_subtitles(path)
+            self._refresh_show_index()
+            self._request_season_segments()
+            self._compute_content_fingerprint(path)
+            self._history_start_session(path)
             
         except Exception as e:
             print(f"Load file error: {e}")
 
-    def _apply_track_prefs_after_load(self):
-        """Apply preferred audio/subtitle selections (best-effort)."""
+    def _show_track_prefs(self) -> TrackPreferences:
+        key = str(self._show_id or "") or os.path.normcase(str(self._show_root_path or self._file_path.parent))
+        cur = getattr(self, "_track_prefs", None)
+        if cur is not None and cur.key == key:
+            return cur
+        return TrackPreferences.load(key)
+
+    def _plan_tracks(self, tracks: List[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+        """Resolve audio/sub ids for `tracks`: this file's own saved ids first, then the show's rules."""
+        plan = {"audio": None, "sub": None}
+        try:
+            prefs = getattr(self, "_track_prefs", None)
+            if prefs is not None:
+                plan.update(prefs.pick(tracks))
+            ids = {(t.get("type"), str(t.get("id"))) for t in tracks}
+            for kind, pref in (("audio", self._pref_aid), ("sub", self._pref_sid)):
+                pref = str(pref or "").strip()
+                if pref == "no" and kind == "sub":
+                    plan[kind] = "no"
+                elif pref and (kind, pref) in ids:
+                    plan[kind] = pref
+        except Exception as e:
+            print(f"Track plan error: {e}")
+        return plan
+
+    def _on_file_loaded(self, _event=None):
+        """mpv event thread: apply the track plan as soon as the real track list exists."""
         try:
-            if not getattr(self, '_mpv', None):
+            if self._track_plan_path != str(self._file_path):
                 return
-            aid = str(getattr(self, '_pref_aid', '') or '').strip()
-            sid = str(getattr(self, '_pref_sid', '') or '').strip()
-            subv_raw = str(getattr(self, '_pref_sub_visibility', '') or '').strip().lower()
-
-            if aid:
-                try:
-                    self._suppress_next_aid_toast = True
-                except Exception:
-                    pass
-                try:
-                    self._mpv.command('set', 'aid', aid)
-                except Exception:
-                    try:
-                        self._mpv.aid = aid
-                    except Exception:
-                        pass
+            self._apply_track_plan(self._mpv.track_list or [])
+            prefs = self._track_prefs
+            if prefs is not None and prefs.dirty:
+                QTimer.singleShot(0, self, prefs.save)
+        except Exception as e:
+            print(f"File-loaded track selection error: {e}")
 
-            if sid:
+    def _apply_track_plan(self, tracks: Optional[List[Dict[str, Any]]] = None):
+        """Select the planned audio/sub tracks where mpv's current choice differs."""
+        if not getattr(self, '_mpv', None):
+            return
+        tracks = [dict(t) for t in (tracks if tracks is not None else (self._mpv.track_list or [])) if isinstance(t, dict)]
+        if not tracks:
+            return
+        plan = self._plan_tracks(tracks)
+        self._track_plan = plan
+        current = {k: next((str(t.get("id")) for t in tracks if t.get("type") == k and t.get("selected")), "no")
+                   for k in ("audio", "sub")}
+        for kind, prop, flag in (("audio", "aid", "_suppress_next_aid_toast"), ("sub", "sid", "_suppress_next_sid_toast")):
+            want = plan.get(kind)
+            if not want or want == current[kind]:
+                continue
+            setattr(self, flag, True)
+            try:
+                self._mpv.command('set', prop, want)
+            except Exception:
                 try:
-                    self._suppress_next_sid_toast = True
+                    setattr(self._mpv, prop, want)
                 except Exception:
                     pass
-                try:
-                    self._mpv.command('set', 'sid', sid)
-                except Exception:
-                    try:
-                        self._mpv.sid = sid
-                    except Exception:
-                        pass
 
-            if subv_raw:
-                want = subv_raw in ('1', 'true', 'yes', 'on')
-                try:
-                    self._mpv.command('set', 'sub-visibility', 'yes' if want else 'no')
-                except Exception:
-                    try:
-                        self._mpv.sub_visibility = want
-                    except Exception:
-                        pass
+    def _apply_sub_visibility_pref(self):
+        subv_raw = str(getattr(self, '_pref_sub_visibility', '') or '').strip().lower()
+        if not subv_raw:
+            return
+        want = subv_raw in ('1', 'true', 'yes', 'on')
+        try:
+            self._mpv.command('set', 'sub-visibility', 'yes' if want else 'no')
         except Exception:
-            pass
-    
-    def _load_episode_at_index(self, index: int):
-        """Load episode from playlist."""
+            try:
+                self._mpv.sub_visibility = want
+            except Exception:
+                pass
+
+    def _learn_track_pick(self, kind: str, track_id: Optional[int]):
+        """Remember an explicit audio/subtitle pick as this show's rules (None = subtitles off)."""
+        try:
+            prefs = self._show_track_prefs()
+            self._track_prefs = prefs
+            tracks = [dict(t) for t in (self._mpv.track_list or []) if isinstance(t, dict)]
+            chosen = None
+            if track_id is not None:
+                chosen = next((t for t in tracks if t.get("type") == kind and str(t.get("id")) == str(track_id)), None)
+                if chosen is None:
+                    return
+            prefs.learn(kind, chosen, tracks)
+            if kind == "sub":
+                self._prefer_external_subs = bool(chosen and chosen.get("external"))
+                self._last_sub_lang = str((chosen or {}).get("lang") or "")
+            if prefs.dirty:
+                prefs.save()
+        except Exception as e:
+            print(f"Track prefs error: {e}")
+
+    def _load_episode_at_index(self, index: int, write_progress: bool = True, start_at: float = 0.0):
+        """Load episode from playlist (optionally starting at `start_at` seconds)."""
         try:
             if 0 <= index < len(self._playlist):
-                self._write_progress("episode_change")
+                if write_progress:
+                    self._write_progress("episode_change")
                 self._playlist_index = index
 
                 # Keep videoId aligned to the playlist item (so the library can persist progress per-episode)
@@ -4556,17 +10221,18 @@ class PlayerWindow(QMainWindow):
 
                 new_path = Path(self._playlist[index])
                 self._file_path = new_path
-                # BUILD22: Carry user-selected track prefs across episode changes (best-effort)
+                # Track ids don't carry across episodes (numbering differs); the show's rules pick instead.
                 try:
-                    if getattr(self, '_last_aid', None) is not None:
-                        self._pref_aid = str(getattr(self, '_last_aid'))
-                    if getattr(self, '_last_sid', None) is not None:
-                        self._pref_sid = str(getattr(self, '_last_sid'))
+                    self._pref_aid = self._pref_sid = ''
+                    # A sidecar pick follows the next episode's own sidecar.
+                    cur_sub = self._current_sub_track()
+                    self._prefer_external_subs = bool(cur_sub and cur_sub.get('external'))
+                    self._last_sub_lang = str((cur_sub or {}).get('lang') or "")
                     if getattr(self, '_last_sub_visibility', None) is not None:
                         self._pref_sub_visibility = 'yes' if bool(getattr(self, '_last_sub_visibility')) else 'no'
                 except Exception:
                     pass
-                self._load_file(new_path, 0.0)
+                self._load_file(new_path, start_at)
                 
                 # Update playlist drawer if open
                 if hasattr(self, 'playlist_drawer') and self.playlist_drawer.is_open():
@@ -4603,11 +10269,33 @@ class PlayerWindow(QMainWindow):
             pass
     
     def _on_seek_requested(self, fraction: float):
-        """Handle seek from scrubber."""
+        """Handle seek from scrubber.
+
+        While the handle is held, moves are coalesced into keyframe seeks (one
+        per timer interval, latest position wins); the exact, scene-snapped
+        seek is issued once when the handle is released or for a plain click.
+        """
         try:
             dur = self._mpv.duration
             if dur and dur > 0:
                 target = max(0.0, min(dur, fraction * dur))
+                scrub = getattr(getattr(self, "bottom_hud", None), "scrub", None)
+                timer = getattr(self, "_scrub_seek_timer", None)
+                if timer is not None and scrub is not None and scrub.isSliderDown():
+                    if timer.isActive():
+                        self._scrub_target = target
+                    else:
+                        self._scrub_target = None
+                        self._mpv.command('seek', f"{target:.3f}", 'absolute+keyframes')
+                        timer.start()
+                    return
+                if timer is not None:
+                    timer.stop()
+                self._scrub_target = None
+                snapped = self._snap_to_scene(target)
+                if snapped != target:
+                    self._mpv.command('seek', f"{snapped:.3f}", 'absolute+exact')
+                    return
                 self._mpv.command('seek', str(target), 'absolute')
         except Exception:
             pass
@@ -4659,7 +10347,8 @@ class PlayerWindow(QMainWindow):
         """Set playback speed."""
         try:
             self._speed = speed
-            self._mpv.speed = speed
+            self._mpv.speed = self._effective_speed()
+            self._history_event("speed", v=float(speed))
             self.bottom_hud.set_speed_label(speed)
             try:
                 self.toast.show_toast(f"Speed {speed:.2f}×")
@@ -4875,6 +10564,9 @@ class PlayerWindow(QMainWindow):
             if hasattr(self, 'playlist_drawer') and self.playlist_drawer and self.playlist_drawer.is_open():
                 self.playlist_drawer.close(self.width())
                 dismissed = True
+            if hasattr(self, 'transcript_drawer') and self.transcript_drawer and self.transcript_drawer.is_open():
+                self.transcript_drawer.close(self.width())
+                dismissed = True
 
             if dismissed:
                 try:
@@ -4887,12 +10579,32 @@ class PlayerWindow(QMainWindow):
                     pass
             return dismissed
         except Exception:
-            return False
+            return False
+
+    def _toggle_transcript_drawer(self):
+        """Toggle the subtitle transcript drawer (left side)."""
+        try:
+            self._request_cue_index(build=True)
+            self._show_transcript()
+            self.transcript_drawer.toggle(self.width())
+            if self.transcript_drawer.is_open():
+                self._ensure_subtitle_indexer()
+            try:
+                self._set_controls_visible(True)
+            except Exception:
+                pass
+            try:
+                self._arm_controls_autohide()
+            except Exception:
+                pass
+        except Exception:
+            pass
 
     def _populate_playlist_drawer(self):
         try:
-            episodes = [{'path': p, 'name': Path(p).name} for p in self._playlist]
-            self.playlist_drawer.populate_playlist(str(self._show_root_path), episodes, self._playlist_index)
+            # Bind the playlist list itself (no per-episode dicts); the drawer's model
+            # resets only when the list object changes, otherwise it just moves the marker.
+            self.playlist_drawer.set_playlist(str(self._show_root_path), self._playlist, self._playlist_index)
             # Keep checkbox in sync
             try:
                 self.playlist_drawer.auto_advance.blockSignals(True)
@@ -4952,9 +10664,12 @@ class PlayerWindow(QMainWindow):
                 ("1:1", "1:1"),
                 ("9:16", "9:16"),
                 ("3:2", "3:2"),
+                ("Auto crop", "auto-crop"),
             ]
 
             cur = str(getattr(self._mpv, 'video_aspect_override', '-1') or '-1')
+            if getattr(self, "_auto_crop", False):
+                cur = "auto-crop"
             for label, val in presets:
                 a = m.addAction(label)
                 a.setCheckable(True)
@@ -5270,191 +10985,1105 @@ class PlayerWindow(QMainWindow):
                 if btn:
                     btn.setFocus(Qt.FocusReason.ActiveWindowFocusReason)
 
-            # Keep focus/hotkeys stable
+            # Keep focus/hotkeys stable
+            try:
+                self.activateWindow()
+                self.raise_()
+                self.setFocus(Qt.FocusReason.ActiveWindowFocusReason)
+                self.grabKeyboard()
+            except Exception:
+                pass
+        except Exception:
+            pass
+
+    def _show_audio_tracks_panel(self):
+        try:
+            self._open_tracks_focus("audio")
+        except Exception:
+            pass
+
+    def _show_subtitle_tracks_panel(self):
+        try:
+            self._open_tracks_focus("subtitles")
+        except Exception:
+            pass
+
+    def _show_audio_delay_panel(self):
+        try:
+            self._open_tracks_focus("audio_delay")
+        except Exception:
+            pass
+
+    def _show_subtitle_delay_panel(self):
+        try:
+            self._open_tracks_focus("subtitle_delay")
+        except Exception:
+            pass
+
+    def _show_aspect_ratio_panel(self):
+        try:
+            self._open_tracks_focus("aspect")
+        except Exception:
+            pass
+    
+    def _show_tracks_panel(self):
+        """Show tracks drawer (compat)."""
+        try:
+            self._toggle_tracks_drawer()
+        except Exception:
+            pass
+    
+    def _refresh_track_lists(self, track_list: Optional[List[Dict[str, Any]]] = None):
+        """Refresh track lists from MPV (or from a given track list carrying 'selected' flags)."""
+        try:
+            if track_list is None:
+                track_list = self._mpv.track_list or []
+                current_aid = self._mpv.aid
+                current_sid = self._mpv.sid
+            else:
+                current_aid = next((t.get('id') for t in track_list if t.get('type') == 'audio' and t.get('selected')), None)
+                current_sid = next((t.get('id') for t in track_list if t.get('type') == 'sub' and t.get('selected')), None)
+
+            # Audio tracks
+            audio_tracks = []
+            
+            for track in track_list:
+                if track.get('type') == 'audio':
+                    audio_tracks.append({
+                        'id': track.get('id'),
+                        'lang': track.get('lang', 'und'),
+                        'title': track.get('title', ''),
+                        'selected': track.get('id') == current_aid,
+                    })
+            
+            self.tracks_drawer.populate_audio_tracks(audio_tracks)
+            
+            # Subtitle tracks
+            subtitle_tracks = []
+            
+            for track in track_list:
+                if track.get('type') == 'sub':
+                    subtitle_tracks.append({
+                        'id': track.get('id'),
+                        'lang': track.get('lang', 'und'),
+                        'title': track.get('title', ''),
+                        'selected': track.get('id') == current_sid,
+                    })
+            
+            self.tracks_drawer.populate_subtitle_tracks(subtitle_tracks)
+            
+        except Exception as e:
+            print(f"Refresh track lists error: {e}")
+    
+    def _track_switch_changes(self, prop: str, want) -> bool:
+        """True when setting aid/sid to `want` changes it, i.e. mpv will report a change that consumes a suppress flag."""
+        def _norm(v):
+            return 'no' if v in (None, 'no', False, -1, '-1') else str(v)
+
+        try:
+            cur = getattr(self._mpv, prop)
+        except Exception:
+            cur = getattr(self, f"_last_{prop}", None)
+        return _norm(cur) != _norm(want)
+
+    def _select_audio_track(self, track_id: int):
+        """Select audio track."""
+        try:
+            if self._track_switch_changes('aid', track_id):
+                self._suppress_next_aid_toast = True
+            self._mpv.aid = track_id
+            self._learn_track_pick("audio", track_id)
+            try:
+                label = self._format_audio_track_label(track_id)
+                self.toast.show_toast(f"♪ {label}" if label else '♪')
+            except Exception:
+                pass
+            try:
+                self._refresh_track_lists()
+            except Exception:
+                pass
+        except Exception:
+            pass
+    
+    def _select_subtitle_track(self, track_id: int):
+        """Select subtitle track (-1 for none)."""
+        try:
+            if self._track_switch_changes('sid', track_id):
+                self._suppress_next_sid_toast = True
+            self._learn_track_pick("sub", None if track_id == -1 else track_id)
+            if track_id == -1:
+                self._mpv.sid = 'no'
+                try:
+                    self.toast.show_toast('CC ⦸')
+                except Exception:
+                    pass
+            else:
+                self._mpv.sid = track_id
+                try:
+                    label = self._format_subtitle_track_label(track_id)
+                    self.toast.show_toast(f"CC {label}" if label else 'CC')
+                except Exception:
+                    pass
+            try:
+                self._refresh_track_lists()
+            except Exception:
+                pass
+        except Exception:
+            pass
+    
+    def _load_external_subtitle(self):
+        """Load external subtitle file."""
+        try:
+            file_path, _ = QFileDialog.getOpenFileName(
+                self,
+                "Select Subtitle File",
+                str(self._file_path.parent),
+                "Subtitle Files (*.srt *.ass *.ssa *.sub);;All Files (*.*)"
+            )
+            if file_path:
+                self._ingest_subtitles(str(self._file_path), [file_path], select=True)
+        except Exception as e:
+            print(f"Load external subtitle error: {e}")
+
+    def _discover_sidecar_subtitles(self, path: Path):
+        """Find subtitle files named after the video and ingest them in the background."""
+        video = str(path)
+
+        def _work():
+            subs = sidecar_subtitles(video)
+            if subs:
+                QTimer.singleShot(0, self, lambda: self._ingest_subtitles(
+                    video, subs, select=bool(getattr(self, "_prefer_external_subs", None)), announce=False))
+
+        threading.Thread(target=_work, name="sidecars", daemon=True).start()
+
+    def _ingest_subtitles(self, video: str, paths: List[str], select: bool = False, announce: bool = True):
+        """Charset-normalize/validate subtitle files on a worker, then hand them to mpv asynchronously."""
+        lang_hint = str(getattr(self, "_last_sub_lang", "") or "").lower()
+
+        def _work():
+            results, errors = [], []
+            for p in paths:
+                try:
+                    results.append(ingest_subtitle(p))
+                except Exception as e:
+                    errors.append(f"{Path(p).name}: {e}")
+            if lang_hint:
+                results.sort(key=lambda r: _sidecar_language(video, r["source"]).lower() != lang_hint)
+
+            def _apply():
+                if str(self._file_path) != video:
+                    return
+                if select and results:
+                    # Not a user pick: keep the new selection out of the toast/learning path.
+                    self._suppress_next_sid_toast = True
+                for n, r in enumerate(results):
+                    flag = 'select' if (select and n == 0) else 'auto'
+                    title = Path(r["source"]).name
+                    try:
+                        self._mpv.command_async('sub-add', r["path"], flag, title, _sidecar_language(video, r["source"]))
+                    except Exception as e:
+                        errors.append(f"{title}: {e}")
+                if announce:
+                    if results:
+                        enc = results[0].get("encoding") or ""
+                        note = f" ({enc})" if enc and not enc.startswith("utf") else ""
+                        self.toast.show_toast(f"Subtitle loaded{note}")
+                    elif errors:
+                        self.toast.show_toast(f"Subtitle rejected: {errors[0]}")
+                for err in errors:
+                    print(f"Subtitle ingest error: {err}")
+
+            try:
+                QTimer.singleShot(0, self, _apply)
+            except Exception:
+                pass
+
+        threading.Thread(target=_work, name="subingest", daemon=True).start()
+    
+    def _set_audio_delay(self, delay: float):
+        """Set audio delay."""
+        try:
+            self._mpv.audio_delay = delay
+            self._audio_delay = float(delay)
+        except Exception:
+            pass
+    
+    def _set_subtitle_delay(self, delay: float):
+        """Set subtitle delay."""
+        try:
+            self._mpv.sub_delay = delay
+            self._sub_delay = float(delay)
+        except Exception:
+            pass
+
+    def _current_sub_track(self) -> Optional[Dict[str, Any]]:
+        try:
+            for t in (self._mpv.track_list or []):
+                if isinstance(t, dict) and t.get('type') == 'sub' and t.get('selected'):
+                    return t
+        except Exception:
+            pass
+        return None
+
+    def _auto_sync_subtitles(self):
+        """Estimate the subtitle delay from speech in the audio and apply it (cached per file + track)."""
+        if np is None or mpv is None:
+            self.toast.show_toast("Auto-sync unavailable (numpy/mpv missing)")
+            return
+        track = self._current_sub_track()
+        if not track:
+            self.toast.show_toast("No subtitle track selected")
+            return
+        if getattr(self, "_subsync_busy", False):
+            return
+        path = str(self._file_path)
+        ident = subtitle_track_ident(track)
+        self._subsync_busy = True
+        self.toast.show_toast("Syncing subtitles…", 2500)
+
+        def _work():
+            offset, conf, err = None, 0.0, ""
+            try:
+                fp = _fingerprints().get(path)
+                key = hashlib.sha1(f"{fp}|{ident}|v{_SUBSYNC_VERSION}".encode("utf-8")).hexdigest()
+                cache = _player_cache_dir("subsync") / f"{key}.json"
+                hit = read_json(cache, None)
+                if isinstance(hit, dict) and "offset" in hit:
+                    offset, conf = float(hit["offset"]), float(hit.get("confidence") or 0.0)
+                else:
+                    cue_index = getattr(self, "_cue_index", None)
+                    if cue_index is not None and getattr(self, "_cue_key", None) == (path, ident):
+                        cues = list(zip(cue_index.starts, cue_index.ends))
+                    else:
+                        cues = subtitle_track_cues(path, fp, track)
+                    if len(cues) < 10:
+                        err = "too few subtitle lines"
+                    else:
+                        vad = speech_activity(path, fp)
+                        offset, conf = estimate_subtitle_offset(vad, rasterize_cues(cues, len(vad)))
+                        if conf < 4.0:
+                            err, offset = "no clear match", None
+                        else:
+                            atomic_write_json(cache, {"offset": offset, "confidence": conf, "cues": len(cues)})
+            except Exception as e:
+                err = str(e)
+
+            def _apply():
+                self._subsync_busy = False
+                if str(self._file_path) != path:
+                    return
+                if offset is None:
+                    self.toast.show_toast(f"Auto-sync failed: {err}" if err else "Auto-sync failed")
+                    return
+                self._set_subtitle_delay(offset)
+                self.toast.show_toast(f"Subtitles synced: {offset:+.2f}s")
+
+            try:
+                QTimer.singleShot(0, self, _apply)
+            except Exception:
+                pass
+
+        threading.Thread(target=_work, name="subsync", daemon=True).start()
+
+    # ========== Subtitle cue index ==========
+
+    def _request_cue_index(self, tracks: Optional[List[Dict[str, Any]]] = None, build: bool = False):
+        """Track the selected subtitle track; read its lines only when they're used.
+
+        Track changes just reset the index. The read happens on `build`
+        (transcript, line navigation) or while the transcript is open, so a
+        file nobody navigates by line never has its subtitles extracted.
+        """
+        try:
+            track = None
+            for t in (tracks if tracks is not None else (self._mpv.track_list or [])):
+                if isinstance(t, dict) and t.get('type') == 'sub' and t.get('selected'):
+                    track = dict(t)
+                    break
+            path = str(self._file_path)
+            key = (path, subtitle_track_ident(track)) if track else None
+            if key != self._cue_key:
+                self._cue_key = key
+                self._cue_index = None
+                self._cue_building = None
+                self._request_ass_complexity(key, track)
+                self._cue_status = "" if key is not None else "No subtitle track selected."
+                if key is None:
+                    self._show_transcript()
+            if key is None:
+                return
+            ext = bool(track.get('external-filename'))
+            if not ext and str(track.get('codec') or "") in _BITMAP_SUB_CODECS:
+                self._cue_status = "Image-based subtitles have no text transcript."
+                self._show_transcript()
+                return
+            if not build:
+                try:
+                    build = self.transcript_drawer.is_open()
+                except Exception:
+                    build = False
+            if not build or self._cue_index is not None or self._cue_building == key:
+                return
+            self._cue_building = key
+            self._cue_status = "Reading subtitles…" if ext else "Extracting subtitles in the background…"
+            self._show_transcript()
+            fp = self._content_fp
+
+            def _work():
+                cues: List[Tuple[float, float, str]] = []
+                try:
+                    cues = subtitle_track_cues(path, fp, track)
+                    index, status = SubtitleCueIndex(cues), ""
+                except Exception as e:
+                    index, status = None, f"Subtitle read failed: {e}"
+
+                def _apply():
+                    if self._cue_key != key:
+                        return
+                    self._cue_building = None
+                    self._cue_index, self._cue_status = index, status
+                    if not fp and not ext and cues:
+                        # Read before the fingerprint was known: cache once it is.
+                        self._cue_unsaved = (path, track, cues)
+                        self._save_unsaved_cues(path, self._content_fp)
+                    self._show_transcript()
+
+                try:
+                    QTimer.singleShot(0, self, _apply)
+                except Exception:
+                    pass
+
+            threading.Thread(target=_work, name="subcues", daemon=True).start()
+        except Exception as e:
+            print(f"Cue index error: {e}")
+
+    def _save_unsaved_cues(self, path: str, fp: Optional[str]):
+        """Write cues extracted without a fingerprint to the cache now that `fp` is known."""
+        pending = getattr(self, "_cue_unsaved", None)
+        if not fp or pending is None:
+            return
+        self._cue_unsaved = None
+        if pending[0] != str(path):
+            return
+        threading.Thread(target=lambda: save_subtitle_track_cues(fp, pending[1], pending[2]),
+                         name="subcues-save", daemon=True).start()
+
+    def _request_ass_complexity(self, key: Optional[Tuple[str, str]], track: Optional[Dict[str, Any]]):
+        """Measure the selected ASS track's typesetting load in the background; heavy scripts get the perf mode."""
+        self._ass_complexity = None
+        self._set_subtitle_perf_mode(False)
+        if key is None or not track:
+            return
+        is_ass = Path(str(track.get('external-filename') or "")).suffix.lower() in (".ass", ".ssa") or \
+            str(track.get('codec') or "").lower() in ("ass", "ssa")
+        if not is_ass:
+            return
+        path, fp = key[0], self._content_fp
+
+        def _work():
+            try:
+                result = subtitle_track_complexity(path, fp, track)
+            except Exception as e:
+                print(f"ASS complexity error: {e}")
+                return
+
+            def _apply():
+                if self._cue_key != key or not result:
+                    return
+                self._ass_complexity = result
+                if result.get("heavy"):
+                    self._set_subtitle_perf_mode(True)
+                    self.toast.show_toast("Heavy typesetting: subtitle performance mode")
+
+            try:
+                QTimer.singleShot(0, self, _apply)
+            except Exception:
+                pass
+
+        threading.Thread(target=_work, name="asscx", daemon=True).start()
+
+    def _set_subtitle_perf_mode(self, on: bool):
+        """Cheaper subtitle rendering for heavy ASS: blend at video resolution and keep the script's own layout."""
+        on = bool(on)
+        if on == bool(getattr(self, "_sub_perf_mode", False)):
+            return
+        self._sub_perf_mode = on
+        try:
+            self._mpv.command('set', 'blend-subtitles', 'video' if on else 'no')
+        except Exception:
+            pass
+        try:
+            self._apply_subtitle_safe_margin()
+        except Exception:
+            pass
+
+    def _subtitle_search_scope(self) -> List[str]:
+        """Episodes searched: every season under the show root when indexed, else the playlist."""
+        paths: List[str] = []
+        try:
+            idx = getattr(self, "_show_index", None)
+            if idx is not None:
+                for season in idx.seasons:
+                    paths.extend(idx.episode_paths(season))
+        except Exception:
+            paths = []
+        cur = str(self._file_path)
+        if cur not in paths:
+            paths = [str(p) for p in (self._playlist or [cur])]
+        return paths
+
+    def _ensure_subtitle_indexer(self):
+        """Start (or keep) the background indexer for the current show; only stale episodes are re-read."""
+        try:
+            paths = self._subtitle_search_scope()
+            ixr = self._subsearch_indexer
+            if ixr is None or not ixr.covers(paths):
+                if ixr is not None:
+                    ixr.stop()
+                lang = str((self._current_sub_track() or {}).get('lang') or "")
+
+                def _progress(done, total):
+                    try:
+                        QTimer.singleShot(0, self, lambda: self.transcript_drawer.set_index_progress(done, total))
+                    except Exception:
+                        pass
+
+                ixr = SubtitleSearchIndexer(paths, lang, _progress)
+                self._subsearch_indexer = ixr
+            ixr.prioritize(str(self._file_path))
+            ixr.start()
+        except Exception as e:
+            print(f"Subtitle indexer error: {e}")
+
+    def _search_subtitles(self, query: str):
+        """Run the query on a worker thread; only the latest query's hits are shown."""
+        try:
+            scope = self._subtitle_search_scope()
+            if self._subsearch_indexer is None or not self._subsearch_indexer.covers(scope):
+                self._ensure_subtitle_indexer()
+            self._subsearch_seq = getattr(self, "_subsearch_seq", 0) + 1
+            seq = self._subsearch_seq
+            if not query:
+                self.transcript_drawer.set_hits(query, [])
+                return
+        except Exception as e:
+            print(f"Subtitle search error: {e}")
+            return
+
+        def _work():
+            hits = _subtitle_search_store().search(query, scope)
+
+            def _apply():
+                if getattr(self, "_subsearch_seq", 0) == seq:
+                    self.transcript_drawer.set_hits(query, hits)
+
             try:
-                self.activateWindow()
-                self.raise_()
-                self.setFocus(Qt.FocusReason.ActiveWindowFocusReason)
-                self.grabKeyboard()
+                QTimer.singleShot(0, self, _apply)
             except Exception:
                 pass
-        except Exception:
-            pass
 
-    def _show_audio_tracks_panel(self):
+        threading.Thread(target=_work, name="subsearch", daemon=True).start()
+
+    def _open_subtitle_hit(self, path: str, t: float):
+        """Jump to a search hit: seek in place, or load its episode (switching season if needed) at that time."""
         try:
-            self._open_tracks_focus("audio")
+            t = max(0.0, float(t) + float(getattr(self, "_sub_delay", 0.0) or 0.0) - 0.2)
+            if os.path.normcase(str(self._file_path)) == os.path.normcase(path):
+                self._mpv.command('seek', f"{t:.3f}", 'absolute+exact')
+                return
+            norm = [os.path.normcase(str(p)) for p in self._playlist]
+            if os.path.normcase(path) in norm:
+                self._load_episode_at_index(norm.index(os.path.normcase(path)), start_at=t)
+                return
+            if getattr(self, "_show_index", None) is None:
+                return
+
+            def _pick(idx):
+                if not os.path.isfile(path):
+                    return None
+                return next((s for s in idx.seasons if path in idx.episode_paths(s)), None)
+
+            def _loaded(_season, paths):
+                if path in paths:
+                    self._load_episode_at_index(paths.index(path), write_progress=False, start_at=t)
+
+            self._switch_season_async(_pick, _loaded)
+        except Exception as e:
+            print(f"Open search hit error: {e}")
+
+    def _show_transcript(self):
+        try:
+            self.transcript_drawer.set_cues(self._cue_index, getattr(self, "_sub_delay", 0.0), self._cue_status)
+            self._transcript_tick(getattr(self, "_last_time_pos", None))
         except Exception:
             pass
 
-    def _show_subtitle_tracks_panel(self):
+    def _transcript_tick(self, pos: Optional[float]):
+        """Keep the open transcript on the current line (one binary search per tick)."""
         try:
-            self._open_tracks_focus("subtitles")
+            index = self._cue_index
+            if index is None or pos is None or not self.transcript_drawer.is_open():
+                return
+            delay = float(getattr(self, "_sub_delay", 0.0) or 0.0)
+            self.transcript_drawer.follow(index.line_at(float(pos) - delay), delay)
         except Exception:
             pass
 
-    def _show_audio_delay_panel(self):
+    def _seek_to_cue(self, i: int):
         try:
-            self._open_tracks_focus("audio_delay")
+            index = self._cue_index
+            if index is None or not (0 <= i < len(index)):
+                return
+            t = max(0.0, index.starts[i] + float(getattr(self, "_sub_delay", 0.0) or 0.0))
+            self._mpv.command('seek', f"{t:.3f}", 'absolute+exact')
         except Exception:
             pass
 
-    def _show_subtitle_delay_panel(self):
+    def _navigate_subtitle_line(self, direction: int):
+        """Previous (-1) / repeat (0) / next (+1) subtitle line."""
+        index = self._cue_index
+        if index is None:
+            self._request_cue_index(build=True)
+        if index is None or not len(index):
+            self.toast.show_toast(self._cue_status or "No subtitle lines")
+            return
         try:
-            self._open_tracks_focus("subtitle_delay")
+            t = float(self._mpv.time_pos or 0.0) - float(getattr(self, "_sub_delay", 0.0) or 0.0)
         except Exception:
-            pass
+            return
+        if direction > 0:
+            i = index.next_after(t)
+        elif direction < 0:
+            i = index.previous(t)
+        else:
+            i = index.line_at(t)
+        if i < 0:
+            return
+        self._seek_to_cue(i)
+        self.toast.show_toast({1: "Line ▸", -1: "◂ Line"}.get(direction, "↺ Line"))
 
-    def _show_aspect_ratio_panel(self):
+    def _set_subtitle_hud_lift(self, px: int):
+        """Adjust extra subtitle lift while the timeline HUD is visible."""
         try:
-            self._open_tracks_focus("aspect")
+            v = int(px)
+        except Exception:
+            v = 40
+        v = max(0, min(300, v))
+        self._subtitle_hud_lift_px = v
+        try:
+            self._apply_subtitle_safe_margin()
         except Exception:
             pass
-    
-    def _show_tracks_panel(self):
-        """Show tracks drawer (compat)."""
         try:
-            self._toggle_tracks_drawer()
+            self._schedule_save_player_settings()
         except Exception:
             pass
     
-    def _refresh_track_lists(self):
-        """Refresh track lists from MPV."""
+    # ========== Scene index ==========
+
+    def _request_scene_index(self, path: str, fp: Optional[str]):
+        """Load the cached scene cuts for this file, or queue a background scan."""
+        self._scene_cuts = None
+        self._scene_chapters = []
+        if not fp or mpv is None or np is None:
+            return
         try:
-            # Audio tracks
-            audio_tracks = []
-            current_aid = self._mpv.aid
-            track_list = self._mpv.track_list or []
-            
-            for track in track_list:
-                if track.get('type') == 'audio':
-                    audio_tracks.append({
-                        'id': track.get('id'),
-                        'lang': track.get('lang', 'und'),
-                        'title': track.get('title', ''),
-                        'selected': track.get('id') == current_aid,
-                    })
-            
-            self.tracks_drawer.populate_audio_tracks(audio_tracks)
-            
-            # Subtitle tracks
-            subtitle_tracks = []
-            current_sid = self._mpv.sid
-            
-            for track in track_list:
-                if track.get('type') == 'sub':
-                    subtitle_tracks.append({
-                        'id': track.get('id'),
-                        'lang': track.get('lang', 'und'),
-                        'title': track.get('title', ''),
-                        'selected': track.get('id') == current_sid,
-                    })
-            
-            self.tracks_drawer.populate_subtitle_tracks(subtitle_tracks)
-            
+            cached = load_scene_index(fp)
+            if cached is not None:
+                self._on_scene_index(path, cached)
+                return
+
+            def _done(result):
+                if result is None:
+                    return
+                try:
+                    QTimer.singleShot(0, self, lambda: self._on_scene_index(path, result))
+                except Exception:
+                    pass
+
+            def is_current():
+                return str(getattr(self, "_file_path", "")) == path
+
+            _analysis_pool().submit(f"scenes:{fp}", _scene_index_job(path, fp, is_current, _done))
         except Exception as e:
-            print(f"Refresh track lists error: {e}")
-    
-    def _select_audio_track(self, track_id: int):
-        """Select audio track."""
-        try:
+            print(f"Scene index queue error: {e}")
+
+    def _on_scene_index(self, path: str, result):
+        if str(self._file_path) != str(path):
+            return
+        cuts, scores = result
+        self._scene_cuts = [float(t) for t in cuts]
+        dur = float(getattr(self, "_last_duration", 0.0) or 0.0) or (float(cuts[-1]) if len(cuts) else 0.0)
+        self._scene_chapters = synthesize_chapters(cuts, scores, dur)
+        if not getattr(self, "_chapter_times", None):
             try:
-                self._suppress_next_aid_toast = True
+                self.bottom_hud.set_chapters(self._scene_chapters)
             except Exception:
                 pass
-            self._mpv.aid = track_id
+
+    def _navigate_scene(self, direction: int):
+        """Jump to the next/previous scene cut (falls back to chapters without an index)."""
+        try:
+            cuts = getattr(self, "_scene_cuts", None)
+            if not cuts:
+                self._navigate_chapter(direction)
+                return
+            pos = float(self._mpv.time_pos or 0.0)
+            if direction > 0:
+                i = bisect.bisect_right(cuts, pos + 0.5)
+                if i >= len(cuts):
+                    return
+            else:
+                # A little slack so repeated presses keep walking back.
+                i = bisect.bisect_left(cuts, pos - 1.0) - 1
+                if i < 0:
+                    self._mpv.command('seek', '0', 'absolute')
+                    return
+            self._mpv.command('seek', f"{cuts[i]:.3f}", 'absolute+exact')
             try:
-                label = self._format_audio_track_label(track_id)
-                self.toast.show_toast(f"♪ {label}" if label else '♪')
+                self.toast.show_toast("Scene ▸" if direction > 0 else "◂ Scene")
             except Exception:
                 pass
+        except Exception:
+            pass
+
+    def _flush_scrub_seek(self):
+        """Issue the latest coalesced drag position, if any, and keep the window open."""
+        target, self._scrub_target = getattr(self, "_scrub_target", None), None
+        if target is None:
+            return
+        try:
+            self._mpv.command('seek', f"{target:.3f}", 'absolute+keyframes')
+            self._scrub_seek_timer.start()
+        except Exception:
+            pass
+
+    def _snap_to_scene(self, target: float, window: float = 2.0) -> float:
+        """Nearest scene cut within `window` seconds of `target`, else `target`."""
+        cuts = getattr(self, "_scene_cuts", None)
+        if not cuts:
+            return target
+        i = bisect.bisect_left(cuts, target)
+        near = [cuts[j] for j in (i - 1, i) if 0 <= j < len(cuts) and abs(cuts[j] - target) <= window]
+        return min(near, key=lambda c: abs(c - target)) if near else target
+
+    # ========== Smart speed ==========
+
+    SMART_SPEED_BOOST = 2.0
+    SMART_SPEED_MAX = 4.0
+
+    def _effective_speed(self) -> float:
+        """The rate mpv is actually playing at (user speed, boosted inside quiet spans)."""
+        sp = float(getattr(self, "_speed", 1.0) or 1.0)
+        if getattr(self, "_smart_boosted", False):
+            # Capped at SMART_SPEED_MAX, but never below the user's own speed.
+            sp = max(sp, min(self.SMART_SPEED_MAX, sp * self.SMART_SPEED_BOOST))
+        return sp
+
+    def _request_quiet_map(self, path: str, fp: Optional[str]):
+        self._quiet_spans = None
+        self._set_smart_boost(False)
+        if not fp or np is None or not getattr(self, "_smart_speed", False):
+            return
+        if getattr(self, "_quiet_loading", None) == path:
+            return
+        self._quiet_loading = path
+
+        def _work():
             try:
-                self._refresh_track_lists()
+                spans = load_quiet_map(path, fp)
+            except Exception as e:
+                print(f"Quiet map error: {e}")
+                spans = None
+
+            def _apply():
+                if getattr(self, "_quiet_loading", None) == path:
+                    self._quiet_loading = None
+                if str(self._file_path) == path and spans is not None:
+                    self._quiet_spans = (spans[:, 0].tolist(), spans[:, 1].tolist())
+                    self._smart_speed_tick(getattr(self, "_last_time_pos", None), force=True)
+
+            try:
+                QTimer.singleShot(0, self, _apply)
             except Exception:
                 pass
+
+        threading.Thread(target=_work, name="quiet-map", daemon=True).start()
+
+    def _set_smart_boost(self, on: bool):
+        if bool(getattr(self, "_smart_boosted", False)) == bool(on):
+            return
+        self._smart_boosted = bool(on)
+        try:
+            self._mpv.speed = self._effective_speed()
         except Exception:
             pass
-    
-    def _select_subtitle_track(self, track_id: int):
-        """Select subtitle track (-1 for none)."""
+
+    def _smart_speed_tick(self, pos: Optional[float], force: bool = False):
+        """Bring the boost in line with the map and arm a timer for the next span edge.
+
+        Runs on every UI tick (cheap: two bisects) so seeks, pauses and speed
+        changes are picked up; the timer makes the actual transitions land on
+        the span edges instead of the tick grid.
+        """
+        spans = getattr(self, "_quiet_spans", None)
+        timer = getattr(self, "_smart_timer", None)
+        if not getattr(self, "_smart_speed", False) or not spans or pos is None:
+            if timer is not None:
+                timer.stop()
+            self._set_smart_boost(False)
+            return
+        if not force and time.monotonic() < getattr(self, "_smart_hold_until", 0.0):
+            return  # the cached position still predates the last timed transition
+        starts, ends = spans
+        pos = float(pos)
+        i = bisect.bisect_right(starts, pos) - 1
+        inside = i >= 0 and pos < ends[i]
+        self._set_smart_boost(inside)
+        if getattr(self, "_cached_paused", False):
+            if timer is not None:
+                timer.stop()
+            return
+        edge = ends[i] if inside else (starts[i + 1] if i + 1 < len(starts) else None)
+        if edge is None:
+            if timer is not None:
+                timer.stop()
+            return
+        delay_ms = max(0, int((edge - pos) / max(0.05, self._effective_speed()) * 1000.0))
+        if delay_ms > 1500:
+            if timer is not None:
+                timer.stop()  # the next ticks will get closer before arming
+            return
+        if timer is None:
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.setTimerType(Qt.TimerType.PreciseTimer)
+            timer.timeout.connect(self._on_smart_timer)
+            self._smart_timer = timer
+        if force or not timer.isActive() or getattr(self, "_smart_edge", None) != edge:
+            self._smart_edge = edge
+            timer.start(delay_ms)
+
+    def _on_smart_timer(self):
+        edge = getattr(self, "_smart_edge", None)
+        if edge is None:
+            return
+        # Nudge the cached position onto the edge (the observer may lag a few ms).
+        pos = getattr(self, "_last_time_pos", None)
+        pos = max(float(pos or 0.0), float(edge) + 1e-3)
+        self._smart_edge = None
+        self._smart_hold_until = time.monotonic() + 0.5
+        self._smart_speed_tick(pos, force=True)
+
+    def _toggle_smart_speed(self):
+        self._smart_speed = not bool(getattr(self, "_smart_speed", False))
+        self._schedule_save_player_settings()
+        if self._smart_speed:
+            self._request_quiet_map(str(self._file_path), getattr(self, "_content_fp", None))
+        else:
+            self._smart_speed_tick(None)
+        try:
+            self.toast.show_toast("Smart speed: " + ("on" if self._smart_speed else "off"))
+        except Exception:
+            pass
+
+    # ========== Loudness normalization ==========
+
+    def _request_audio_profile(self, path: str, fp: Optional[str]):
+        """Loudness gain and seek-bar waveform from cache; anything missing is measured in one decode pass."""
+        self._loudness = None
+        self._apply_loudness_gain()
         try:
+            self.bottom_hud.scrub.set_waveform(None)
+        except Exception:
+            pass
+        if not fp or np is None:
+            return
+        try:
+            wants: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+            cached = read_json(_loudness_cache_path(fp), None)
+            if isinstance(cached, dict) and "integrated" in cached:
+                self._on_loudness(path, cached)
+            else:
+                wants["loudness"] = ("loudness", {})
             try:
-                self._suppress_next_sid_toast = True
+                self._on_waveform(path, np.fromfile(str(_waveform_cache_path(fp)), dtype="<f2"))
             except Exception:
-                pass
-            if track_id == -1:
-                self._mpv.sid = 'no'
+                wants["envelope"] = ("envelope", {})
+            if not wants:
+                return
+            fut = pcm_analysis_pool().submit(run_pcm_analysis, path, wants, None, None, _LOUDNESS_RATE)
+
+            def _done(f):
                 try:
-                    self.toast.show_toast('CC ⦸')
-                except Exception:
-                    pass
-            else:
-                self._mpv.sid = track_id
+                    results = f.result()["results"]
+                except Exception as e:
+                    print(f"Audio profile error: {e}")
+                    return
+                measure, bins = results.get("loudness"), None
                 try:
-                    label = self._format_subtitle_track_label(track_id)
-                    self.toast.show_toast(f"CC {label}" if label else 'CC')
+                    if measure is not None:
+                        atomic_write_json(_loudness_cache_path(fp), measure)
+                    if "envelope" in results:
+                        bins = waveform_bins(results["envelope"])
+                        wpath = _waveform_cache_path(fp)
+                        wpath.parent.mkdir(parents=True, exist_ok=True)
+                        tmp = wpath.with_suffix(wpath.suffix + f".{os.getpid()}.tmp")
+                        bins.astype("<f2").tofile(str(tmp))
+                        tmp.replace(wpath)
+                except Exception as e:
+                    print(f"Audio profile cache error: {e}")
+
+                def _apply():
+                    if measure is not None:
+                        self._on_loudness(path, measure)
+                    if bins is not None:
+                        self._on_waveform(path, bins)
+
+                try:
+                    QTimer.singleShot(0, self, _apply)
                 except Exception:
                     pass
+
+            fut.add_done_callback(_done)
+        except Exception as e:
+            print(f"Audio profile queue error: {e}")
+
+    def _on_waveform(self, path: str, bins):
+        if str(self._file_path) != str(path):
+            return
+        try:
+            self.bottom_hud.scrub.set_waveform(bins if len(bins) else None)
+        except Exception:
+            pass
+
+    def _on_loudness(self, path: str, measure: Dict[str, Any]):
+        if str(self._file_path) != str(path):
+            return
+        self._loudness = measure
+        self._apply_loudness_gain()
+
+    def _apply_loudness_gain(self):
+        """Static gain on top of the user's volume: mpv's volume-gain, or a labelled volume filter."""
+        gain = 0.0
+        if getattr(self, "_normalize_loudness", True) and getattr(self, "_loudness", None):
+            gain = normalization_gain(self._loudness)
+        if gain == getattr(self, "_loudness_gain_applied", 0.0):
+            return
+        try:
+            self._mpv['volume-gain'] = gain
+        except Exception:
             try:
-                self._refresh_track_lists()
+                self._mpv.command('af', 'remove', '@tkloudness')
             except Exception:
                 pass
+            try:
+                if gain:
+                    self._mpv.command('af', 'add', f"@tkloudness:lavfi=[volume={gain:.2f}dB]")
+            except Exception as e:
+                print(f"Loudness gain error: {e}")
+                return
+        self._loudness_gain_applied = gain
+
+    def _toggle_loudness_normalization(self):
+        self._normalize_loudness = not bool(getattr(self, "_normalize_loudness", True))
+        self._apply_loudness_gain()
+        self._schedule_save_player_settings()
+        try:
+            self.toast.show_toast("Normalize loudness: " + ("on" if self._normalize_loudness else "off"))
         except Exception:
             pass
-    
-    def _load_external_subtitle(self):
-        """Load external subtitle file."""
-        try:
-            file_path, _ = QFileDialog.getOpenFileName(
-                self,
-                "Select Subtitle File",
-                str(self._file_path.parent),
-                "Subtitle Files (*.srt *.ass *.ssa *.sub);;All Files (*.*)"
-            )
-            if file_path:
-                self._mpv.command('sub-add', file_path)
-                self._refresh_track_lists()
-                try:
-                    self.toast.show_toast("Subtitle loaded")
-                except Exception:
-                    pass
-        except Exception as e:
-            print(f"Load external subtitle error: {e}")
-    
-    def _set_audio_delay(self, delay: float):
-        """Set audio delay."""
+
+    # ========== Intro / outro skipping ==========
+
+    def _request_season_segments(self):
+        """Use cached intro/outro times for this episode, or (re)start the season detector."""
+        self._segments = None
+        self._segment_skipped = None
         try:
-            self._mpv.audio_delay = delay
+            self.skip_segment_btn.hide()
         except Exception:
             pass
-    
-    def _set_subtitle_delay(self, delay: float):
-        """Set subtitle delay."""
+        if mpv is None or np is None or len(self._playlist) < 2:
+            return
         try:
-            self._mpv.sub_delay = delay
+            path = str(self._file_path)
+            det = getattr(self, "_segment_detector", None)
+            if det is None or not det.covers(self._playlist):
+                if det is not None:
+                    det.stop()
+                root = str(ShowEpisodeIndex.show_root_for(Path(path).parent) or Path(path).parent)
+
+                def _on_result(p, result):
+                    try:
+                        QTimer.singleShot(0, self, lambda: self._on_season_segments(p, result))
+                    except Exception:
+                        pass
+
+                det = SeasonSegmentDetector(root, self._playlist, _on_result)
+                self._segment_detector = det
+            cached = det.cached(path)
+            if cached is not None:
+                self._segments = cached
+            det.prioritize(path)
+            det.start()
+        except Exception as e:
+            print(f"Season segment request error: {e}")
+
+    def _on_season_segments(self, path: str, result: Dict[str, Any]):
+        if str(self._file_path) == str(path):
+            self._segments = result
+
+    def _active_segment(self, pos: Optional[float]):
+        segs = getattr(self, "_segments", None)
+        if not segs or pos is None:
+            return None, None
+        for kind in ("intro", "outro"):
+            seg = segs.get(kind)
+            if seg and seg[0] <= float(pos) < seg[1] - 1.0:
+                return kind, seg
+        return None, None
+
+    def _update_skip_segment(self, pos: Optional[float]):
+        """Show the skip button (or auto-skip once) while inside a known intro/outro."""
+        try:
+            kind, seg = self._active_segment(pos)
+            btn = self.skip_segment_btn
+            if kind is None:
+                if btn.isVisible():
+                    btn.hide()
+                return
+            if getattr(self, "_auto_skip_segments", False) and self._segment_skipped != (kind, seg):
+                self._segment_skipped = (kind, seg)
+                self._skip_current_segment()
+                return
+            label = "Skip intro" if kind == "intro" else "Skip outro"
+            if btn.text() != label or not btn.isVisible():
+                btn.setText(label)
+                btn.show()
+                self._position_overlays()
         except Exception:
             pass
 
-    def _set_subtitle_hud_lift(self, px: int):
-        """Adjust extra subtitle lift while the timeline HUD is visible."""
+    def _skip_current_segment(self):
+        """Jump to the end of the intro/outro playback is in."""
         try:
-            v = int(px)
+            kind, seg = self._active_segment(getattr(self, "_last_time_pos", None))
+            if kind is None:
+                return
+            self._segment_skipped = (kind, seg)
+            self._mpv.command('seek', f"{seg[1]:.3f}", 'absolute')
+            self.skip_segment_btn.hide()
+            try:
+                self.toast.show_toast("Skipped intro" if kind == "intro" else "Skipped outro")
+            except Exception:
+                pass
         except Exception:
-            v = 40
-        v = max(0, min(300, v))
-        self._subtitle_hud_lift_px = v
+            pass
+
+    def _toggle_auto_skip_segments(self):
+        self._auto_skip_segments = not bool(getattr(self, "_auto_skip_segments", False))
+        self._schedule_save_player_settings()
         try:
-            self._apply_subtitle_safe_margin()
+            self.toast.show_toast("Auto-skip intro/outro: " + ("on" if self._auto_skip_segments else "off"))
         except Exception:
             pass
+
+    # ========== Auto crop ==========
+
+    def _request_crop_detection(self, path: str, fp: Optional[str]):
+        """Load the cached crop rectangle for this file, or queue its detection."""
+        self._crop_rect = None
+        if getattr(self, "_auto_crop", False):
+            self._apply_crop(None)
+        if not fp or mpv is None or np is None:
+            return
         try:
-            self._schedule_save_player_settings()
+            cached = read_json(_crop_cache_path(fp), None)
+            if isinstance(cached, dict) and cached.get("v") == _CROP_VERSION:
+                rect = cached.get("rect")
+                self._on_crop_detected(path, tuple(rect) if rect else None)
+                return
+
+            def _done(rect):
+                try:
+                    QTimer.singleShot(0, self, lambda: self._on_crop_detected(path, rect))
+                except Exception:
+                    pass
+
+            _analysis_pool().submit(f"crop:{fp}", _crop_detect_job(path, fp, _done))
+        except Exception as e:
+            print(f"Crop detection queue error: {e}")
+
+    def _on_video_params(self, _name, value):
+        """mpv video-params observer (mpv thread): (re)apply the crop once the new file's frame size is known."""
+        try:
+            dims = (int(value.get("w") or 0), int(value.get("h") or 0)) if isinstance(value, dict) else None
+        except Exception:
+            dims = None
+
+        def _apply():
+            if dims == getattr(self, "_video_dims", None):
+                return
+            self._video_dims = dims
+            if getattr(self, "_auto_crop", False) and getattr(self, "_crop_rect", None):
+                self._apply_crop(self._crop_rect)
+
+        try:
+            QTimer.singleShot(0, self, _apply)
         except Exception:
             pass
-    
+
+    def _on_crop_detected(self, path: str, rect: Optional[Tuple[float, float, float, float]]):
+        if str(self._file_path) != str(path):
+            return
+        self._crop_rect = rect
+        if getattr(self, "_auto_crop", False):
+            self._apply_crop(rect)
+
+    def _apply_crop(self, rect: Optional[Tuple[float, float, float, float]]):
+        """Crop the decoded frame to `rect` (fractions) through mpv, or clear the crop."""
+        try:
+            if not rect or tuple(rect) == (0.0, 0.0, 1.0, 1.0):
+                try:
+                    self._mpv['video-crop'] = ""
+                except Exception:
+                    pass
+                self._mpv.panscan = 0.0
+                return
+            # Frame size from the video-params observer: during a load, mpv.width/height still
+            # describe the previous file. Without it the rect waits for _on_video_params.
+            vw, vh = getattr(self, "_video_dims", None) or (0, 0)
+            if vw <= 0 or vh <= 0:
+                return
+            x, y, w, h = rect
+            cw, ch = int(w * vw) & ~1, int(h * vh) & ~1
+            cx, cy = int(x * vw) & ~1, int(y * vh) & ~1
+            try:
+                self._mpv['video-crop'] = f"{cw}x{ch}+{cx}+{cy}"
+            except Exception:
+                # mpv without video-crop: fill the window, trimming the bars.
+                self._mpv.panscan = 1.0
+        except Exception as e:
+            print(f"Auto crop error: {e}")
+
     def _set_aspect_ratio(self, ratio: str):
-        """Set aspect ratio."""
+        """Set aspect ratio ("auto-crop" trims detected black bars instead)."""
         try:
+            if ratio == "auto-crop":
+                self._auto_crop = True
+                self._mpv.video_aspect_override = "-1"
+                rect = getattr(self, "_crop_rect", None)
+                self._apply_crop(rect)
+                try:
+                    self.toast.show_toast("▭ Auto crop" if rect else "▭ Auto crop (detecting…)")
+                except Exception:
+                    pass
+                return
+            if getattr(self, "_auto_crop", False):
+                self._auto_crop = False
+                self._apply_crop(None)
             self._mpv.video_aspect_override = ratio
             try:
                 if ratio == "-1":
@@ -5476,20 +12105,177 @@ class PlayerWindow(QMainWindow):
             pass
     
     def _next_episode(self):
-        """Load next episode."""
+        """Load next episode (continuing into the next season folder at the end)."""
         try:
             if self._playlist_index < len(self._playlist) - 1:
                 self._load_episode_at_index(self._playlist_index + 1)
+            else:
+                self._continue_into_season(+1)
         except Exception:
             pass
     
     def _prev_episode(self):
-        """Load previous episode."""
+        """Load previous episode (the previous season's last one at the start)."""
         try:
             if self._playlist_index > 0:
                 self._load_episode_at_index(self._playlist_index - 1)
+            else:
+                self._continue_into_season(-1)
         except Exception:
             pass
+
+    def _start_seek_preview(self, path: str, fp: Optional[str]):
+        """(Re)start the background sprite-sheet generator for the scrubber hover preview."""
+        try:
+            old = getattr(self, "_seek_preview", None)
+            if old is not None:
+                old.stop()
+            self._seek_preview = None
+            self.bottom_hud.scrub.set_preview_source(None)
+            if not fp or mpv is None:
+                return
+            sprites = SeekPreviewSprites(path, fp)
+            sprites.start()
+            self._seek_preview = sprites
+            self.bottom_hud.scrub.set_preview_source(sprites)
+        except Exception as e:
+            print(f"Seek preview start error: {e}")
+
+    def _on_content_fingerprint(self, path: str, fp: Optional[str]):
+        """Start per-file background analyses once the fingerprint is known (None: not yet)."""
+        self._start_seek_preview(path, fp)
+        self._request_crop_detection(path, fp)
+        self._request_scene_index(path, fp)
+        self._request_audio_profile(path, fp)
+        self._request_quiet_map(path, fp)
+        self._save_unsaved_cues(path, fp)
+
+    def _compute_content_fingerprint(self, path: Path):
+        """Fingerprint the opened file in the background (memoized per file version)."""
+        self._content_fp = _fingerprints().cached(str(path))
+        self._on_content_fingerprint(str(path), self._content_fp)
+        if self._content_fp:
+            return
+        target = str(path)
+
+        def _work():
+            fp = _fingerprints().get(target)
+
+            def _apply():
+                if str(self._file_path) == target:
+                    self._content_fp = fp
+                    self._late_standalone_resume(fp)
+                    self._on_content_fingerprint(target, fp)
+
+            try:
+                QTimer.singleShot(0, self, _apply)
+            except Exception:
+                pass
+
+        threading.Thread(target=_work, daemon=True).start()
+
+    def _refresh_show_index(self):
+        """(Re)build the cross-season episode index for the current folder in the background."""
+        try:
+            folder = Path(self._show_root_path) if self._show_root_path else self._file_path.parent
+            idx = getattr(self, "_show_index", None)
+            if idx is not None and idx.season_index_of(folder) >= 0:
+                return
+            if getattr(self, "_show_index_building", False):
+                return
+            self._show_index_building = True
+        except Exception:
+            return
+
+        def _work():
+            idx = None
+            try:
+                idx = ShowEpisodeIndex.for_folder(folder)
+            except Exception as e:
+                print(f"Show index error: {e}")
+
+            def _apply():
+                self._show_index_building = False
+                self._show_index = idx
+
+            try:
+                QTimer.singleShot(0, self, _apply)
+            except Exception:
+                pass
+
+        threading.Thread(target=_work, daemon=True).start()
+
+    def _continue_into_season(self, step: int) -> bool:
+        """Switch the playlist to the adjacent season folder and load its first/last episode."""
+        try:
+            folder = Path(self._show_root_path) if self._show_root_path else self._file_path.parent
+
+            def _loaded(season: Dict[str, Any], paths: List[str]):
+                self._load_episode_at_index(0 if step > 0 else len(paths) - 1, write_progress=False)
+                try:
+                    num = season.get("season")
+                    self.toast.show_toast(f"Season {num}" if num is not None else Path(season["folder"]).name)
+                except Exception:
+                    pass
+
+            self._switch_season_async(lambda idx: idx.adjacent_season(folder, step), _loaded)
+            return True
+        except Exception as e:
+            print(f"Season continue error: {e}")
+            return False
+
+    def _switch_season_async(self, pick, then):
+        """Resolve a season switch on a worker, then apply it on the UI thread.
+
+        `pick(idx)` runs on the worker against the show index (built there if
+        the cached one doesn't cover the current folder) and returns the target
+        season or None. The existence checks and library ids of its episodes are
+        computed there too, so nothing scans or hashes on the UI thread.
+        `then(season, paths)` runs after the playlist has been switched.
+        """
+        folder = Path(self._show_root_path) if self._show_root_path else self._file_path.parent
+        idx0 = getattr(self, "_show_index", None)
+        want_ids = bool(self._progress_file)
+        current = str(self._file_path)
+        self._season_switch_seq = getattr(self, "_season_switch_seq", 0) + 1
+        seq = self._season_switch_seq
+
+        def _work():
+            idx, season, paths, ids = idx0, None, [], []
+            try:
+                if idx is None or idx.season_index_of(folder) < 0:
+                    idx = ShowEpisodeIndex.for_folder(folder)
+                season = pick(idx) if idx is not None else None
+                if season:
+                    paths = [p for p in idx.episode_paths(season) if os.path.isfile(p)]
+                    ids = [library_video_id(p) for p in paths] if want_ids else []
+            except Exception as e:
+                print(f"Season switch error: {e}")
+
+            def _apply():
+                if seq != getattr(self, "_season_switch_seq", 0) or str(self._file_path) != current:
+                    return
+                if idx is not None:
+                    self._show_index = idx
+                if not season or not paths:
+                    return
+                self._write_progress("episode_change")
+                self._switch_season_playlist(season, paths, ids)
+                then(season, paths)
+
+            try:
+                QTimer.singleShot(0, self, _apply)
+            except Exception:
+                pass
+
+        threading.Thread(target=_work, name="season-switch", daemon=True).start()
+
+    def _switch_season_playlist(self, season: Dict[str, Any], paths: List[str], ids: List[str]):
+        """Make `season` the playlist; library sessions get its episodes' ids so progress keeps syncing."""
+        self._show_root_path = Path(season["folder"])
+        self._playlist = paths
+        self._playlist_ids = list(ids) if self._progress_file else []
+        self._video_id = ""
     
     # ========== Context Menu ==========
     
@@ -5538,6 +12324,13 @@ class PlayerWindow(QMainWindow):
             seek_m.addAction("Forward 10s\t\u2192").triggered.connect(lambda: self._seek_relative(10))
             seek_m.addAction("Forward 30s\tCtrl+\u2192").triggered.connect(lambda: self._seek_relative(30))
             playback_m.addAction("Go to Time…\tG").triggered.connect(self._prompt_goto_time)
+            skip_a = playback_m.addAction("Skip Intro/Outro\tI")
+            skip_a.setEnabled(self._active_segment(getattr(self, "_last_time_pos", None))[0] is not None)
+            skip_a.triggered.connect(self._skip_current_segment)
+            auto_a = playback_m.addAction("Auto-skip Intro/Outro")
+            auto_a.setCheckable(True)
+            auto_a.setChecked(bool(getattr(self, "_auto_skip_segments", False)))
+            auto_a.triggered.connect(self._toggle_auto_skip_segments)
 
             # ── Speed ──
             sp_m = menu.addMenu("Speed")
@@ -5548,6 +12341,10 @@ class PlayerWindow(QMainWindow):
                 a.triggered.connect(lambda checked=False, s=sp: self._set_speed(s))
             sp_m.addSeparator()
             sp_m.addAction("Reset to 1.0\u00d7\tZ").triggered.connect(lambda: self._set_speed(1.0))
+            smart_a = sp_m.addAction("Smart Speed (skim quiet parts)")
+            smart_a.setCheckable(True)
+            smart_a.setChecked(bool(getattr(self, "_smart_speed", False)))
+            smart_a.triggered.connect(self._toggle_smart_speed)
 
             menu.addSeparator()
 
@@ -5584,6 +12381,10 @@ class PlayerWindow(QMainWindow):
             adly_m.addAction("+0.1s").triggered.connect(lambda: self._nudge_audio_delay(+0.1))
             adly_m.addAction("\u22120.1s").triggered.connect(lambda: self._nudge_audio_delay(-0.1))
             adly_m.addAction("Reset").triggered.connect(lambda: self._set_audio_delay(0))
+            norm_a = audio_m.addAction("Normalize Loudness")
+            norm_a.setCheckable(True)
+            norm_a.setChecked(bool(getattr(self, "_normalize_loudness", True)))
+            norm_a.triggered.connect(self._toggle_loudness_normalization)
 
             # ── Subtitles ──
             subtitle_m = menu.addMenu("Subtitles")
@@ -5620,6 +12421,11 @@ class PlayerWindow(QMainWindow):
             sdly_m.addAction("+0.1s\t>").triggered.connect(lambda: self._nudge_subtitle_delay(+0.1))
             sdly_m.addAction("\u22120.1s\t<").triggered.connect(lambda: self._nudge_subtitle_delay(-0.1))
             sdly_m.addAction("Reset\t/").triggered.connect(lambda: self._set_subtitle_delay(0))
+            sdly_m.addAction("Auto-sync to Speech\tCtrl+/").triggered.connect(self._auto_sync_subtitles)
+            subtitle_m.addAction("Previous Line\t,").triggered.connect(lambda: self._navigate_subtitle_line(-1))
+            subtitle_m.addAction("Next Line\t.").triggered.connect(lambda: self._navigate_subtitle_line(1))
+            subtitle_m.addAction("Repeat Line\tR").triggered.connect(lambda: self._navigate_subtitle_line(0))
+            subtitle_m.addAction("Transcript…\tT").triggered.connect(self._toggle_transcript_drawer)
 
             menu.addSeparator()
 
@@ -5635,6 +12441,7 @@ class PlayerWindow(QMainWindow):
                 ("1:1", "1:1"),
                 ("9:16", "9:16"),
                 ("3:2", "3:2"),
+                ("Auto crop", "auto-crop"),
             ]
             for label, val in presets:
                 ar_m.addAction(label).triggered.connect(lambda checked=False, v=val: self._set_aspect_ratio(v))
@@ -5713,8 +12520,19 @@ class PlayerWindow(QMainWindow):
     # ========== Chapter Navigation ==========
     
     def _navigate_chapter(self, direction: int):
-        """Navigate chapters."""
-        try:
+        """Navigate chapters (scene-derived markers when the file has none)."""
+        try:
+            synth = getattr(self, "_scene_chapters", [])
+            if not getattr(self, "_chapter_times", None) and synth:
+                pos = float(self._mpv.time_pos or 0.0)
+                if direction > 0:
+                    nxt = [t for t in synth if t > pos + 0.5]
+                    if nxt:
+                        self._mpv.command('seek', f"{nxt[0]:.3f}", 'absolute+exact')
+                else:
+                    prv = [t for t in synth if t < pos - 1.0]
+                    self._mpv.command('seek', f"{prv[-1]:.3f}" if prv else '0', 'absolute+exact')
+                return
             self._mpv.command('add', 'chapter', str(direction))
         except Exception:
             pass
@@ -5784,8 +12602,11 @@ class PlayerWindow(QMainWindow):
     
     def _write_progress(self, phase: str):
         """Write progress to file."""
+        if phase != "periodic":
+            self._history_event("phase", p=str(phase), pos=round(float(self._last_time_pos or 0.0), 2))
         try:
             if not self._progress_file:
+                self._save_standalone_resume(phase)
                 return
             
             now = time.time()
@@ -5858,6 +12679,199 @@ class PlayerWindow(QMainWindow):
         except Exception as e:
             print(f"Write progress error: {e}")
     
+    # ========== Standalone Resume ==========
+
+    def _resume(self) -> Optional[ResumeStore]:
+        if self._resume_store is None:
+            try:
+                path = _player_cache_dir("resume.db")
+                legacy = Path.home() / ".tankoban" / "player_resume.db"
+                if not path.exists() and legacy.exists() and not os.environ.get("TANKOBAN_PLAYER_CACHE_DIR", "").strip():
+                    # One-time move from the pre-cache-dir location (WAL sidecars included).
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    for suffix in ("", "-wal", "-shm"):
+                        src = legacy.with_name(legacy.name + suffix)
+                        if src.exists():
+                            shutil.copy2(str(src), str(path.with_name(path.name + suffix)))
+                self._resume_store = ResumeStore(path)
+            except Exception:
+                return None
+        return self._resume_store
+
+    def _standalone_resume_position(self, path: Path) -> float:
+        """Look up the local resume record for `path` and stage its tracks/delays/speed."""
+        self._resume_checked_fp = False
+        try:
+            store = self._resume()
+            if store is None:
+                return 0.0
+            rec = store.get(str(path), _fingerprints().cached(str(path)))
+            if rec is None:
+                return 0.0
+            self._resume_checked_fp = True
+            return self._apply_resume_record(rec)
+        except Exception as e:
+            print(f"Standalone resume error: {e}")
+            return 0.0
+
+    def _late_standalone_resume(self, fp: Optional[str]):
+        """Resume a renamed/moved file once its fingerprint is known (if playback just started)."""
+        try:
+            if self._progress_file or self._resume_checked_fp or not fp:
+                return
+            self._resume_checked_fp = True
+            if float(self._last_time_pos or 0.0) > 10.0:
+                return
+            store = self._resume()
+            rec = store.get(str(self._file_path), fp) if store is not None else None
+            if rec is None:
+                return
+            pos = self._apply_resume_record(rec)
+            if pos > 0:
+                self._mpv.command('seek', str(pos), 'absolute')
+            self._apply_track_plan()
+            self._apply_sub_visibility_pref()
+        except Exception as e:
+            print(f"Late resume error: {e}")
+
+    def _apply_resume_record(self, rec: Dict[str, Any]) -> float:
+        try:
+            if rec.get("aid"):
+                self._pref_aid = str(rec.get("aid"))
+            if rec.get("sid"):
+                self._pref_sid = str(rec.get("sid"))
+            if rec.get("sub_visibility") is not None:
+                self._pref_sub_visibility = 'yes' if rec.get("sub_visibility") else 'no'
+            if rec.get("audio_delay") is not None:
+                self._set_audio_delay(float(rec.get("audio_delay")))
+            if rec.get("sub_delay") is not None:
+                self._set_subtitle_delay(float(rec.get("sub_delay")))
+            speed = rec.get("speed")
+            if speed and abs(float(speed) - float(self._speed)) > 1e-3:
+                self._set_speed(float(speed))
+        except Exception:
+            pass
+        if rec.get("finished"):
+            return 0.0
+        try:
+            pos = float(rec.get("position") or 0.0)
+            dur = float(rec.get("duration") or 0.0)
+            # Don't resume into the last few seconds / credits tail.
+            if pos < 5.0 or (dur > 0 and pos > dur - 10.0):
+                return 0.0
+            return pos
+        except Exception:
+            return 0.0
+
+    def _save_standalone_resume(self, phase: str):
+        try:
+            now = time.time()
+            if phase == "periodic" and (now - self._last_progress_write) < 4.0:
+                return
+            self._last_progress_write = now
+            store = self._resume()
+            if store is None:
+                return
+            pos = float(self._last_time_pos or 0.0)
+            dur = float(self._last_duration or 0.0)
+            store.put(str(self._file_path), getattr(self, "_content_fp", None), {
+                "position": pos,
+                "duration": dur,
+                "finished": _finished(pos, dur, self._max_position, self._watched_time, self._eof_signaled),
+                "aid": None if self._last_aid is None else str(self._last_aid),
+                "sid": None if self._last_sid is None else str(self._last_sid),
+                "sub_visibility": self._last_sub_visibility,
+                "audio_delay": float(getattr(self, "_audio_delay", 0.0) or 0.0),
+                "sub_delay": float(getattr(self, "_sub_delay", 0.0) or 0.0),
+                "speed": float(getattr(self, "_speed", 1.0) or 1.0),
+                "updated": now,
+            })
+            if phase in ("close", "episode_change", "eof", "switch"):
+                store.flush()
+        except Exception as e:
+            print(f"Standalone resume write error: {e}")
+
+    # ========== Watch History ==========
+
+    def _history_ledger(self) -> Optional[WatchHistoryLedger]:
+        if self._history is None:
+            try:
+                base = self._settings_file.parent if isinstance(getattr(self, "_settings_file", None), Path) else Path.home() / ".tankoban"
+                self._history = WatchHistoryLedger(base / "watch_history")
+            except Exception:
+                return None
+        return self._history
+
+    def _history_event(self, kind: str, **fields):
+        try:
+            if not self._history_session:
+                return
+            ledger = self._history_ledger()
+            if ledger is not None:
+                ledger.append(dict(e=kind, s=self._history_session, **fields))
+        except Exception:
+            pass
+
+    def _history_start_session(self, path: Path):
+        try:
+            ledger = self._history_ledger()
+            if ledger is None:
+                return
+            self._history_session = f"{int(time.time() * 1000):x}{os.getpid() % 4096:03x}"
+            self._history_seg = None
+            key = str(self._video_id or "") or ResumeStore.path_key(str(path))
+            ledger.append({
+                "e": "start",
+                "s": self._history_session,
+                "k": key,
+                "path": str(path),
+                "title": path.name,
+                "video_id": str(self._video_id or ""),
+                "show_id": str(self._show_id or ""),
+                "show_root": str(self._show_root_path or ""),
+                "pos": round(float(self._pending_initial_seek or 0.0), 2),
+                "speed": float(getattr(self, "_speed", 1.0) or 1.0),
+            })
+        except Exception as e:
+            print(f"Watch history start error: {e}")
+
+    def _history_extend_segment(self, a: float, b: float, watched: float):
+        seg = self._history_seg
+        if seg is None:
+            self._history_seg = [a, b, watched]
+        else:
+            seg[1] = b
+            seg[2] += watched
+            # Keep segments bounded so a long uninterrupted watch still lands in the ledger.
+            if seg[2] >= 300.0:
+                self._history_close_segment()
+
+    def _history_close_segment(self):
+        seg, self._history_seg = self._history_seg, None
+        if seg is not None and seg[2] >= 1.0:
+            self._history_event("seg", a=round(seg[0], 2), b=round(seg[1], 2), w=round(seg[2], 2))
+
+    def _history_end_session(self, reason: str):
+        if not self._history_session:
+            return
+        try:
+            self._history_close_segment()
+            pos = float(self._last_time_pos or 0.0)
+            dur = float(self._last_duration or 0.0)
+            self._history_event(
+                "end",
+                why=str(reason),
+                pos=round(pos, 2),
+                dur=round(dur, 2),
+                max=round(float(self._max_position or 0.0), 2),
+                watched=round(float(self._watched_time or 0.0), 2),
+                fin=bool(_finished(pos, dur, self._max_position, self._watched_time, self._eof_signaled)),
+                fp=getattr(self, "_content_fp", None),
+            )
+        except Exception:
+            pass
+        self._history_session = ""
+
     # ========== Key Handling ==========
     
     def keyPressEvent(self, event):
@@ -5964,10 +12978,40 @@ class PlayerWindow(QMainWindow):
             if key == Qt.Key.Key_Less:
                 self._nudge_subtitle_delay(-0.1)
                 return True
+            if key == Qt.Key.Key_Slash and (mods & Qt.KeyboardModifier.ControlModifier):
+                self._auto_sync_subtitles()
+                return True
             if key == Qt.Key.Key_Slash:
                 self._set_subtitle_delay(0)
                 return True
             
+            # Subtitle lines (, . R) and transcript (T)
+            if key == Qt.Key.Key_Comma:
+                self._navigate_subtitle_line(-1)
+                return True
+            if key == Qt.Key.Key_Period:
+                self._navigate_subtitle_line(1)
+                return True
+            if key == Qt.Key.Key_R:
+                self._navigate_subtitle_line(0)
+                return True
+            if key == Qt.Key.Key_T:
+                self._toggle_transcript_drawer()
+                return True
+
+            # Skip intro/outro
+            if key == Qt.Key.Key_I:
+                self._skip_current_segment()
+                return True
+
+            # Scene navigation (PgDn/PgUp)
+            if key == Qt.Key.Key_PageDown:
+                self._navigate_scene(1)
+                return True
+            if key == Qt.Key.Key_PageUp:
+                self._navigate_scene(-1)
+                return True
+
             # Chapter navigation (Shift+N/P)
             if (mods & Qt.KeyboardModifier.ShiftModifier):
                 if key == Qt.Key.Key_N:
@@ -6053,6 +13097,42 @@ class PlayerWindow(QMainWindow):
         except Exception:
             pass
 
+        try:
+            thumbs = getattr(self, "_episode_thumbs", None)
+            if thumbs is not None:
+                thumbs.shutdown()
+            if getattr(self, "_seek_preview", None) is not None:
+                self._seek_preview.stop()
+            if _ANALYSIS_POOL is not None:
+                _ANALYSIS_POOL.shutdown()
+            if getattr(self, "_segment_detector", None) is not None:
+                self._segment_detector.stop()
+            if getattr(self, "_subsearch_indexer", None) is not None:
+                self._subsearch_indexer.stop()
+            if _PCM_POOL is not None:
+                _PCM_POOL.shutdown(wait=False, cancel_futures=True)
+        except Exception:
+            pass
+
+        try:
+            _fingerprints().flush()
+            _probe_cache_store().flush()
+        except Exception:
+            pass
+
+        try:
+            if self._resume_store is not None:
+                self._resume_store.close()
+        except Exception:
+            pass
+
+        try:
+            self._history_end_session("close")
+            if self._history is not None:
+                self._history.close()
+        except Exception:
+            pass
+
         # Quit mpv off the Qt thread (prevents 'Not Responding' if libmpv hangs during shutdown)
         try:
             mpv_obj = getattr(self, "_mpv", None)
@@ -6073,6 +13153,471 @@ class PlayerWindow(QMainWindow):
         return super().closeEvent(event)
 
 
+# ============================================================================
+# Service modes (headless, no window)
+# ============================================================================
+
+def _default_worker_count() -> int:
+    try:
+        n = int(os.cpu_count() or 2)
+    except Exception:
+        n = 2
+    return max(1, min(8, n // 2 or 1))
+
+
+def _parse_service_request(line: str) -> Optional[Dict[str, Any]]:
+    """A request line is either a bare path or a JSON object with at least "path"."""
+    s = str(line or "").strip()
+    if not s:
+        return None
+    if s.startswith("{"):
+        try:
+            msg = json.loads(s)
+        except Exception:
+            return None
+        if isinstance(msg, dict) and (msg.get("path") or msg.get("file")):
+            msg["path"] = str(msg.get("path") or msg.get("file"))
+            return msg
+        return None
+    return {"path": s}
+
+
+class ProbeService:
+    """Batch metadata probing over a pool of headless mpv instances.
+
+    `request()` answers cache hits synchronously and queues misses; `reply`
+    callbacks run on worker threads, so transports must marshal as needed.
+    """
+
+    def __init__(self, workers: int = 0, use_cache: bool = True):
+        self._cache = _probe_cache_store() if use_cache else None
+        self._workers = int(workers) if workers and int(workers) > 0 else _default_worker_count()
+        self._pool: Optional[HeadlessMpvPool] = None
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._outstanding = 0
+        self.stats = {"files": 0, "probed": 0, "cached": 0, "failed": 0}
+        self._t0 = time.monotonic()
+
+    def _ensure_pool(self) -> HeadlessMpvPool:
+        if self._pool is None:
+            self._pool = HeadlessMpvPool(
+                self._job,
+                workers=self._workers,
+                max_pending=0,
+                lifo=False,
+                name="probe",
+                mpv_options=dict(vid='no', cache='no', demuxer_readahead_secs=0),
+            )
+        return self._pool
+
+    def request(self, req: Dict[str, Any], reply) -> None:
+        path = str(req.get("path") or "")
+        base = {"type": "probe", "path": path}
+        if req.get("id") is not None:
+            base["id"] = req.get("id")
+        with self._lock:
+            self.stats["files"] += 1
+        if not os.path.isfile(path):
+            with self._lock:
+                self.stats["failed"] += 1
+            reply(dict(base, ok=False, error="file not found"))
+            return
+        if self._cache is not None and not req.get("refresh"):
+            info = self._cache.get(path)
+            if info is not None:
+                with self._lock:
+                    self.stats["cached"] += 1
+                reply(dict(base, ok=True, cached=True, **info))
+                return
+        with self._lock:
+            self._seq += 1
+            key = f"{self._seq}:{path}"
+            self._outstanding += 1
+        self._ensure_pool().submit(key, (path, base, reply))
+
+    def _job(self, m, key: str, payload):
+        path, base, reply = payload
+        try:
+            try:
+                info = _probe_file(m, path)
+            except Exception as e:
+                with self._lock:
+                    self.stats["failed"] += 1
+                reply(dict(base, ok=False, error=str(e)))
+                return
+            if self._cache is not None:
+                self._cache.put(path, info)
+            with self._lock:
+                self.stats["probed"] += 1
+            reply(dict(base, ok=True, cached=False, **info))
+        finally:
+            with self._lock:
+                self._outstanding -= 1
+                self._idle.notify_all()
+
+    def wait_idle(self):
+        with self._lock:
+            while self._outstanding > 0:
+                self._idle.wait(0.5)
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = max(1e-6, time.monotonic() - self._t0)
+        with self._lock:
+            st = dict(self.stats)
+        return dict(type="summary", workers=self._workers, seconds=round(elapsed, 3),
+                    files_per_sec=round(st["files"] / elapsed, 2), **st)
+
+    def close(self):
+        try:
+            if self._pool is not None:
+                self._pool.shutdown()
+        except Exception:
+            pass
+        if self._cache is not None:
+            self._cache.flush()
+
+
+def _emit_json_line(obj: Dict[str, Any], lock: threading.Lock, stream=None) -> None:
+    stream = stream or sys.stdout
+    try:
+        line = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    except Exception:
+        return
+    with lock:
+        try:
+            stream.write(line + "\n")
+            stream.flush()
+        except Exception:
+            pass
+
+
+def _serve_lines_over_ipc(server_name: str, handle_request) -> int:
+    """Run a QLocalServer that feeds request lines to `handle_request(req, reply)`.
+
+    Replies (JSON objects) may come from any thread; they are written back to the
+    requesting socket on the Qt thread. A {"cmd": "quit"} line stops the server.
+    """
+    from PySide6.QtCore import QCoreApplication
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    srv = _start_ipc_server(server_name, parent=app)
+    if srv is None:
+        print(json.dumps({"type": "error", "error": f"cannot listen on {server_name}"}))
+        return 2
+
+    class _Bridge(QObject):
+        send = Signal(object, str)
+
+    bridge = _Bridge()
+
+    def _write(sock, line):
+        try:
+            if sock.state() == QLocalSocket.LocalSocketState.ConnectedState:
+                sock.write((line + "\n").encode("utf-8"))
+        except Exception:
+            pass
+
+    bridge.send.connect(_write)
+
+    def _on_connection():
+        while srv.hasPendingConnections():
+            sock = srv.nextPendingConnection()
+            buf = {"b": b""}
+
+            def _read(sock=sock, buf=buf):
+                try:
+                    buf["b"] += bytes(sock.readAll())
+                except Exception:
+                    return
+                while b"\n" in buf["b"]:
+                    raw, buf["b"] = buf["b"].split(b"\n", 1)
+                    text = raw.decode("utf-8", errors="replace").strip()
+                    if text.startswith("{"):
+                        try:
+                            if json.loads(text).get("cmd") == "quit":
+                                app.quit()
+                                return
+                        except Exception:
+                            pass
+                    req = _parse_service_request(text)
+                    if req is None:
+                        continue
+
+                    def _reply(obj, sock=sock):
+                        try:
+                            bridge.send.emit(sock, json.dumps(obj, ensure_ascii=False, separators=(",", ":")))
+                        except Exception:
+                            pass
+
+                    handle_request(req, _reply)
+
+            sock.readyRead.connect(_read)
+            sock.disconnected.connect(sock.deleteLater)
+
+    srv.newConnection.connect(_on_connection)
+    print(json.dumps({"type": "ready", "server": server_name}), flush=True)
+    return int(app.exec())
+
+
+def run_probe_service(a) -> int:
+    """`--probe`: stream metadata for paths read from stdin (or an IPC socket) as JSON lines."""
+    if mpv is None:
+        print(json.dumps({"type": "error", "error": f"python-mpv unavailable: {IMPORT_ERR}"}), flush=True)
+        return 2
+    svc = ProbeService(workers=getattr(a, "service_workers", 0), use_cache=not getattr(a, "no_cache", False))
+    try:
+        server = str(getattr(a, "service_server", "") or "").strip()
+        if server:
+            return _serve_lines_over_ipc(_sanitize_ipc_name(server), svc.request)
+
+        out_lock = threading.Lock()
+
+        def _reply(obj):
+            _emit_json_line(obj, out_lock)
+
+        for p in list(getattr(a, "service_paths", []) or []):
+            svc.request({"path": p}, _reply)
+        stdin = sys.stdin
+        if stdin is not None and (not getattr(a, "service_paths", None) or not stdin.isatty()):
+            for line in stdin:
+                req = _parse_service_request(line)
+                if req is not None:
+                    svc.request(req, _reply)
+        svc.wait_idle()
+        _emit_json_line(svc.summary(), out_lock)
+        return 0
+    finally:
+        svc.close()
+
+
+# ---- --thumbnails: batch posters ----
+
+_POSTER_FORMATS = ("jpg", "webp")
+_POSTER_SMART_FRACTIONS = (0.33, 0.45, 0.25, 0.58, 0.70)
+_poster_mpv = None
+
+
+def _poster_cache(max_mb: int = 1024, fmt: str = "jpg") -> DiskLRUCache:
+    return DiskLRUCache(_player_cache_dir("posters"), max(16, int(max_mb)) * 1024 * 1024, f".{fmt}")
+
+
+def _poster_key(fp: str, width: int, fmt: str, times: Any, quality: int = 85) -> str:
+    spec = "smart" if times in (None, "", "smart") else json.dumps(times, separators=(",", ":"))
+    return hashlib.sha1(f"{fp}|poster|{int(width)}|{fmt}|q{int(quality)}|{spec}".encode("utf-8")).hexdigest()
+
+
+def _render_poster(m, path: str, times: Any, width: int, out_path: Path) -> Dict[str, Any]:
+    """Grab one poster frame into `out_path` (format from its extension).
+
+    `times` is a list of seconds / "NN%" strings tried in order, or "smart":
+    sample a few points away from the intro/credits and keep the frame with the
+    most contrast that isn't near-black or blown out.
+    """
+    smart = times in (None, "", "smart")
+    first = "33%" if smart else str((times or ["33%"])[0])
+    if not _headless_load(m, path, timeout=15.0, start=first, vf=f"scale=w={int(width)}:h=-2"):
+        raise RuntimeError("mpv could not open file")
+    try:
+        try:
+            duration = float(m.duration or 0.0)
+        except Exception:
+            duration = 0.0
+        if smart:
+            candidates = [duration * f for f in _POSTER_SMART_FRACTIONS] if duration > 0 else [None]
+        else:
+            candidates = []
+            for t in times:
+                ts = str(t).strip()
+                if ts.endswith("%") and duration > 0:
+                    candidates.append(duration * float(ts[:-1]) / 100.0)
+                else:
+                    candidates.append(float(ts))
+
+        best_t, best_score = None, -1.0
+        for i, t in enumerate(candidates):
+            if t is not None and i > 0 and not _headless_seek(m, t):
+                continue
+            if not smart:
+                best_t = t
+                break
+            mean, std = _frame_luma_stats(m.command('screenshot-raw', 'video') or {})
+            score = std if 0.08 <= mean <= 0.92 else std * 0.25
+            if score > best_score:
+                best_t, best_score = t, score
+            if std >= 0.18 and 0.12 <= mean <= 0.85:
+                break
+        if smart and best_t is not None and len(candidates) > 1:
+            _headless_seek(m, best_t)
+        m.command('screenshot-to-file', str(out_path), 'video')
+        return {"time": round(float(best_t), 3) if best_t is not None else None,
+                "score": round(best_score, 4) if smart else None}
+    finally:
+        try:
+            m.command('stop')
+        except Exception:
+            pass
+
+
+def _poster_worker(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Process-pool entry point: one poster per call, one headless mpv per worker process."""
+    global _poster_mpv
+    path = job["path"]
+    out = {"path": path}
+    try:
+        fp = job.get("fp") or content_fingerprint(path)
+        if not fp:
+            raise RuntimeError("cannot read file")
+        out["fp"] = fp
+        cache = _poster_cache(job.get("max_mb", 1024), job["format"])
+        quality = int(job.get("quality", 85))
+        key = _poster_key(fp, job["width"], job["format"], job.get("times"), quality)
+        out["key"] = key
+        if cache.path_for(key).exists():
+            out.update(ok=True, cached=True)
+            return out
+        if _poster_mpv is None:
+            _poster_mpv = _make_headless_mpv()
+        # Encoder settings are per job: the instance outlives the request that created it.
+        _poster_mpv.command('set', 'screenshot-jpeg-quality', str(quality))
+        _poster_mpv.command('set', 'screenshot-webp-quality', str(quality))
+        tmp = cache.tmp_path(key)
+        info = _render_poster(_poster_mpv, path, job.get("times"), job["width"], tmp)
+        if not tmp.exists() or tmp.stat().st_size <= 0:
+            raise RuntimeError("screenshot failed")
+        out.update(ok=True, cached=False, tmp=str(tmp), **info)
+        return out
+    except Exception as e:
+        # A wedged/dead instance is replaced on the next job.
+        try:
+            if _poster_mpv is not None:
+                _poster_mpv.command('stop')
+        except Exception:
+            try:
+                _poster_mpv.terminate()
+            except Exception:
+                pass
+            _poster_mpv = None
+        out.update(ok=False, error=str(e))
+        return out
+
+
+def run_thumbnail_service(a) -> int:
+    """`--thumbnails`: render library posters for paths from stdin/args, streaming JSON lines.
+
+    Work fans out over a process pool (one headless mpv per process) with a
+    bounded number of jobs in flight; posters land in a content-addressed,
+    size-capped LRU cache that this process owns.
+    """
+    if mpv is None:
+        print(json.dumps({"type": "error", "error": f"python-mpv unavailable: {IMPORT_ERR}"}), flush=True)
+        return 2
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    fmt = str(getattr(a, "poster_format", "jpg") or "jpg").lower().lstrip(".")
+    fmt = fmt if fmt in _POSTER_FORMATS else "jpg"
+    width = max(64, min(1920, int(getattr(a, "poster_width", 480) or 480)))
+    quality = max(1, min(100, int(getattr(a, "poster_quality", 85) or 85)))
+    max_mb = int(getattr(a, "cache_max_mb", 1024) or 1024)
+    workers = int(getattr(a, "service_workers", 0) or 0) or _default_worker_count()
+    times_default = str(getattr(a, "poster_times", "smart") or "smart")
+    times_default = "smart" if times_default == "smart" else [t for t in times_default.split(",") if t.strip()]
+    caches: Dict[str, DiskLRUCache] = {}
+    fps = _fingerprints()
+    out_lock = threading.Lock()
+    stats = {"files": 0, "rendered": 0, "cached": 0, "failed": 0}
+    t0 = time.monotonic()
+
+    def _cache_for(f: str) -> DiskLRUCache:
+        if f not in caches:
+            caches[f] = _poster_cache(max_mb, f)
+        return caches[f]
+
+    def _requests():
+        for p in list(getattr(a, "service_paths", []) or []):
+            yield {"path": p}
+        stdin = sys.stdin
+        if stdin is not None and (not getattr(a, "service_paths", None) or not stdin.isatty()):
+            for line in stdin:
+                req = _parse_service_request(line)
+                if req is not None:
+                    yield req
+
+    def _finish(req: Dict[str, Any], res: Dict[str, Any]):
+        f = req["_format"]
+        line = {"type": "poster", "path": req["path"], "ok": bool(res.get("ok"))}
+        if req.get("id") is not None:
+            line["id"] = req.get("id")
+        if res.get("fp"):
+            fps.remember(req["path"], res["fp"])
+        if res.get("ok"):
+            cache = _cache_for(f)
+            dst = cache.put_file(res["key"], Path(res["tmp"])) if res.get("tmp") else cache.get(res["key"])
+            if dst is None:
+                res = {"ok": False, "error": "cache write failed"}
+                line["ok"] = False
+            else:
+                stats["cached" if res.get("cached") else "rendered"] += 1
+                line.update(file=str(dst), cached=bool(res.get("cached")), format=f, width=req["_width"])
+                if res.get("time") is not None:
+                    line["time"] = res["time"]
+        if not line["ok"]:
+            stats["failed"] += 1
+            line["error"] = res.get("error") or "failed"
+        line["done"] = stats["rendered"] + stats["cached"] + stats["failed"]
+        line["files"] = stats["files"]
+        _emit_json_line(line, out_lock)
+
+    max_in_flight = workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running: Dict[Any, Dict[str, Any]] = {}
+        for req in _requests():
+            path = str(req.get("path") or "")
+            stats["files"] += 1
+            f = str(req.get("format") or fmt).lower().lstrip(".")
+            req["_format"] = f if f in _POSTER_FORMATS else fmt
+            req["_width"] = max(64, min(1920, int(req.get("width") or width)))
+            times = req.get("times", times_default)
+            try:
+                req["_quality"] = max(1, min(100, int(req.get("quality") or quality)))
+            except Exception:
+                req["_quality"] = quality
+            if not os.path.isfile(path):
+                _finish(req, {"ok": False, "error": "file not found"})
+                continue
+            # Rescans: known fingerprint + cached poster answers without touching the pool.
+            fp = fps.cached(path)
+            if fp:
+                key = _poster_key(fp, req["_width"], req["_format"], times, req["_quality"])
+                if _cache_for(req["_format"]).get(key) is not None:
+                    _finish(req, {"ok": True, "cached": True, "key": key})
+                    continue
+            job = {"path": path, "fp": fp, "width": req["_width"], "format": req["_format"],
+                   "times": times, "max_mb": max_mb, "quality": req["_quality"]}
+            running[pool.submit(_poster_worker, job)] = req
+            while len(running) >= max_in_flight:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    r = running.pop(fut)
+                    try:
+                        _finish(r, fut.result())
+                    except Exception as e:
+                        _finish(r, {"ok": False, "error": str(e)})
+        for fut in list(running):
+            r = running.pop(fut)
+            try:
+                _finish(r, fut.result())
+            except Exception as e:
+                _finish(r, {"ok": False, "error": str(e)})
+
+    fps.flush()
+    elapsed = max(1e-6, time.monotonic() - t0)
+    _emit_json_line(dict(type="summary", workers=workers, seconds=round(elapsed, 3),
+                         files_per_sec=round(stats["files"] / elapsed, 2), **stats), out_lock)
+    return 0
+
+
 # ============================================================================
 # Main
 # ============================================================================
@@ -6146,11 +13691,20 @@ def _apply_taskbar_icon(w: QMainWindow, icon: QIcon, tries: int = 0) -> None:
 
 def main() -> int:
     """Build 13 main entry point."""
+    # Frozen builds: let --thumbnails pool workers bootstrap instead of re-running main()
+    multiprocessing.freeze_support()
     a = parse_args()
 
     # Merge positional file arg with --file flag
     a.file_path = a.file_path or getattr(a, "file_pos", "") or ""
 
+    # Headless service modes never create a window
+    if getattr(a, "probe", False) or getattr(a, "thumbnails", False):
+        a.service_paths = ([a.file_path] if a.file_path else []) + list(getattr(a, "extra_args", []) or [])
+        if getattr(a, "thumbnails", False):
+            return run_thumbnail_service(a)
+        return run_probe_service(a)
+
     # Windows: set explicit AppUserModelID so the taskbar groups/icons correctly
     if sys.platform.startswith("win"):
         try: